@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 import sys
 sys.path.insert(0, '.')
 
-from scripts.database import SessionLocal
+from scripts.conexion_dashboard import sesion_dashboard
 from scripts.models import Ciudad, RegistroClima, MetricasETL
 
 # Configuración de la página
@@ -22,10 +22,8 @@ st.set_page_config(
 st.title("🌍 Dashboard de Clima - ETL Weatherstack")
 st.markdown("---")
 
-# Conecta a la base de datos
-db = SessionLocal()
-
-try:
+# Sesión por rerun: la conexión vuelve al pool aunque falle el render
+with sesion_dashboard() as db:
     # Obtén todos los registros de clima
     registros = db.query(RegistroClima, Ciudad.nombre).join(
         Ciudad
@@ -159,7 +157,4 @@ try:
         df_filtrado.sort_values('Fecha', ascending=False),
         use_container_width=True,
         height=400
-    )
-
-finally:
-    db.close()
\ No newline at end of file
+    )
\ No newline at end of file
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import streamlit as st
+import pandas as pd
+import sys
+sys.path.insert(0, '.')
+
+from scripts.database import DB_POOL_TIMEOUT, DB_POOL_RECYCLE, UMBRAL_ESPERA_POOL
+from scripts.conexion_dashboard import metricas_pool
+
+st.set_page_config(
+    page_title="Diagnóstico",
+    page_icon="🩺",
+    layout="wide"
+)
+
+st.title("🩺 Diagnóstico - Pool de Conexiones")
+st.markdown("---")
+
+try:
+    stats = metricas_pool()
+except Exception as e:
+    st.error(f"❌ No se pudo conectar a PostgreSQL: {e}")
+    st.stop()
+
+capacidad = stats['tamano'] + stats['max_overflow']
+
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("🔌 En uso", f"{stats['en_uso']} / {capacidad}")
+
+with col2:
+    st.metric("💤 Disponibles", stats['disponibles'])
+
+with col3:
+    st.metric("➕ Overflow", f"{stats['overflow']} / {stats['max_overflow']}")
+
+with col4:
+    st.metric("⛔ Timeouts", stats['timeouts'])
+
+st.progress(min(stats['en_uso'] / capacidad, 1.0) if capacidad else 0.0,
+            text=f"Ocupación del pool: {stats['en_uso']} de {capacidad} conexiones")
+
+st.markdown("---")
+
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("📊 Checkouts", stats['checkouts'])
+
+with col2:
+    st.metric("⏱️ Espera Media", f"{stats['espera_media'] * 1000:.1f} ms")
+
+with col3:
+    st.metric("⏱️ Espera Máxima", f"{stats['espera_max'] * 1000:.1f} ms")
+
+with col4:
+    st.metric(f"🐢 Esperas > {UMBRAL_ESPERA_POOL * 1000:.0f} ms", stats['esperas_largas'])
+
+st.markdown("---")
+st.subheader("⚙️ Configuración")
+st.dataframe(pd.DataFrame([
+    {'Parámetro': 'DB_POOL_SIZE', 'Valor': stats['tamano']},
+    {'Parámetro': 'DB_MAX_OVERFLOW', 'Valor': stats['max_overflow']},
+    {'Parámetro': 'DB_POOL_TIMEOUT (s)', 'Valor': DB_POOL_TIMEOUT},
+    {'Parámetro': 'DB_POOL_RECYCLE (s)', 'Valor': DB_POOL_RECYCLE}
+]), use_container_width=True, hide_index=True)
+
+if st.button("🔄 Actualizar"):
+    st.rerun()
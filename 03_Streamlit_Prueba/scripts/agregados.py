@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import logging
+from sqlalchemy import text, bindparam
+
+logger = logging.getLogger(__name__)
+
+# Tabla de agregados por unidad de date_trunc
+TABLAS_AGREGADOS = {
+    'hour': 'clima_horario',
+    'day': 'clima_diario'
+}
+
+
+def _sql_actualizar(unidad, tabla, por_ciudad):
+    """INSERT ... SELECT ... GROUP BY que recalcula los periodos de [desde, hasta]"""
+    filtro_ciudades = "AND ciudad_id IN :ciudades" if por_ciudad else ""
+    consulta = text(f"""
+        INSERT INTO {tabla} (ciudad_id, periodo, registros, temp_min, temp_promedio, temp_max,
+                             humedad_promedio, viento_promedio)
+        SELECT ciudad_id,
+               date_trunc('{unidad}', fecha_extraccion),
+               count(*),
+               min(temperatura),
+               avg(temperatura),
+               max(temperatura),
+               avg(humedad),
+               avg(velocidad_viento)
+        FROM registros_clima
+        WHERE fecha_extraccion >= date_trunc('{unidad}', CAST(:desde AS timestamp))
+          AND fecha_extraccion < date_trunc('{unidad}', CAST(:hasta AS timestamp)) + interval '1 {unidad}'
+          {filtro_ciudades}
+        GROUP BY 1, 2
+        ON CONFLICT (ciudad_id, periodo) DO UPDATE SET
+            registros = EXCLUDED.registros,
+            temp_min = EXCLUDED.temp_min,
+            temp_promedio = EXCLUDED.temp_promedio,
+            temp_max = EXCLUDED.temp_max,
+            humedad_promedio = EXCLUDED.humedad_promedio,
+            viento_promedio = EXCLUDED.viento_promedio
+    """)
+    if por_ciudad:
+        consulta = consulta.bindparams(bindparam('ciudades', expanding=True))
+    return consulta
+
+
+def actualizar_agregados(conn, desde, hasta, ciudad_ids=None):
+    """Recalcula los agregados horarios y diarios de los periodos tocados por una carga
+
+    Solo se leen los registros de [desde, hasta] (redondeado al periodo) de las ciudades
+    indicadas, así que el coste depende de lo cargado y no del histórico completo.
+    """
+    if desde is None or hasta is None:
+        return
+    ciudad_ids = sorted({int(c) for c in ciudad_ids}) if ciudad_ids is not None else None
+    if ciudad_ids == []:
+        return
+
+    parametros = {'desde': desde, 'hasta': hasta}
+    if ciudad_ids is not None:
+        parametros['ciudades'] = ciudad_ids
+
+    for unidad, tabla in TABLAS_AGREGADOS.items():
+        filas = conn.execute(_sql_actualizar(unidad, tabla, ciudad_ids is not None), parametros).rowcount
+        logger.info(f"📐 {tabla}: {filas} periodos actualizados")
+
+
+def reconstruir_agregados(conn):
+    """Recalcula los agregados a partir de todo registros_clima"""
+    desde, hasta = conn.execute(
+        text("SELECT min(fecha_extraccion), max(fecha_extraccion) FROM registros_clima")
+    ).one()
+    actualizar_agregados(conn, desde, hasta)
+
+
+def rellenar_agregados_vacios(conn):
+    """Genera los agregados de un histórico cargado antes de que existieran las tablas"""
+    vacios = conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM clima_diario)")).scalar()
+    if vacios:
+        reconstruir_agregados(conn)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from scripts.database import get_engine
+
+    with get_engine().begin() as conn:
+        reconstruir_agregados(conn)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import pandas as pd
+from sqlalchemy import select, true, literal
+from scripts.models import Ciudad, RegistroClima, ClimaHorario, ClimaDiario
+from scripts.series import elegir_resolucion, reducir_serie
+
+TABLAS_RESOLUCION = {'hora': ClimaHorario, 'dia': ClimaDiario}
+
+COLUMNAS_SERIE = ['Fecha', 'Ciudad', 'Temperatura', 'Temp Mín', 'Temp Máx', 'Humedad', 'Viento', 'Registros']
+
+
+def ultimos_registros(db):
+    """Último registro de cada ciudad: un LATERAL ... LIMIT 1 por ciudad sobre ix_registros_clima_ciudad_fecha"""
+    ultimo = (
+        select(
+            RegistroClima.temperatura,
+            RegistroClima.humedad,
+            RegistroClima.velocidad_viento,
+            RegistroClima.descripcion
+        )
+        .where(RegistroClima.ciudad_id == Ciudad.id)
+        .order_by(RegistroClima.fecha_extraccion.desc())
+        .limit(1)
+        .lateral('ultimo')
+    )
+    consulta = (
+        select(
+            Ciudad.nombre,
+            ultimo.c.temperatura,
+            ultimo.c.humedad,
+            ultimo.c.velocidad_viento,
+            ultimo.c.descripcion
+        )
+        .select_from(Ciudad)
+        .join(ultimo, true())
+        .order_by(Ciudad.nombre)
+    )
+    return db.execute(consulta).all()
+
+
+
+def serie_temperatura(db, desde, hasta, ciudades=None, resolucion=None, temp_min=None, temp_max=None):
+    """Serie temporal por ciudad con la resolución adecuada al rango de fechas
+
+    Los rangos cortos leen registros_clima y se reducen con LTTB; los largos leen
+    clima_horario o clima_diario. `temp_min`/`temp_max` conservan los periodos cuyo rango
+    [mínima, máxima] se solapa con el filtro, es decir, los que tienen alguna lectura dentro
+    (en crudo, las lecturas dentro del filtro, como en el resto del dashboard).
+    Devuelve (DataFrame, resolución usada).
+    """
+    resolucion = resolucion or elegir_resolucion(desde, hasta)
+
+    if resolucion == 'crudo':
+        fuente = RegistroClima
+        fecha = RegistroClima.fecha_extraccion
+        temperatura = minima = maxima = RegistroClima.temperatura
+        columnas = [
+            temperatura.label('Temperatura'),
+            temperatura.label('Temp Mín'),
+            temperatura.label('Temp Máx'),
+            RegistroClima.humedad.label('Humedad'),
+            RegistroClima.velocidad_viento.label('Viento'),
+            literal(1).label('Registros')
+        ]
+    else:
+        fuente = TABLAS_RESOLUCION[resolucion]
+        fecha = fuente.periodo
+        temperatura = fuente.temp_promedio
+        minima, maxima = fuente.temp_min, fuente.temp_max
+        columnas = [
+            temperatura.label('Temperatura'),
+            fuente.temp_min.label('Temp Mín'),
+            fuente.temp_max.label('Temp Máx'),
+            fuente.humedad_promedio.label('Humedad'),
+            fuente.viento_promedio.label('Viento'),
+            fuente.registros.label('Registros')
+        ]
+
+    consulta = (
+        select(fecha.label('Fecha'), Ciudad.nombre.label('Ciudad'), *columnas)
+        .join(Ciudad, Ciudad.id == fuente.ciudad_id)
+        .where(fecha >= desde, fecha <= hasta)
+        .order_by(Ciudad.nombre, fecha)
+    )
+    if ciudades is not None:
+        consulta = consulta.where(Ciudad.nombre.in_(ciudades))
+    if temp_min is not None:
+        consulta = consulta.where(maxima >= temp_min)
+    if temp_max is not None:
+        consulta = consulta.where(minima <= temp_max)
+
+    df = pd.DataFrame(db.execute(consulta).all(), columns=COLUMNAS_SERIE)
+    if resolucion == 'crudo':
+        df = reducir_serie(df, 'Fecha', 'Temperatura', 'Ciudad')
+    return df, resolucion
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from contextlib import contextmanager
 import os
+import time
+import threading
 from dotenv import load_dotenv
 import logging
 
@@ -23,25 +27,123 @@ DB_NAME = os.getenv('DB_NAME', 'postgres')
 # Crear URL de conexión
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-try:
-    # Crear engine
-    engine = create_engine(
+# Pool de conexiones (configurable desde .env)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+# Segundos tras los que se recicla una conexión (antes de que la cierre el servidor o un proxy)
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
+# Esperas por encima de este umbral (segundos) cuentan como contención del pool
+UMBRAL_ESPERA_POOL = float(os.getenv('DB_POOL_UMBRAL_ESPERA', '0.1'))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout hasta obtener una conexión"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metricas_lock = threading.Lock()
+        self.metricas = {'checkouts': 0, 'espera_total': 0.0, 'espera_max': 0.0, 'esperas_largas': 0, 'timeouts': 0}
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metricas_lock:
+                self.metricas['timeouts'] += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._metricas_lock:
+                self.metricas['checkouts'] += 1
+                self.metricas['espera_total'] += espera
+                self.metricas['espera_max'] = max(self.metricas['espera_max'], espera)
+                if espera > UMBRAL_ESPERA_POOL:
+                    self.metricas['esperas_largas'] += 1
+
+    def recreate(self):
+        # dispose() recrea el pool; las métricas se conservan
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        nuevo._metricas_lock = self._metricas_lock
+        return nuevo
+
+def crear_engine():
+    """Crea el engine con pre-ping y reciclado de conexiones"""
+    return create_engine(
         DATABASE_URL,
         echo=False,  # Cambiar a True para ver las queries SQL
-        pool_size=5,
-        max_overflow=10
+        poolclass=PoolMedido,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True
     )
-    
-    # Probar conexión
-    with engine.connect() as conn:
-        logger.info("✅ Conexión a PostgreSQL exitosa")
-        
-except Exception as e:
-    logger.error(f"❌ Error conectando a PostgreSQL: {e}")
-    raise
-
-# Crear SessionLocal
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_engine():
+    """Engine compartido; se crea y se prueba la conexión en el primer uso, no al importar"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = crear_engine()
+                try:
+                    # Probar conexión
+                    with engine.connect():
+                        logger.info("✅ Conexión a PostgreSQL exitosa")
+                except Exception as e:
+                    logger.error(f"❌ Error conectando a PostgreSQL: {e}")
+                    engine.dispose()
+                    raise
+                _engine = engine
+    return _engine
+
+def __getattr__(nombre):
+    # Compatibilidad con `from scripts.database import engine`
+    if nombre == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+_fabrica_sesiones = sessionmaker(autocommit=False, autoflush=False)
+
+def SessionLocal():
+    """Nueva sesión ligada al engine compartido"""
+    return _fabrica_sesiones(bind=get_engine())
+
+@contextmanager
+def sesion_bd(engine=None):
+    """Sesión que se cierra siempre (y hace rollback si algo falla), devolviendo la conexión al pool"""
+    db = _fabrica_sesiones(bind=engine or get_engine())
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def estadisticas_pool(engine=None):
+    """Estado del pool: conexiones en uso, overflow y tiempos de espera de checkout"""
+    pool = (engine or get_engine()).pool
+    metricas = dict(getattr(pool, 'metricas', {}))
+    checkouts = metricas.get('checkouts', 0)
+    return {
+        'tamano': pool.size(),
+        'max_overflow': DB_MAX_OVERFLOW,
+        'en_uso': pool.checkedout(),
+        'disponibles': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'checkouts': checkouts,
+        'espera_media': metricas.get('espera_total', 0.0) / checkouts if checkouts else 0.0,
+        'espera_max': metricas.get('espera_max', 0.0),
+        'esperas_largas': metricas.get('esperas_largas', 0),
+        'timeouts': metricas.get('timeouts', 0)
+    }
 
 def get_db():
     """Dependencia para obtener sesión de base de datos"""
@@ -54,8 +156,25 @@ def get_db():
 def init_db():
     """Inicializa la base de datos creando las tablas"""
     from scripts.models import Base
+    from scripts.particiones import apartar_tabla_sin_particiones, trasladar_registros, asegurar_particiones
+    from scripts.agregados import rellenar_agregados_vacios
     try:
-        Base.metadata.create_all(bind=engine)
+        engine = get_engine()
+        # Una sola transacción: si algo falla, el registros_clima anterior al particionado
+        # vuelve a su sitio y la migración se repite entera en la siguiente ejecución
+        with engine.begin() as conn:
+            antigua = apartar_tabla_sin_particiones(conn)
+            
+            Base.metadata.create_all(bind=conn)
+            # create_all no añade índices nuevos a tablas que ya existían
+            for tabla in Base.metadata.sorted_tables:
+                for indice in tabla.indexes:
+                    indice.create(bind=conn, checkfirst=True)
+            
+            asegurar_particiones(conn)
+            if antigua:
+                trasladar_registros(conn, antigua)
+            rellenar_agregados_vacios(conn)
         logger.info("✅ Tablas creadas/verificadas exitosamente")
     except SQLAlchemyError as e:
         logger.error(f"❌ Error creando tablas: {e}")
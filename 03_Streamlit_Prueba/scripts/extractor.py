@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
+import sys
 import os
-import requests
-import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
+from scripts.http_client import ClienteHTTP
+from scripts.rate_limiter import limitador_desde_env
+from scripts.http_cache import cache_desde_env
+from scripts.formatos import tipar_clima, guardar_parquet
+from scripts.pipeline import Pipeline, SumideroNDJSON, SumideroCSV, SumideroBD
 
 # Cargar variables de entorno
 load_dotenv()
@@ -21,11 +27,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Columnas de data/clima.csv (las claves de `procesar_respuesta`)
+COLUMNAS_CSV = [
+    'ciudad', 'pais', 'latitud', 'longitud', 'temperatura', 'sensacion_termica', 'humedad',
+    'velocidad_viento', 'descripcion', 'fecha_extraccion', 'codigo_tiempo'
+]
+
 class WeatherstackExtractor:
     def __init__(self):
         self.api_key = os.getenv('API_KEY')
         self.base_url = os.getenv('WEATHERSTACK_BASE_URL')
-        self.ciudades = os.getenv('CIUDADES').split(',')
+        # Nombres limpios una sola vez: se usan en las peticiones, los logs y el checkpoint
+        self.ciudades = [ciudad.strip() for ciudad in os.getenv('CIUDADES', '').split(',') if ciudad.strip()]
+        self.http = ClienteHTTP(
+            limitador=limitador_desde_env('WEATHERSTACK', tasa_defecto=1),
+            # /current cambia cada pocos minutos: la caché solo evita repetir peticiones en
+            # reintentos cercanos, nunca sirve a una ejecución horaria la lectura de la anterior
+            cache=cache_desde_env(secretos=[self.api_key], ttl=float(os.getenv('WEATHERSTACK_CACHE_TTL', '600')))
+        )
         
         if not self.api_key:
             raise ValueError("API_KEY no configurada en .env")
@@ -36,16 +55,17 @@ class WeatherstackExtractor:
             url = f"{self.base_url}/current"
             params = {
                 'access_key': self.api_key,
-                'query': ciudad.strip()
+                'query': ciudad
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             
             if 'error' in data:
                 logger.error(f"❌ Error en API para {ciudad}: {data['error']['info']}")
+                self.http.descartar_cache(url, params=params)
                 return None
             
             logger.info(f"✅ Datos extraídos para {ciudad}")
@@ -55,6 +75,22 @@ class WeatherstackExtractor:
             logger.error(f"❌ Error extrayendo datos para {ciudad}: {str(e)}")
             return None
     
+    @staticmethod
+    def fecha_observacion(location):
+        """Momento en que la API generó la respuesta, en hora del servidor (ISO, sin zona)
+
+        Sale de la propia respuesta y no del reloj, así que una respuesta repetida desde la caché
+        conserva su fecha y populate_db.py la descarta como duplicada. Se guarda en la misma zona
+        que datetime.now(), como el resto de registros_clima y los filtros de los dashboards.
+        `localtime_epoch` codifica la hora local de la ciudad como si fuera UTC; `utc_offset`
+        (en horas) la lleva al instante real.
+        """
+        try:
+            epoch = float(location['localtime_epoch']) - float(location['utc_offset']) * 3600
+        except (KeyError, TypeError, ValueError):
+            return datetime.now().isoformat()
+        return datetime.fromtimestamp(epoch).isoformat()
+    
     def procesar_respuesta(self, response_data):
         """Procesa la respuesta JSON a formato estructurado"""
         try:
@@ -71,42 +107,53 @@ class WeatherstackExtractor:
                 'humedad': current.get('humidity'),
                 'velocidad_viento': current.get('wind_speed'),
                 'descripcion': current.get('weather_descriptions', ['N/A'])[0],
-                'fecha_extraccion': datetime.now().isoformat(),
+                'fecha_extraccion': self.fecha_observacion(location),
                 'codigo_tiempo': current.get('weather_code')
             }
         except Exception as e:
             logger.error(f"Error procesando respuesta: {str(e)}")
             return None
     
-    def ejecutar_extraccion(self):
-        """Ejecuta la extracción para todas las ciudades"""
-        datos_extraidos = []
-        
-        logger.info(f"Iniciando extracción para {len(self.ciudades)} ciudades...")
-        
-        for ciudad in self.ciudades:
+    def registros(self, ciudades):
+        """Genera (ciudad, registro) extrayendo una ciudad cada vez"""
+        for ciudad in ciudades:
             response = self.extraer_clima(ciudad)
-            if response:
-                datos_procesados = self.procesar_respuesta(response)
-                if datos_procesados:
-                    datos_extraidos.append(datos_procesados)
+            yield ciudad, self.procesar_respuesta(response) if response else None
+    
+    def ejecutar_extraccion(self, pipeline):
+        """Ejecuta la extracción de las ciudades pendientes del checkpoint hacia los sumideros"""
+        pendientes = pipeline.pendientes(self.ciudades)
+        logger.info(f"Iniciando extracción para {len(pendientes)} ciudades...")
         
-        return datos_extraidos
+        escritos = pipeline.ejecutar(self.registros(pendientes))
+        self.http.registrar_estadisticas()
+        return escritos
 
 if __name__ == "__main__":
     try:
         extractor = WeatherstackExtractor()
-        datos = extractor.ejecutar_extraccion()
         
-        # Guardar como JSON
-        with open('data/clima_raw.json', 'w') as f:
-            json.dump(datos, f, indent=2)
-        logger.info(f"📁 Datos guardados en data/clima_raw.json")
+        # JSON por líneas y CSV se escriben a medida que llega cada ciudad
+        sumideros = {
+            'ndjson': SumideroNDJSON('data/clima_raw.ndjson'),
+            'csv': SumideroCSV('data/clima.csv', COLUMNAS_CSV)
+        }
+        if os.getenv('PIPELINE_CARGAR_BD', 'false').lower() in ('1', 'true', 'si', 'sí'):
+            from scripts.database import init_db
+            from scripts.populate_db import cargar_registros
+            init_db()
+            sumideros['bd'] = SumideroBD(cargar_registros)
+        
+        with Pipeline(sumideros, 'data/clima.checkpoint.json') as pipeline:
+            extractor.ejecutar_extraccion(pipeline)
+        
+        if not pipeline.publicado:
+            print(f"\n⚠️ Extracción incompleta: {', '.join(pipeline.fallidos)} se reintentarán en la próxima ejecución")
+            sys.exit(1)
         
-        # Guardar como CSV
-        df = pd.DataFrame(datos)
-        df.to_csv('data/clima.csv', index=False)
-        logger.info(f"📁 Datos guardados en data/clima.csv")
+        df = pd.read_csv('data/clima.csv')
+        if os.getenv('EXPORTAR_PARQUET', 'false').lower() in ('1', 'true', 'si', 'sí'):
+            guardar_parquet(tipar_clima(df), 'data/clima.parquet')
         
         print("\n" + "="*50)
         print("RESUMEN DE EXTRACCIÓN")
@@ -115,4 +162,4 @@ if __name__ == "__main__":
         print("="*50)
         
     except Exception as e:
-        logger.error(f"Error en extracción: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error en extracción: {str(e)}")
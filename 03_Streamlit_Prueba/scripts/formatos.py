@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import os
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+
+def pyarrow_disponible():
+    """True si pyarrow está instalado (dependencia opcional)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def tipar_clima(df):
+    """Aplica tipos columnares: medidas float32/int8, textos categóricos y fecha como timestamp"""
+    df = df.copy()
+    for columna in ['temperatura', 'sensacion_termica', 'velocidad_viento']:
+        df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('float32')
+    df['humedad'] = pd.to_numeric(df['humedad'], errors='coerce').astype('Int8')
+    df['codigo_tiempo'] = pd.to_numeric(df['codigo_tiempo'], errors='coerce').astype('Int16')
+    for columna in ['ciudad', 'pais', 'descripcion']:
+        df[columna] = df[columna].astype('category')
+    df['fecha_extraccion'] = pd.to_datetime(df['fecha_extraccion'], errors='coerce')
+    return df
+
+
+def guardar_parquet(df, ruta):
+    """Escribe `df` en Parquet; devuelve False si pyarrow no está instalado"""
+    if not pyarrow_disponible():
+        logger.warning("⚠️ pyarrow no está instalado, se omite la salida Parquet")
+        return False
+    df.to_parquet(ruta, index=False, engine='pyarrow')
+    logger.info(f"📁 Datos guardados en {ruta}")
+    return True
+
+
+def ruta_tabla(base):
+    """Fichero que leería leer_tabla(): `<base>.parquet` si existe y no es más antiguo que el CSV; si no, `<base>.csv`"""
+    ruta_parquet = f"{base}.parquet"
+    ruta_csv = f"{base}.csv"
+
+    if os.path.exists(ruta_parquet) and pyarrow_disponible():
+        if not os.path.exists(ruta_csv) or os.path.getmtime(ruta_parquet) >= os.path.getmtime(ruta_csv):
+            return ruta_parquet
+        logger.info(f"ℹ️ {ruta_parquet} es anterior a {ruta_csv}, se usa el CSV")
+
+    if os.path.exists(ruta_csv):
+        return ruta_csv
+    return None
+
+
+def leer_tabla(base, ruta=None):
+    """Lee la tabla elegida por ruta_tabla() (o la `ruta` ya resuelta); None si no hay ninguna"""
+    ruta = ruta or ruta_tabla(base)
+    if ruta is None:
+        return None
+    if ruta.endswith('.parquet'):
+        return pd.read_parquet(ruta, engine='pyarrow')
+    return pd.read_csv(ruta)
@@ -1,8 +1,10 @@
 # scripts/init_db.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from database import engine, Base
-import models
+from scripts.database import init_db
 
 print("Creando tablas...")
-Base.metadata.create_all(bind=engine)
-print("Tablas creadas correctamente.")
\ No newline at end of file
+init_db()
+print("Tablas creadas correctamente.")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import os
+import hashlib
+import logging
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from scripts.models import ManifiestoArchivo
+
+logger = logging.getLogger(__name__)
+
+# POPULATE_FORZAR=true recarga aunque el fichero coincida con la última carga
+FORZAR_CARGA = os.getenv('POPULATE_FORZAR', 'false').lower() in ('1', 'true', 'si', 'sí')
+
+# Bytes leídos por iteración al calcular el hash de un fichero
+TAMANO_BLOQUE_HASH = 1024 * 1024
+
+
+def hash_archivo(*rutas):
+    """sha256 del contenido de los ficheros indicados que existan (None si no existe ninguno)
+
+    Se lee en bloques, así que el coste es proporcional al tamaño y no a la memoria disponible.
+    """
+    huella = hashlib.sha256()
+    encontrado = False
+    for ruta in rutas:
+        if not ruta or not os.path.exists(ruta):
+            continue
+        encontrado = True
+        # El nombre separa los ficheros: mover contenido de uno a otro cambia la huella
+        huella.update(os.path.basename(ruta).encode('utf-8') + b'\0')
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+                huella.update(bloque)
+    return huella.hexdigest() if encontrado else None
+
+
+def archivo_registrado(conn, origen):
+    """(hash, registros) de la última carga de `origen` o None si nunca se cargó"""
+    return conn.execute(
+        select(ManifiestoArchivo.hash, ManifiestoArchivo.registros).where(ManifiestoArchivo.origen == origen)
+    ).one_or_none()
+
+
+def registrar_archivo(conn, origen, huella, registros):
+    """Guarda la huella del fichero cargado; va en la misma transacción que los datos"""
+    stmt = insert(ManifiestoArchivo).values(
+        origen=origen, hash=huella, registros=int(registros), fecha_carga=datetime.now()
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[ManifiestoArchivo.origen],
+        set_={'hash': stmt.excluded.hash, 'registros': stmt.excluded.registros, 'fecha_carga': stmt.excluded.fecha_carga}
+    ))
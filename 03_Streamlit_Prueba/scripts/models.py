@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,7 +25,8 @@ class Ciudad(Base):
 class RegistroClima(Base):
     __tablename__ = 'registros_clima'
     
-    id = Column(Integer, primary_key=True)
+    # En una tabla particionada la PK debe incluir la clave de partición
+    id = Column(Integer, primary_key=True, autoincrement=True)
     ciudad_id = Column(Integer, ForeignKey('ciudades.id'))
     temperatura = Column(Float)
     sensacion_termica = Column(Float)
@@ -33,13 +34,52 @@ class RegistroClima(Base):
     velocidad_viento = Column(Float)
     descripcion = Column(String(200))
     codigo_tiempo = Column(Integer)
-    fecha_extraccion = Column(DateTime, default=datetime.now)
+    fecha_extraccion = Column(DateTime, primary_key=True, default=datetime.now)
     
     # Relación con ciudad
     ciudad = relationship("Ciudad", back_populates="registros_clima")
     
+    # Índice para "último registro por ciudad" y rangos de fechas por ciudad.
+    # Particionada por mes: las particiones las crea scripts/particiones.py
+    __table_args__ = (
+        Index('ix_registros_clima_ciudad_fecha', ciudad_id, fecha_extraccion.desc()),
+        {'postgresql_partition_by': 'RANGE (fecha_extraccion)'}
+    )
+    
     def __repr__(self):
         return f"<RegistroClima(ciudad_id={self.ciudad_id}, temp={self.temperatura}°C)>"
+
+class ClimaHorario(Base):
+    """Agregado por ciudad y hora; lo mantiene scripts/agregados.py en cada carga"""
+    __tablename__ = 'clima_horario'
+    
+    ciudad_id = Column(Integer, ForeignKey('ciudades.id'), primary_key=True)
+    periodo = Column(DateTime, primary_key=True)
+    registros = Column(Integer, nullable=False)
+    temp_min = Column(Float)
+    temp_promedio = Column(Float)
+    temp_max = Column(Float)
+    humedad_promedio = Column(Float)
+    viento_promedio = Column(Float)
+    
+    def __repr__(self):
+        return f"<ClimaHorario(ciudad_id={self.ciudad_id}, periodo={self.periodo})>"
+
+class ClimaDiario(Base):
+    """Agregado por ciudad y día; lo mantiene scripts/agregados.py en cada carga"""
+    __tablename__ = 'clima_diario'
+    
+    ciudad_id = Column(Integer, ForeignKey('ciudades.id'), primary_key=True)
+    periodo = Column(DateTime, primary_key=True)
+    registros = Column(Integer, nullable=False)
+    temp_min = Column(Float)
+    temp_promedio = Column(Float)
+    temp_max = Column(Float)
+    humedad_promedio = Column(Float)
+    viento_promedio = Column(Float)
+    
+    def __repr__(self):
+        return f"<ClimaDiario(ciudad_id={self.ciudad_id}, periodo={self.periodo})>"
     
 class MetricasETL(Base):
     __tablename__ = 'metricas_etl'
@@ -51,4 +91,13 @@ class MetricasETL(Base):
     registros_fallidos = Column(Integer, default=0)
     tiempo_ejecucion_segundos = Column(Float, default=0.0)
     estado = Column(String(50))  # 'exitoso', 'fallido'
-    error_message = Column(Text, nullable=True)
\ No newline at end of file
+    error_message = Column(Text, nullable=True)
+
+class ManifiestoArchivo(Base):
+    """Huella del último fichero cargado por populate_db.py en cada origen"""
+    __tablename__ = 'manifiesto_archivos'
+    
+    origen = Column(String(100), primary_key=True)  # 'clima', 'superheroes'
+    hash = Column(String(64), nullable=False)  # sha256 del contenido
+    registros = Column(Integer, nullable=False)
+    fecha_carga = Column(DateTime, default=datetime.now, nullable=False)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import logging
+from datetime import datetime
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+TABLA_PARTICIONADA = 'registros_clima'
+
+# Meses por delante del actual que se dejan creados
+MESES_FUTUROS = int(os.getenv('PARTICIONES_MESES_FUTUROS', '3'))
+
+# Meses de histórico que se conservan; 0 desactiva la retención
+RETENCION_MESES = int(os.getenv('RETENCION_MESES', '0'))
+
+# Con true las particiones caducadas se desacoplan (quedan como tablas sueltas) en vez de borrarse
+RETENCION_SOLO_DESACOPLAR = os.getenv('RETENCION_SOLO_DESACOPLAR', 'false').lower() in ('1', 'true', 'yes', 'si')
+
+PATRON_PARTICION = re.compile(rf'^{TABLA_PARTICIONADA}_p(\d{{4}})(\d{{2}})$')
+
+
+def inicio_mes(fecha):
+    return datetime(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, meses):
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes):
+    return f"{TABLA_PARTICIONADA}_p{mes:%Y%m}"
+
+
+def _tipo_tabla(conn):
+    """relkind de registros_clima: 'p' particionada, 'r' tabla normal, None si no existe"""
+    return conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:tabla)"),
+        {'tabla': TABLA_PARTICIONADA}
+    ).scalar()
+
+
+def _existe_tabla(conn, nombre):
+    return conn.execute(text("SELECT to_regclass(:tabla) IS NOT NULL"), {'tabla': nombre}).scalar()
+
+
+def es_particionada(conn):
+    """True si registros_clima ya es una tabla particionada"""
+    return _tipo_tabla(conn) == 'p'
+
+
+def particiones_existentes(conn):
+    """{mes: nombre} de las particiones mensuales adjuntas a registros_clima"""
+    nombres = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:tabla)
+    """), {'tabla': TABLA_PARTICIONADA}).scalars().all()
+
+    particiones = {}
+    for nombre in nombres:
+        coincidencia = PATRON_PARTICION.match(nombre)
+        if coincidencia:
+            particiones[datetime(int(coincidencia.group(1)), int(coincidencia.group(2)), 1)] = nombre
+    return particiones
+
+
+def asegurar_particiones(conn, desde=None, hasta=None):
+    """Crea las particiones mensuales que falten entre `desde` y `hasta` (más los meses futuros)"""
+    actual = inicio_mes(datetime.now())
+    desde = inicio_mes(desde) if desde is not None else actual
+    hasta = max(inicio_mes(hasta) if hasta is not None else actual, sumar_meses(actual, MESES_FUTUROS))
+
+    # Solo se ejecuta DDL para las que faltan: crear una partición bloquea la tabla padre
+    existentes = particiones_existentes(conn)
+    creadas = []
+    mes = min(desde, actual)
+    while mes <= hasta:
+        if mes not in existentes:
+            nombre = nombre_particion(mes)
+            rango = f"FOR VALUES FROM ('{mes:%Y-%m-%d}') TO ('{sumar_meses(mes, 1):%Y-%m-%d}')"
+            if _existe_tabla(conn, nombre):
+                # Partición que la retención desacopló sin renombrar: se vuelve a adjuntar con sus datos
+                conn.execute(text(f"ALTER TABLE {TABLA_PARTICIONADA} ATTACH PARTITION {nombre} {rango}"))
+                logger.info(f"🔗 Partición desacoplada {nombre} adjuntada de nuevo")
+            else:
+                conn.execute(text(f"CREATE TABLE {nombre} PARTITION OF {TABLA_PARTICIONADA} {rango}"))
+                creadas.append(nombre)
+        mes = sumar_meses(mes, 1)
+
+    if creadas:
+        logger.info(f"🗂️ Particiones creadas: {', '.join(creadas)}")
+    return creadas
+
+
+def aplicar_retencion(conn, meses=None, solo_desacoplar=None):
+    """Desacopla (y por defecto elimina) las particiones anteriores al horizonte de retención
+
+    Las que solo se desacoplan quedan como `<partición>_desacoplada_<fecha>`.
+    """
+    meses = RETENCION_MESES if meses is None else meses
+    solo_desacoplar = RETENCION_SOLO_DESACOPLAR if solo_desacoplar is None else solo_desacoplar
+    if meses <= 0:
+        return []
+
+    limite = sumar_meses(inicio_mes(datetime.now()), -meses)
+    caducadas = [nombre for mes, nombre in sorted(particiones_existentes(conn).items()) if mes < limite]
+    sufijo = f"desacoplada_{datetime.now():%Y%m%d%H%M%S}"
+    for nombre in caducadas:
+        conn.execute(text(f"ALTER TABLE {TABLA_PARTICIONADA} DETACH PARTITION {nombre}"))
+        if solo_desacoplar:
+            # Se renombra para que asegurar_particiones() pueda crear otra vez ese mes si llegan datos
+            conn.execute(text(f"ALTER TABLE {nombre} RENAME TO {nombre}_{sufijo}"))
+        else:
+            conn.execute(text(f"DROP TABLE {nombre}"))
+
+    if caducadas:
+        accion = 'desacopladas' if solo_desacoplar else 'eliminadas'
+        logger.info(f"🧹 Retención de {meses} meses: {len(caducadas)} particiones {accion} ({', '.join(caducadas)})")
+    return caducadas
+
+
+def apartar_tabla_sin_particiones(conn):
+    """Renombra un registros_clima anterior sin particiones para que create_all cree la versión particionada
+
+    Devuelve el nombre de la tabla apartada o None si no hay nada que migrar. Si una migración
+    anterior se interrumpió tras apartar la tabla, la devuelve para terminar el traslado.
+    """
+    antigua = f"{TABLA_PARTICIONADA}_sin_particiones"
+    tipo = _tipo_tabla(conn)
+    if tipo != 'r':
+        if tipo == 'p' and _existe_tabla(conn, antigua):
+            logger.info(f"⏯️ {antigua} sigue pendiente de migrar, se reanuda el traslado")
+            return antigua
+        return None
+
+    conn.execute(text(f"ALTER TABLE {TABLA_PARTICIONADA} RENAME TO {antigua}"))
+
+    # Índices (incluida la PK) y secuencia conservan su nombre al renombrar la tabla y chocarían con los nuevos
+    indices = conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :tabla"), {'tabla': antigua}
+    ).scalars().all()
+    for indice in indices:
+        conn.execute(text(f"ALTER INDEX {indice} RENAME TO {indice}_sin_particiones"))
+    conn.execute(text(
+        f"ALTER SEQUENCE IF EXISTS {TABLA_PARTICIONADA}_id_seq RENAME TO {antigua}_id_seq"
+    ))
+
+    logger.info(f"📦 Tabla {TABLA_PARTICIONADA} sin particiones apartada como {antigua}")
+    return antigua
+
+
+def trasladar_registros(conn, antigua):
+    """Copia los registros de la tabla apartada a la particionada y la elimina"""
+    desde, hasta = conn.execute(
+        text(f"SELECT min(fecha_extraccion), max(fecha_extraccion) FROM {antigua}")
+    ).one()
+    if desde is not None:
+        asegurar_particiones(conn, desde, hasta)
+
+    # fecha_extraccion forma parte de la clave de partición y no admite NULL
+    columnas = "id, ciudad_id, temperatura, sensacion_termica, humedad, velocidad_viento, descripcion, codigo_tiempo"
+    total = conn.execute(text(f"""
+        INSERT INTO {TABLA_PARTICIONADA} ({columnas}, fecha_extraccion)
+        SELECT {columnas}, COALESCE(fecha_extraccion, now()) FROM {antigua}
+    """)).rowcount
+    conn.execute(text(f"""
+        SELECT setval(pg_get_serial_sequence('{TABLA_PARTICIONADA}', 'id'),
+                      COALESCE((SELECT max(id) FROM {TABLA_PARTICIONADA}), 0) + 1, false)
+    """))
+    conn.execute(text(f"DROP TABLE {antigua}"))
+    logger.info(f"✅ {total} registros migrados a {TABLA_PARTICIONADA} particionada")
+    return total
+
+
+if __name__ == "__main__":
+    # Tarea de mantenimiento: crear las particiones próximas y aplicar la retención
+    logging.basicConfig(level=logging.INFO)
+    from scripts.database import get_engine
+
+    with get_engine().begin() as conn:
+        if not es_particionada(conn):
+            logger.error(f"❌ {TABLA_PARTICIONADA} no está particionada. Ejecuta primero init_db.py")
+            sys.exit(1)
+        asegurar_particiones(conn)
+        aplicar_retencion(conn)
@@ -3,87 +3,187 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import io
+import time
 import pandas as pd
-from datetime import datetime
-from scripts.database import SessionLocal, init_db, engine
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from scripts.database import SessionLocal, init_db, get_engine
 from scripts.models import Ciudad, RegistroClima, Base
+from scripts.formatos import leer_tabla, ruta_tabla
+from scripts.manifiesto import FORZAR_CARGA, hash_archivo, archivo_registrado, registrar_archivo
+from scripts.particiones import asegurar_particiones, aplicar_retencion
+from scripts.agregados import actualizar_agregados
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Filas por cada COPY enviado al servidor
+TAMANO_BLOQUE_COPY = int(os.getenv('COPY_BLOCK_SIZE', '50000'))
+
+COLUMNAS_REGISTRO = [
+    'ciudad_id', 'temperatura', 'sensacion_termica', 'humedad',
+    'velocidad_viento', 'descripcion', 'codigo_tiempo', 'fecha_extraccion'
+]
+
+# Tabla temporal donde se copia cada carga antes de pasar a registros_clima
+TABLA_CARGA = 'carga_registros_clima'
+
+# Origen del clima en manifiesto_archivos
+ORIGEN = 'clima'
+
+def resolver_ciudades(conn, df):
+    """Crea las ciudades que falten y devuelve {nombre: id} con una sola consulta"""
+    ciudades = df.drop_duplicates('ciudad')
+    nuevas = [
+        {
+            'nombre': row['ciudad'],
+            'pais': row['pais'] if pd.notna(row.get('pais')) else 'Colombia',
+            'latitud': row['latitud'] if pd.notna(row.get('latitud')) else None,
+            'longitud': row['longitud'] if pd.notna(row.get('longitud')) else None
+        }
+        for _, row in ciudades.iterrows()
+    ]
+    # insert(...).values([]) generaría un INSERT sin nombre
+    creadas = conn.execute(
+        insert(Ciudad).values(nuevas)
+        .on_conflict_do_nothing(index_elements=[Ciudad.nombre])
+        .returning(Ciudad.nombre)
+    ).scalars().all() if nuevas else []
+    for nombre in creadas:
+        logger.info(f"🏙️ Ciudad creada: {nombre}")
+    
+    resultado = conn.execute(
+        select(Ciudad.nombre, Ciudad.id).where(Ciudad.nombre.in_(ciudades['ciudad'].tolist()))
+    )
+    return dict(resultado.all())
+
+def preparar_registros(df, ciudades):
+    """DataFrame con las columnas de registros_clima listo para COPY"""
+    registros = pd.DataFrame({
+        'ciudad_id': df['ciudad'].map(ciudades),
+        'temperatura': df['temperatura'],
+        'sensacion_termica': df['sensacion_termica'],
+        'humedad': pd.to_numeric(df['humedad'], errors='coerce').round().astype('Int64'),
+        'velocidad_viento': df['velocidad_viento'],
+        'descripcion': df['descripcion'],
+        'codigo_tiempo': pd.to_numeric(
+            df.get('codigo_tiempo', pd.Series(0, index=df.index)), errors='coerce'
+        ).fillna(0).astype('Int64'),
+        'fecha_extraccion': pd.to_datetime(df['fecha_extraccion'], format='ISO8601', errors='coerce').fillna(pd.Timestamp.now())
+    })
+    return registros[COLUMNAS_REGISTRO]
+
+def copiar_registros(conn, registros, tabla='registros_clima'):
+    """Envía los registros a `tabla` con COPY FROM STDIN en bloques"""
+    sql = f"COPY {tabla} ({', '.join(COLUMNAS_REGISTRO)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conn.connection.cursor()
+    try:
+        for inicio in range(0, len(registros), TAMANO_BLOQUE_COPY):
+            buffer = io.StringIO()
+            registros.iloc[inicio:inicio + TAMANO_BLOQUE_COPY].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+
+def insertar_nuevos(conn, registros):
+    """Copia los registros a una tabla temporal e inserta en registros_clima solo los que no estaban
+
+    Una observación se identifica por (ciudad_id, fecha_extraccion) y no cambia una vez tomada,
+    así que basta con saltar las que ya existen; la comprobación usa ix_registros_clima_ciudad_fecha.
+    Devuelve cuántas filas se insertaron.
+    """
+    columnas = ', '.join(COLUMNAS_REGISTRO)
+    conn.execute(text(
+        f"CREATE TEMP TABLE {TABLA_CARGA} ON COMMIT DROP AS "
+        f"SELECT {columnas} FROM registros_clima WITH NO DATA"
+    ))
+    copiar_registros(conn, registros, TABLA_CARGA)
+    return conn.execute(text(f"""
+        INSERT INTO registros_clima ({columnas})
+        SELECT DISTINCT ON (ciudad_id, fecha_extraccion) {columnas}
+        FROM {TABLA_CARGA} c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM registros_clima r
+            WHERE r.ciudad_id = c.ciudad_id AND r.fecha_extraccion = c.fecha_extraccion
+        )
+    """)).rowcount
+
+def cargar_dataframe(conn, df):
+    """Resuelve ciudades, inserta los registros nuevos y actualiza sus agregados; devuelve cuántos se insertaron"""
+    if df.empty:
+        # Un clima.csv solo con cabecera (fallaron todas las ciudades) no tiene nada que cargar
+        return 0
+    ciudades = resolver_ciudades(conn, df)
+    registros = preparar_registros(df, ciudades)
+    # El INSERT falla si alguna fila no tiene partición mensual donde caer
+    asegurar_particiones(conn, registros['fecha_extraccion'].min(), registros['fecha_extraccion'].max())
+    insertados = insertar_nuevos(conn, registros)
+    if insertados < len(registros):
+        logger.info(f"⏭️ {len(registros) - insertados} registros ya estaban en BD y se omiten")
+    if insertados:
+        # Solo se recalculan las horas/días y ciudades que trae esta carga
+        actualizar_agregados(
+            conn,
+            registros['fecha_extraccion'].min(),
+            registros['fecha_extraccion'].max(),
+            registros['ciudad_id'].dropna().unique()
+        )
+    return insertados
+
+def cargar_registros(registros):
+    """Sumidero BD del extractor: carga un lote de registros en su propia transacción (idempotente)"""
+    with get_engine().begin() as conn:
+        return cargar_dataframe(conn, pd.DataFrame(registros))
+
+def carga_vigente(huella):
+    """True si la última carga fue de este mismo fichero y registros_clima no está vacía"""
+    with get_engine().connect() as conn:
+        registrado = archivo_registrado(conn, ORIGEN)
+        if registrado is None or registrado.hash != huella:
+            return False
+        return conn.execute(select(RegistroClima.id).limit(1)).first() is not None
+
 def populate_from_csv():
-    """Poblar la base de datos desde el archivo clima.csv existente"""
+    """Poblar la base de datos desde el archivo clima.csv existente
+
+    Si el fichero es idéntico al de la última carga no se lee; si no, solo se insertan las
+    observaciones que aún no están en BD. POPULATE_FORZAR=true omite la comprobación del fichero.
+    """
     
-    # Verificar que existe el archivo
-    if not os.path.exists('data/clima.csv'):
+    # Fichero a leer (Parquet tipado si existe, si no el CSV)
+    ruta = ruta_tabla('data/clima')
+    if ruta is None:
         logger.error("❌ No se encuentra data/clima.csv. Ejecuta primero extractor.py")
         return False
     
-    # Leer datos del CSV
-    df = pd.read_csv('data/clima.csv')
-    logger.info(f"📊 Datos leídos: {len(df)} registros")
+    huella = hash_archivo(ruta)
+    if not FORZAR_CARGA and carga_vigente(huella):
+        logger.info(f"⏭️ {ruta} no ha cambiado desde la última carga, nada que escribir")
+        return True
     
-    # Crear sesión
-    db = SessionLocal()
+    df = leer_tabla('data/clima', ruta)
+    logger.info(f"📊 Datos leídos: {len(df)} registros")
     
+    inicio = time.perf_counter()
     try:
-        # Primero, crear las ciudades
-        ciudades_dict = {}
-        for _, row in df.iterrows():
-            ciudad_nombre = row['ciudad']
-            
-            # Buscar o crear ciudad
-            ciudad = db.query(Ciudad).filter(Ciudad.nombre == ciudad_nombre).first()
-            if not ciudad:
-                ciudad = Ciudad(
-                    nombre=ciudad_nombre,
-                    pais=row.get('pais', 'Colombia'),
-                    latitud=row.get('latitud'),
-                    longitud=row.get('longitud')
-                )
-                db.add(ciudad)
-                db.flush()  # Para obtener el ID
-                logger.info(f"🏙️ Ciudad creada: {ciudad_nombre}")
-            
-            ciudades_dict[ciudad_nombre] = ciudad
-        
-        db.commit()
+        # Ciudades, registros y manifiesto en la misma transacción
+        with get_engine().begin() as conn:
+            total = cargar_dataframe(conn, df)
+            registrar_archivo(conn, ORIGEN, huella, len(df))
         
-        # Luego, crear los registros climáticos
-        for _, row in df.iterrows():
-            ciudad_nombre = row['ciudad']
-            ciudad = ciudades_dict[ciudad_nombre]
-            
-            # Parsear fecha
-            try:
-                fecha = pd.to_datetime(row['fecha_extraccion']).to_pydatetime()
-            except:
-                fecha = datetime.now()
-            
-            # Crear registro
-            registro = RegistroClima(
-                ciudad_id=ciudad.id,
-                temperatura=row['temperatura'],
-                sensacion_termica=row['sensacion_termica'],
-                humedad=row['humedad'],
-                velocidad_viento=row['velocidad_viento'],
-                descripcion=row['descripcion'],
-                codigo_tiempo=row.get('codigo_tiempo', 0),
-                fecha_extraccion=fecha
-            )
-            db.add(registro)
-        
-        db.commit()
-        logger.info(f"✅ {len(df)} registros climáticos guardados en BD")
+        duracion = time.perf_counter() - inicio
+        logger.info(
+            f"✅ {total} registros climáticos nuevos guardados en BD "
+            f"en {duracion:.2f}s ({len(df) / max(duracion, 1e-9):,.0f} filas/s)"
+        )
         return True
         
     except Exception as e:
         logger.error(f"❌ Error poblando BD: {e}")
-        db.rollback()
         return False
-    finally:
-        db.close()
 
 def verificar_datos():
     """Verificar que los datos se cargaron correctamente"""
@@ -115,6 +215,8 @@ if __name__ == "__main__":
     logger.info("📦 Poblando base de datos...")
     if populate_from_csv():
         logger.info("✅ Base de datos poblada exitosamente")
+        with get_engine().begin() as conn:
+            aplicar_retencion(conn)
         verificar_datos()
     else:
         logger.error("❌ Error poblando base de datos")
\ No newline at end of file
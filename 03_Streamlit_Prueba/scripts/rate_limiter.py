@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Limitador de tasa tipo token bucket, compartido entre hilos"""
+
+    def __init__(self, tasa, capacidad=None):
+        if tasa <= 0:
+            raise ValueError("La tasa del limitador debe ser mayor que 0")
+        self.tasa = float(tasa)  # tokens por segundo
+        self.capacidad = float(capacidad or max(1.0, self.tasa))
+        self.tokens = self.capacidad
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+
+    def adquirir(self, tokens=1):
+        """Bloquea hasta que haya tokens disponibles y los consume"""
+        while True:
+            with self.lock:
+                self._recargar()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                espera = (tokens - self.tokens) / self.tasa
+            time.sleep(espera)
+
+    def penalizar(self, segundos):
+        """Vacía el bucket para que ningún hilo envíe peticiones durante `segundos`"""
+        with self.lock:
+            self._recargar()
+            self.tokens = min(self.tokens, -segundos * self.tasa)
+
+
+def limitador_desde_env(proveedor, tasa_defecto, capacidad_defecto=None):
+    """Crea el limitador de un proveedor a partir de <PROVEEDOR>_RATE_LIMIT y <PROVEEDOR>_RATE_BURST"""
+    tasa = float(os.getenv(f'{proveedor}_RATE_LIMIT', str(tasa_defecto)))
+    if tasa <= 0:
+        logger.info(f"⏱️ Limitador de tasa desactivado para {proveedor}")
+        return None
+
+    capacidad = os.getenv(f'{proveedor}_RATE_BURST')
+    capacidad = float(capacidad) if capacidad else capacidad_defecto
+    limitador = TokenBucket(tasa, capacidad)
+    logger.info(f"⏱️ Limitador {proveedor}: {limitador.tasa:g} req/s, ráfaga {limitador.capacidad:g}")
+    return limitador
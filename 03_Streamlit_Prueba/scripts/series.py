@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import os
+import numpy as np
+import pandas as pd
+
+# Puntos máximos por gráfica; se reparten entre las ciudades visibles
+MAX_PUNTOS_GRAFICA = int(os.getenv('GRAFICA_MAX_PUNTOS', '2000'))
+
+# Hasta cuántos días se grafican registros crudos y hasta cuántos agregados por hora
+MAX_DIAS_CRUDO = float(os.getenv('GRAFICA_MAX_DIAS_CRUDO', '2'))
+MAX_DIAS_HORARIO = float(os.getenv('GRAFICA_MAX_DIAS_HORARIO', '31'))
+
+ETIQUETAS_RESOLUCION = {
+    'crudo': 'registros individuales',
+    'hora': 'promedio por hora',
+    'dia': 'promedio por día'
+}
+
+
+def elegir_resolucion(desde, hasta):
+    """'crudo', 'hora' o 'dia' según la amplitud del rango de fechas"""
+    dias = (hasta - desde).total_seconds() / 86400
+    if dias <= MAX_DIAS_CRUDO:
+        return 'crudo'
+    if dias <= MAX_DIAS_HORARIO:
+        return 'hora'
+    return 'dia'
+
+
+def indices_lttb(x, y, umbral):
+    """Índices de los puntos elegidos por Largest-Triangle-Three-Buckets
+
+    Conserva el primer y el último punto y, en cada cubo intermedio, el que forma
+    el triángulo de mayor área con el punto anterior elegido y la media del cubo siguiente.
+    """
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+
+    tamano_cubo = (n - 2) / (umbral - 2)
+    seleccion = np.empty(umbral, dtype=np.int64)
+    seleccion[0] = 0
+    anterior = 0
+    for i in range(umbral - 2):
+        inicio = int(i * tamano_cubo) + 1
+        fin = int((i + 1) * tamano_cubo) + 1
+        fin_siguiente = min(int((i + 2) * tamano_cubo) + 1, n)
+
+        x_medio = x[fin:fin_siguiente].mean()
+        y_medio = y[fin:fin_siguiente].mean()
+        areas = np.abs(
+            (x[anterior] - x_medio) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (y_medio - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        seleccion[i + 1] = anterior
+    seleccion[-1] = n - 1
+    return seleccion
+
+
+def reducir_serie(df, x, y, grupo, max_puntos=None):
+    """Aplica LTTB a cada serie de `grupo` para que el total no supere `max_puntos`"""
+    max_puntos = max_puntos or MAX_PUNTOS_GRAFICA
+    if df.empty or len(df) <= max_puntos:
+        return df
+
+    por_serie = max(max_puntos // df[grupo].nunique(), 3)
+    partes = []
+    for _, serie in df.groupby(grupo, sort=False):
+        serie = serie.dropna(subset=[y]).sort_values(x)
+        ejes_x = pd.to_datetime(serie[x]).to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+        indices = indices_lttb(ejes_x, serie[y].to_numpy(dtype=float), por_serie)
+        partes.append(serie.iloc[indices])
+    return pd.concat(partes, ignore_index=True)
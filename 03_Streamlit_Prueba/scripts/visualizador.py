@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+from scripts.formatos import leer_tabla
+
+# Cargar datos (Parquet tipado si existe, si no el CSV)
+df = leer_tabla('data/clima')
 
 # Verificar que exista el archivo
-if not os.path.exists('data/clima.csv'):
+if df is None:
     print("❌ No existe data/clima.csv. Ejecuta primero extractor.py")
     exit()
 
-# Cargar datos
-df = pd.read_csv('data/clima.csv')
-
 # Crear figura con múltiples gráficas
 fig, axes = plt.subplots(2, 2, figsize=(15, 10))
 fig.suptitle('Análisis de Clima por Ciudades', fontsize=16, fontweight='bold')
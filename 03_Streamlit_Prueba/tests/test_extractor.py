@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import importlib
+from datetime import datetime, timezone
+
+import pytest
+
+
+@pytest.fixture
+def extractor_modulo(tmp_path, monkeypatch):
+    """scripts.extractor importado desde un directorio temporal (su logging escribe en logs/etl.log)"""
+    (tmp_path / 'logs').mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('API_KEY', 'clave')
+    monkeypatch.setenv('HTTP_CACHE', 'false')
+    monkeypatch.setenv('CIUDADES', ' Bogotá, Medellín ,,Cali ')
+    return importlib.import_module('scripts.extractor')
+
+
+def test_fecha_observacion_en_hora_del_servidor(extractor_modulo):
+    WeatherstackExtractor = extractor_modulo.WeatherstackExtractor
+    # Ejemplo de la documentación: 2019-09-07 08:14 en una ciudad UTC-4 → 12:14 UTC
+    instante = datetime(2019, 9, 7, 12, 14, tzinfo=timezone.utc)
+    esperada = instante.astimezone().replace(tzinfo=None).isoformat()
+
+    assert WeatherstackExtractor.fecha_observacion({'localtime_epoch': 1567844040, 'utc_offset': '-4.0'}) == esperada
+    # Dos ciudades en zonas distintas que responden en el mismo instante tienen la misma fecha
+    assert WeatherstackExtractor.fecha_observacion(
+        {'localtime_epoch': 1567844040 + 9 * 3600, 'utc_offset': '5.0'}
+    ) == esperada
+
+
+def test_fecha_observacion_sin_zona_usa_el_reloj(extractor_modulo):
+    antes = datetime.now()
+    fecha = datetime.fromisoformat(extractor_modulo.WeatherstackExtractor.fecha_observacion({'localtime_epoch': 1567844040}))
+
+    assert antes <= fecha <= datetime.now()
+
+
+def test_ciudades_limpias_y_cache_corta(extractor_modulo, monkeypatch):
+    monkeypatch.setenv('HTTP_CACHE', 'true')
+    monkeypatch.delenv('WEATHERSTACK_CACHE_TTL', raising=False)
+    extractor = extractor_modulo.WeatherstackExtractor()
+
+    assert extractor.ciudades == ['Bogotá', 'Medellín', 'Cali']
+    # /current no se sirve desde la caché a la ejecución horaria siguiente
+    assert extractor.http.cache.ttl == 600
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import pandas as pd
+
+from scripts.populate_db import COLUMNAS_REGISTRO, cargar_dataframe, resolver_ciudades, preparar_registros
+
+
+class ConexionSinBD:
+    """Conexión que falla si se le envía cualquier sentencia"""
+
+    def execute(self, *args, **kwargs):
+        raise AssertionError("no debe ejecutarse ninguna sentencia")
+
+
+def test_csv_solo_con_cabecera_no_carga_nada():
+    # Es lo que escribe el sumidero CSV cuando fallan todas las ciudades
+    df = pd.DataFrame(columns=['ciudad', 'pais', 'latitud', 'longitud', 'temperatura', 'fecha_extraccion'])
+
+    assert cargar_dataframe(ConexionSinBD(), df) == 0
+
+
+def test_resolver_ciudades_sin_filas_no_inserta():
+    class Conexion(ConexionSinBD):
+        def execute(self, consulta, *args, **kwargs):
+            assert 'INSERT' not in str(consulta)
+
+            class Resultado:
+                def all(self):
+                    return []
+            return Resultado()
+
+    df = pd.DataFrame(columns=['ciudad', 'pais', 'latitud', 'longitud'])
+    assert resolver_ciudades(Conexion(), df) == {}
+
+
+def test_preparar_registros():
+    df = pd.DataFrame({
+        'ciudad': ['Bogotá', 'Cali'],
+        'temperatura': [14.0, 27.0],
+        'sensacion_termica': [13.0, 29.0],
+        'humedad': [80.6, '70'],
+        'velocidad_viento': [5, 7],
+        'descripcion': ['Nublado', 'Soleado'],
+        # Fechas con y sin microsegundos en la misma columna
+        'fecha_extraccion': ['2026-01-01T10:00:00', '2026-01-01T10:00:00.123456']
+    })
+    registros = preparar_registros(df, {'Bogotá': 1, 'Cali': 2})
+
+    assert registros.columns.tolist() == COLUMNAS_REGISTRO
+    assert registros['ciudad_id'].tolist() == [1, 2]
+    assert registros['humedad'].tolist() == [81, 70]
+    # Sin la columna codigo_tiempo se usa 0
+    assert registros['codigo_tiempo'].tolist() == [0, 0]
+    assert registros['fecha_extraccion'].tolist() == [
+        pd.Timestamp('2026-01-01T10:00:00'), pd.Timestamp('2026-01-01T10:00:00.123456')
+    ]
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from scripts.series import indices_lttb, reducir_serie, elegir_resolucion
+
+
+def test_lttb_conserva_extremos_y_tamano():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    indices = indices_lttb(x, y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_conserva_picos():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[137], y[388] = 50, -40
+
+    assert {137, 388} <= set(indices_lttb(x, y, 20).tolist())
+
+
+def test_lttb_sin_reduccion():
+    x = np.arange(10, dtype=float)
+
+    assert indices_lttb(x, x, 10).tolist() == list(range(10))
+    assert indices_lttb(x, x, 2).tolist() == list(range(10))
+
+
+def test_reducir_serie_por_ciudad():
+    fechas = pd.date_range('2026-01-01', periods=600, freq='min')
+    df = pd.DataFrame({
+        'Fecha': np.tile(fechas, 2),
+        'Ciudad': ['Bogotá'] * 600 + ['Cali'] * 600,
+        'Temperatura': np.random.default_rng(0).normal(20, 3, 1200)
+    })
+    reducida = reducir_serie(df, 'Fecha', 'Temperatura', 'Ciudad', max_puntos=100)
+
+    assert reducida.groupby('Ciudad').size().to_dict() == {'Bogotá': 50, 'Cali': 50}
+    assert reducir_serie(df, 'Fecha', 'Temperatura', 'Ciudad', max_puntos=5000) is df
+
+
+def test_elegir_resolucion():
+    inicio = datetime(2026, 1, 1)
+
+    assert elegir_resolucion(inicio, inicio + timedelta(days=1)) == 'crudo'
+    assert elegir_resolucion(inicio, inicio + timedelta(days=10)) == 'hora'
+    assert elegir_resolucion(inicio, inicio + timedelta(days=90)) == 'dia'
@@ -8,8 +8,11 @@ from sqlalchemy import func, desc, and_
 import sys
 sys.path.insert(0, '.')
 
-from scripts.database import SessionLocal
+from scripts.conexion_dashboard import sesion_dashboard
 from scripts.models import Heroe, MetricasHeroe, MetricasETL
+from scripts.datos_dashboard import (
+    POWERSTATS, MEDIDAS, cargar_heroes, cargar_matriz, resumen_general, resumen_por, estadisticas_por_editorial, ranking_por_editorial
+)
 
 st.set_page_config(
     page_title="Dashboard Avanzado de Superhéroes",
@@ -20,35 +23,33 @@ st.set_page_config(
 st.title("🦸 Dashboard Avanzado - Análisis de Superhéroes")
 st.markdown("---")
 
-# Crear conexión a la base de datos
-db = SessionLocal()
-
 # Pestañas principales
 tab1, tab2, tab3, tab4 = st.tabs(["📊 Vista General", "📈 Análisis de Poder", "🔍 Estadísticas por Editorial", "📋 Métricas ETL"])
 
 with tab1:
     st.subheader("Datos Generales de Superhéroes")
     
+    # KPIs globales desde la vista materializada (cacheada)
+    resumen = resumen_general()
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        heroes_count = db.query(func.count(Heroe.id)).scalar()
-        st.metric("🦸 Total Héroes", heroes_count)
+        st.metric("🦸 Total Héroes", resumen['total'])
     
     with col2:
-        editoriales_count = db.query(func.count(func.distinct(Heroe.editorial))).scalar()
-        st.metric("🏢 Editoriales", editoriales_count)
+        st.metric("🏢 Editoriales", resumen['editoriales'])
     
     with col3:
         # Promedio de poder general
-        poder_promedio = db.query(func.avg(Heroe.poder)).scalar()
+        poder_promedio = resumen['poder_promedio']
         if poder_promedio:
             st.metric("⚡ Poder Promedio", f"{poder_promedio:.1f}")
         else:
             st.metric("⚡ Poder Promedio", "N/A")
     
     with col4:
-        ultima_actualizacion = db.query(func.max(Heroe.fecha_actualizacion)).scalar()
+        ultima_actualizacion = resumen['ultima_actualizacion']
         if ultima_actualizacion:
             st.metric("⏰ Última Actualización", ultima_actualizacion.strftime("%Y-%m-%d"))
         else:
@@ -56,26 +57,13 @@ with tab1:
     
     st.markdown("---")
     
-    # Obtener todos los héroes para visualización
-    heroes = db.query(Heroe).all()
+    # Obtener todos los héroes para visualización (cacheado entre reruns)
+    df = cargar_heroes()[[
+        'Nombre', 'Editorial', 'Inteligencia', 'Fuerza', 'Velocidad',
+        'Durabilidad', 'Poder', 'Combate', 'Alineación', 'Género'
+    ]]
     
-    if heroes:
-        data = []
-        for heroe in heroes:
-            data.append({
-                'Nombre': heroe.nombre,
-                'Editorial': heroe.editorial or 'Desconocida',
-                'Inteligencia': heroe.inteligencia or 0,
-                'Fuerza': heroe.fuerza or 0,
-                'Velocidad': heroe.velocidad or 0,
-                'Durabilidad': heroe.durabilidad or 0,
-                'Poder': heroe.poder or 0,
-                'Combate': heroe.combate or 0,
-                'Alineación': heroe.alineacion or 'Desconocida',
-                'Género': heroe.genero or 'Desconocido'
-            })
-        
-        df = pd.DataFrame(data)
+    if not df.empty:
         
         # Filtros en sidebar
         st.sidebar.title("🔧 Filtros")
@@ -85,15 +73,17 @@ with tab1:
         
         if editorial_seleccionada != 'Todas':
             df_filtrado = df[df['Editorial'] == editorial_seleccionada]
+            matriz = cargar_matriz().donde('Editorial', editorial_seleccionada)
         else:
             df_filtrado = df
+            matriz = cargar_matriz()
         
         # Gráficas lado a lado
         col1, col2 = st.columns(2)
         
         with col1:
             # Top 10 héroes por poder
-            top_10_poder = df_filtrado.nlargest(10, 'Poder')[['Nombre', 'Poder', 'Editorial']]
+            top_10_poder = matriz.top_k('Poder', 10)
             fig = px.bar(top_10_poder, x='Nombre', y='Poder', color='Editorial',
                         title='Top 10 Héroes por Nivel de Poder',
                         labels={'Poder': 'Nivel de Poder'})
@@ -113,7 +103,7 @@ with tab1:
         st.subheader("📊 Powerstats Promedio por Editorial")
         
         powerstats = ['Inteligencia', 'Fuerza', 'Velocidad', 'Durabilidad', 'Poder', 'Combate']
-        df_stats = df_filtrado.groupby('Editorial')[powerstats].mean().reset_index()
+        df_stats = matriz.media_por('Editorial').reset_index()
         
         fig = go.Figure()
         for _, row in df_stats.iterrows():
@@ -139,23 +129,12 @@ with tab1:
 with tab2:
     st.subheader("Análisis Detallado de Powerstats")
     
-    heroes = db.query(Heroe).all()
+    df = cargar_heroes()[[
+        'Nombre', 'Editorial', 'Inteligencia', 'Fuerza', 'Velocidad',
+        'Durabilidad', 'Poder', 'Combate', *MEDIDAS
+    ]]
     
-    if heroes:
-        data = []
-        for heroe in heroes:
-            data.append({
-                'Nombre': heroe.nombre,
-                'Editorial': heroe.editorial or 'Desconocida',
-                'Inteligencia': heroe.inteligencia or 0,
-                'Fuerza': heroe.fuerza or 0,
-                'Velocidad': heroe.velocidad or 0,
-                'Durabilidad': heroe.durabilidad or 0,
-                'Poder': heroe.poder or 0,
-                'Combate': heroe.combate or 0
-            })
-        
-        df = pd.DataFrame(data)
+    if not df.empty:
         
         # Selector de powerstat
         powerstat_seleccionado = st.selectbox(
@@ -174,7 +153,7 @@ with tab2:
         
         with col2:
             # Top 10 en el powerstat seleccionado
-            top_10 = df.nlargest(10, powerstat_seleccionado)[['Nombre', 'Editorial', powerstat_seleccionado]]
+            top_10 = cargar_matriz().top_k(powerstat_seleccionado, 10)
             fig = px.bar(top_10, x='Nombre', y=powerstat_seleccionado, color='Editorial',
                         title=f'Top 10 en {powerstat_seleccionado}')
             st.plotly_chart(fig, use_container_width=True)
@@ -183,7 +162,8 @@ with tab2:
         
         # Matriz de correlación
         st.subheader("📈 Matriz de Correlación entre Powerstats")
-        corr_matrix = df[powerstats].corr()
+        # Correlación por pares sobre los héroes con ambos powerstats conocidos
+        corr_matrix = cargar_matriz().correlacion().round(2)
         
         fig = px.imshow(corr_matrix, 
                        text_auto=True,
@@ -199,9 +179,9 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            x_axis = st.selectbox("Eje X:", powerstats, index=0)
+            x_axis = st.selectbox("Eje X:", powerstats + MEDIDAS, index=0)
         with col2:
-            y_axis = st.selectbox("Eje Y:", powerstats, index=4)
+            y_axis = st.selectbox("Eje Y:", powerstats + MEDIDAS, index=4)
         
         fig = px.scatter(df, x=x_axis, y=y_axis, color='Editorial',
                         hover_data=['Nombre'], size='Poder',
@@ -211,66 +191,47 @@ with tab2:
 with tab3:
     st.subheader("Estadísticas por Editorial")
     
-    # Obtener editoriales únicas
-    editoriales = db.query(Heroe.editorial).distinct().all()
-    editoriales = [e[0] for e in editoriales if e[0]]
+    # Estadísticas de todas las editoriales (un GROUP BY) y ranking (una función de ventana)
+    stats_editoriales = estadisticas_por_editorial()
+    ranking = ranking_por_editorial()
+    heroes_por_editorial = {
+        editorial: grupo[['Nombre', 'Poder']].reset_index(drop=True)
+        for editorial, grupo in ranking.groupby('Editorial', sort=False)
+    }
     
-    if editoriales:
-        for editorial in editoriales:
+    if not stats_editoriales.empty:
+        for _, stats in stats_editoriales.iterrows():
+            editorial = stats['Editorial']
             with st.expander(f"🏢 {editorial}"):
-                # Estadísticas para esta editorial
-                stats = db.query(
-                    func.count(Heroe.id).label('total'),
-                    func.avg(Heroe.inteligencia).label('int_prom'),
-                    func.avg(Heroe.fuerza).label('fue_prom'),
-                    func.avg(Heroe.velocidad).label('vel_prom'),
-                    func.avg(Heroe.durabilidad).label('dur_prom'),
-                    func.avg(Heroe.poder).label('pod_prom'),
-                    func.avg(Heroe.combate).label('com_prom'),
-                    func.max(Heroe.poder).label('pod_max'),
-                    func.min(Heroe.poder).label('pod_min')
-                ).filter(Heroe.editorial == editorial).first()
+                col1, col2, col3, col4 = st.columns(4)
                 
-                if stats:
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric("📊 Total Héroes", stats.total)
-                    with col2:
-                        st.metric("⚡ Poder Promedio", f"{stats.pod_prom:.1f}" if stats.pod_prom else "N/A")
-                    with col3:
-                        st.metric("⬆️ Poder Máximo", f"{stats.pod_max}" if stats.pod_max else "N/A")
-                    with col4:
-                        st.metric("⬇️ Poder Mínimo", f"{stats.pod_min}" if stats.pod_min else "N/A")
-                    
-                    # Gráfica de powerstats promedio
-                    powerstats_prom = {
-                        'Inteligencia': stats.int_prom or 0,
-                        'Fuerza': stats.fue_prom or 0,
-                        'Velocidad': stats.vel_prom or 0,
-                        'Durabilidad': stats.dur_prom or 0,
-                        'Poder': stats.pod_prom or 0,
-                        'Combate': stats.com_prom or 0
-                    }
-                    
-                    df_prom = pd.DataFrame({
-                        'Powerstat': list(powerstats_prom.keys()),
-                        'Valor': list(powerstats_prom.values())
-                    })
-                    
-                    fig = px.bar(df_prom, x='Powerstat', y='Valor',
-                                title=f'Powerstats Promedio - {editorial}',
-                                color='Valor', color_continuous_scale='Viridis')
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Lista de héroes de esta editorial
-                    heroes_editorial = db.query(Heroe.nombre, Heroe.poder).filter(
-                        Heroe.editorial == editorial
-                    ).order_by(Heroe.poder.desc()).all()
-                    
-                    if heroes_editorial:
-                        df_heroes = pd.DataFrame(heroes_editorial, columns=['Nombre', 'Poder'])
-                        st.dataframe(df_heroes, use_container_width=True)
+                pod_prom = stats['Poder Promedio']
+                pod_max = stats['Poder Máximo']
+                pod_min = stats['Poder Mínimo']
+                with col1:
+                    st.metric("📊 Total Héroes", int(stats['Total']))
+                with col2:
+                    st.metric("⚡ Poder Promedio", f"{pod_prom:.1f}" if pd.notna(pod_prom) and pod_prom else "N/A")
+                with col3:
+                    st.metric("⬆️ Poder Máximo", f"{pod_max:.0f}" if pd.notna(pod_max) and pod_max else "N/A")
+                with col4:
+                    st.metric("⬇️ Poder Mínimo", f"{pod_min:.0f}" if pd.notna(pod_min) and pod_min else "N/A")
+                
+                # Gráfica de powerstats promedio
+                df_prom = pd.DataFrame({
+                    'Powerstat': POWERSTATS,
+                    'Valor': [stats[f'{stat} Promedio'] for stat in POWERSTATS]
+                }).fillna(0)
+                
+                fig = px.bar(df_prom, x='Powerstat', y='Valor',
+                            title=f'Powerstats Promedio - {editorial}',
+                            color='Valor', color_continuous_scale='Viridis')
+                st.plotly_chart(fig, use_container_width=True)
+                
+                # Lista de héroes de esta editorial
+                df_heroes = heroes_por_editorial.get(editorial)
+                if df_heroes is not None and not df_heroes.empty:
+                    st.dataframe(df_heroes, use_container_width=True)
     else:
         st.warning("No hay editoriales registradas en la base de datos")
 
@@ -279,9 +240,11 @@ with tab4:
     
     # Verificar si existe la tabla MetricasETL
     try:
-        metricas = db.query(MetricasETL).order_by(
-            MetricasETL.fecha_ejecucion.desc()
-        ).limit(20).all()
+        # La sesión solo vive lo que dura la consulta
+        with sesion_dashboard() as db:
+            metricas = db.query(MetricasETL).order_by(
+                MetricasETL.fecha_ejecucion.desc()
+            ).limit(20).all()
         
         if metricas:
             data = []
@@ -341,34 +304,25 @@ with tab4:
     
     with col1:
         # Distribución de héroes por alineación
-        alineacion_counts = db.query(
-            Heroe.alineacion, 
-            func.count(Heroe.id).label('count')
-        ).group_by(Heroe.alineacion).all()
+        alineacion_counts = resumen_por('alineacion')
         
-        if alineacion_counts:
-            df_alineacion = pd.DataFrame(alineacion_counts, columns=['Alineación', 'Cantidad'])
+        if not alineacion_counts.empty:
+            df_alineacion = alineacion_counts[['valor', 'total']].set_axis(['Alineación', 'Cantidad'], axis=1)
             fig = px.pie(df_alineacion, values='Cantidad', names='Alineación',
                         title='Distribución por Alineación')
             st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Distribución por género
-        genero_counts = db.query(
-            Heroe.genero, 
-            func.count(Heroe.id).label('count')
-        ).group_by(Heroe.genero).all()
+        genero_counts = resumen_por('genero')
         
-        if genero_counts:
-            df_genero = pd.DataFrame(genero_counts, columns=['Género', 'Cantidad'])
+        if not genero_counts.empty:
+            df_genero = genero_counts[['valor', 'total']].set_axis(['Género', 'Cantidad'], axis=1)
             fig = px.bar(df_genero, x='Género', y='Cantidad',
                         title='Distribución por Género',
                         color='Cantidad', color_continuous_scale='Viridis')
             st.plotly_chart(fig, use_container_width=True)
 
-# Cerrar conexión
-db.close()
-
 # Footer
 st.markdown("---")
 st.markdown("🦸 Dashboard Avanzado de Superhéroes - Desarrollado con Streamlit y SQLAlchemy")
\ No newline at end of file
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import json
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -8,8 +9,11 @@ from sqlalchemy import func, and_, or_
 import sys
 sys.path.insert(0, '.')
 
-from scripts.database import SessionLocal
-from scripts.models import Heroe, MetricasHeroe
+from scripts.datos_dashboard import (
+    COLUMNAS_HEROE, COLUMNAS_ORDEN, MEDIDAS, resumen_general, cargar_matriz, opciones_filtro, filtrar_heroes,
+    pagina_heroes, buscar_heroes, resumen_filtrado, conteo_filtrado, cuartiles_filtrados, describir_filtrados,
+    ids_filtrados, muestra_heroes
+)
 
 st.set_page_config(
     page_title="Dashboard Interactivo Superhéroes",
@@ -40,43 +44,11 @@ st.markdown("""
 st.title("🎛️ Dashboard Interactivo - Control Total de Superhéroes")
 st.markdown("### Explora y analiza el universo de superhéroes con filtros dinámicos")
 
-# Conectar a la base de datos
-db = SessionLocal()
-
-# Obtener datos para filtros
-heroes = db.query(Heroe).all()
+# Solo se cargan los valores de los selectores; los héroes se filtran en PostgreSQL
+total_heroes = resumen_general()['total']
 
-if heroes:
-    # Preparar DataFrame base
-    data = []
-    for heroe in heroes:
-        data.append({
-            'ID': heroe.id,
-            'Nombre': heroe.nombre,
-            'Nombre Real': heroe.nombre_real or 'Desconocido',
-            'Editorial': heroe.editorial or 'Desconocida',
-            'Género': heroe.genero or 'Desconocido',
-            'Raza': heroe.raza or 'Desconocida',
-            'Alineación': heroe.alineacion or 'Desconocida',
-            'Inteligencia': heroe.inteligencia or 0,
-            'Fuerza': heroe.fuerza or 0,
-            'Velocidad': heroe.velocidad or 0,
-            'Durabilidad': heroe.durabilidad or 0,
-            'Poder': heroe.poder or 0,
-            'Combate': heroe.combate or 0,
-            'Poder Total': sum([
-                heroe.inteligencia or 0,
-                heroe.fuerza or 0,
-                heroe.velocidad or 0,
-                heroe.durabilidad or 0,
-                heroe.poder or 0,
-                heroe.combate or 0
-            ]),
-            'Lugar Nacimiento': heroe.lugar_nacimiento or 'Desconocido',
-            'Primera Aparición': heroe.primera_aparicion or 'Desconocida'
-        })
-    
-    df = pd.DataFrame(data)
+if total_heroes:
+    opciones = opciones_filtro()
     
     # ============================================
     # SIDEBAR - CONTROLES INTERACTIVOS
@@ -86,39 +58,60 @@ if heroes:
     
     # Filtro 1: Búsqueda por nombre
     st.sidebar.markdown("### 🔍 Búsqueda")
-    busqueda = st.sidebar.text_input("Buscar héroe por nombre:", "")
+    busqueda = st.sidebar.text_input(
+        "Buscar héroe:", "",
+        help="Nombre, nombre real, lugar de nacimiento, primera aparición, ocupación o afiliación"
+    )
     
     # Filtro 2: Editorial
     st.sidebar.markdown("### 🏢 Editorial")
-    editoriales = ['Todas'] + sorted(df['Editorial'].unique().tolist())
+    editoriales = ['Todas'] + opciones['Editorial']
     editorial_seleccionada = st.sidebar.selectbox("Seleccionar editorial:", editoriales)
     
     # Filtro 3: Alineación
     st.sidebar.markdown("### ⚖️ Alineación")
-    alineaciones = ['Todas'] + sorted(df['Alineación'].unique().tolist())
+    alineaciones = ['Todas'] + opciones['Alineación']
     alineacion_seleccionada = st.sidebar.selectbox("Seleccionar alineación:", alineaciones)
     
     # Filtro 4: Género
     st.sidebar.markdown("### ⚥ Género")
-    generos = ['Todos'] + sorted(df['Género'].unique().tolist())
+    generos = ['Todos'] + opciones['Género']
     genero_seleccionado = st.sidebar.selectbox("Seleccionar género:", generos)
     
     # Filtro 5: Rango de poder
     st.sidebar.markdown("### ⚡ Rango de Poder")
+    poder_minimo, poder_maximo = opciones['poder']
     poder_min = st.sidebar.slider(
         "Poder mínimo:",
-        min_value=int(df['Poder'].min()),
-        max_value=int(df['Poder'].max()),
-        value=int(df['Poder'].min())
+        min_value=poder_minimo,
+        max_value=poder_maximo,
+        value=poder_minimo
     )
     poder_max = st.sidebar.slider(
         "Poder máximo:",
-        min_value=int(df['Poder'].min()),
-        max_value=int(df['Poder'].max()),
-        value=int(df['Poder'].max())
+        min_value=poder_minimo,
+        max_value=poder_maximo,
+        value=poder_maximo
     )
     
-    # Filtro 6: Powerstats específicos
+    # Filtro 6: Altura y peso (rangos sobre columnas numéricas indexadas)
+    st.sidebar.markdown("### 📏 Altura y Peso")
+    rangos = {}
+    for medida in MEDIDAS:
+        if not opciones[medida] or opciones[medida][0] == opciones[medida][1]:
+            continue
+        medida_minima, medida_maxima = opciones[medida]
+        rango = st.sidebar.slider(
+            f"{medida}:",
+            min_value=medida_minima,
+            max_value=medida_maxima,
+            value=(medida_minima, medida_maxima)
+        )
+        # Solo se filtra si se acota el rango; así no se excluye a los héroes sin ese dato
+        if rango != (medida_minima, medida_maxima):
+            rangos[medida] = list(rango)
+    
+    # Filtro 7: Powerstats específicos
     st.sidebar.markdown("### 📊 Powerstats Mínimos")
     col1, col2 = st.sidebar.columns(2)
     with col1:
@@ -137,42 +130,40 @@ if heroes:
     # ============================================
     # APLICAR FILTROS
     # ============================================
-    df_filtrado = df.copy()
-    
-    # Aplicar filtro de búsqueda
-    if busqueda:
-        df_filtrado = df_filtrado[
-            df_filtrado['Nombre'].str.contains(busqueda, case=False) |
-            df_filtrado['Nombre Real'].str.contains(busqueda, case=False)
-        ]
-    
-    # Aplicar filtro de editorial
-    if editorial_seleccionada != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['Editorial'] == editorial_seleccionada]
-    
-    # Aplicar filtro de alineación
-    if alineacion_seleccionada != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['Alineación'] == alineacion_seleccionada]
-    
-    # Aplicar filtro de género
-    if genero_seleccionado != 'Todos':
-        df_filtrado = df_filtrado[df_filtrado['Género'] == genero_seleccionado]
-    
-    # Aplicar filtro de rango de poder
-    df_filtrado = df_filtrado[
-        (df_filtrado['Poder'] >= poder_min) & 
-        (df_filtrado['Poder'] <= poder_max)
-    ]
-    
-    # Aplicar filtros de powerstats mínimos
-    df_filtrado = df_filtrado[
-        (df_filtrado['Inteligencia'] >= min_inteligencia) &
-        (df_filtrado['Fuerza'] >= min_fuerza) &
-        (df_filtrado['Velocidad'] >= min_velocidad) &
-        (df_filtrado['Durabilidad'] >= min_durabilidad) &
-        (df_filtrado['Poder'] >= min_poder) &
-        (df_filtrado['Combate'] >= min_combate)
-    ]
+    # Los filtros se traducen a un WHERE parametrizado (ver condiciones_filtro)
+    filtros = {
+        'busqueda': busqueda,
+        'Editorial': editorial_seleccionada,
+        'Alineación': alineacion_seleccionada,
+        'Género': genero_seleccionado,
+        'poder_min': poder_min,
+        'poder_max': poder_max,
+        'minimos': {
+            'Inteligencia': min_inteligencia,
+            'Fuerza': min_fuerza,
+            'Velocidad': min_velocidad,
+            'Durabilidad': min_durabilidad,
+            'Poder': min_poder,
+            'Combate': min_combate
+        },
+        'rangos': rangos
+    }
+    # Conteos y agregados se calculan en PostgreSQL; solo viajan los IDs para la matriz
+    resumen = resumen_filtrado(filtros)
+    ids = ids_filtrados(filtros)
+    matriz = cargar_matriz() if ids is None else cargar_matriz().subconjunto(ids)
+    
+    # Mejores coincidencias de la búsqueda, ordenadas por relevancia
+    if busqueda.strip():
+        coincidencias = buscar_heroes(busqueda)
+        with st.expander(f"🔍 Mejores coincidencias para \"{busqueda.strip()}\" ({len(coincidencias)})", expanded=True):
+            if coincidencias.empty:
+                st.info("Ningún héroe coincide con la búsqueda")
+            else:
+                st.dataframe(
+                    coincidencias[['Nombre', 'Editorial', 'Relevancia']],
+                    use_container_width=True, hide_index=True
+                )
     
     # ============================================
     # MÉTRICAS PRINCIPALES
@@ -186,14 +177,14 @@ if heroes:
         st.markdown('<div class="metric-box">', unsafe_allow_html=True)
         st.metric(
             "🦸 Total Héroes",
-            f"{len(df_filtrado)}",
-            delta=f"{len(df_filtrado) - len(df)} vs total"
+            f"{resumen['total']}",
+            delta=f"{resumen['total'] - total_heroes} vs total"
         )
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="metric-box">', unsafe_allow_html=True)
-        poder_promedio = df_filtrado['Poder'].mean()
+        poder_promedio = matriz.media()['Poder']
         st.metric(
             "⚡ Poder Promedio",
             f"{poder_promedio:.1f}"
@@ -202,8 +193,9 @@ if heroes:
     
     with col3:
         st.markdown('<div class="metric-box">', unsafe_allow_html=True)
-        heroe_top = df_filtrado.loc[df_filtrado['Poder'].idxmax()]['Nombre']
-        poder_top = df_filtrado['Poder'].max()
+        mas_poderoso = matriz.top_k('Poder', 1)
+        heroe_top = mas_poderoso['Nombre'].iloc[0] if not mas_poderoso.empty else "N/A"
+        poder_top = mas_poderoso['Poder'].iloc[0] if not mas_poderoso.empty else "N/A"
         st.metric(
             "🏆 Héroe más poderoso",
             heroe_top,
@@ -213,19 +205,17 @@ if heroes:
     
     with col4:
         st.markdown('<div class="metric-box">', unsafe_allow_html=True)
-        editoriales_unicas = df_filtrado['Editorial'].nunique()
         st.metric(
             "🏢 Editoriales",
-            editoriales_unicas
+            resumen['editoriales']
         )
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col5:
         st.markdown('<div class="metric-box">', unsafe_allow_html=True)
-        poder_total = df_filtrado['Poder Total'].sum()
         st.metric(
             "💪 Poder Total",
-            f"{poder_total:,.0f}"
+            f"{resumen['poder_total']:,.0f}"
         )
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -240,27 +230,23 @@ if heroes:
     
     with col1:
         st.markdown("### 📈 Distribución de Poder por Editorial")
-        fig = px.box(
-            df_filtrado,
-            x='Editorial',
-            y='Poder',
-            color='Editorial',
-            title='Rango de Poder por Editorial',
-            points="all"
-        )
+        # Cuartiles calculados con percentile_cont: una caja por editorial sin traer los héroes
+        cuartiles = cuartiles_filtrados(filtros, 'Editorial', 'Poder')
+        fig = go.Figure([
+            go.Box(
+                name=fila['Editorial'], x=[fila['Editorial']],
+                q1=[fila['25%']], median=[fila['50%']], q3=[fila['75%']],
+                lowerfence=[fila['min']], upperfence=[fila['max']], mean=[fila['mean']]
+            )
+            for _, fila in cuartiles.iterrows()
+        ])
+        fig.update_layout(title='Rango de Poder por Editorial', xaxis_title='Editorial', yaxis_title='Poder')
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### 🎯 Top Powerstats Promedio")
-        powerstats_prom = {
-            'Inteligencia': df_filtrado['Inteligencia'].mean(),
-            'Fuerza': df_filtrado['Fuerza'].mean(),
-            'Velocidad': df_filtrado['Velocidad'].mean(),
-            'Durabilidad': df_filtrado['Durabilidad'].mean(),
-            'Poder': df_filtrado['Poder'].mean(),
-            'Combate': df_filtrado['Combate'].mean()
-        }
-        df_prom = pd.DataFrame(list(powerstats_prom.items()), columns=['Powerstat', 'Valor'])
+        powerstats_prom = matriz.media()
+        df_prom = pd.DataFrame({'Powerstat': powerstats_prom.index, 'Valor': powerstats_prom.values})
         
         fig = px.bar(
             df_prom,
@@ -279,8 +265,7 @@ if heroes:
     
     with col1:
         st.markdown("### 🥧 Composición por Alineación")
-        alineacion_counts = df_filtrado['Alineación'].value_counts().reset_index()
-        alineacion_counts.columns = ['Alineación', 'Cantidad']
+        alineacion_counts = conteo_filtrado(filtros, 'Alineación')
         
         fig = px.pie(
             alineacion_counts,
@@ -295,7 +280,7 @@ if heroes:
         st.markdown("### 📊 Heatmap de Powerstats")
         # Seleccionar solo columnas numéricas para el heatmap
         powerstats_cols = ['Inteligencia', 'Fuerza', 'Velocidad', 'Durabilidad', 'Poder', 'Combate']
-        df_heatmap = df_filtrado[powerstats_cols].corr()
+        df_heatmap = matriz.correlacion().round(2)
         
         fig = px.imshow(
             df_heatmap,
@@ -313,7 +298,7 @@ if heroes:
     
     with col1:
         st.markdown("### 📊 Top 10 Héroes más Poderosos")
-        top_10 = df_filtrado.nlargest(10, 'Poder')[['Nombre', 'Editorial', 'Poder', 'Poder Total']]
+        top_10 = matriz.top_k('Poder', 10)
         
         fig = px.bar(
             top_10,
@@ -330,11 +315,15 @@ if heroes:
         st.markdown("### 📊 Comparativa Interactiva")
         
         # Selectores para ejes
-        eje_x = st.selectbox("Eje X:", powerstats_cols, index=0)
-        eje_y = st.selectbox("Eje Y:", powerstats_cols, index=4)
+        eje_x = st.selectbox("Eje X:", powerstats_cols + MEDIDAS, index=0)
+        eje_y = st.selectbox("Eje Y:", powerstats_cols + MEDIDAS, index=4)
         
+        # Un punto por héroe: solo las columnas del gráfico y, con muchos héroes, una muestra
+        df_puntos = muestra_heroes(filtros, ['Nombre', 'Editorial', 'Alineación', 'Poder', eje_x, eje_y])
+        if len(df_puntos) < resumen['total']:
+            st.caption(f"Muestra de {len(df_puntos)} de {resumen['total']} héroes")
         fig = px.scatter(
-            df_filtrado,
+            df_puntos,
             x=eje_x,
             y=eje_y,
             color='Editorial',
@@ -352,55 +341,62 @@ if heroes:
     st.markdown("## 📋 Explorador de Datos")
     
     # Opciones de visualización
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        mostrar_todos = st.checkbox("Mostrar todos los registros", value=False)
+        por_pagina = st.selectbox("Filas por página:", [50, 100, 500], index=0)
     
     with col2:
         columnas_mostrar = st.multiselect(
             "Columnas a mostrar:",
-            df_filtrado.columns.tolist(),
+            list(COLUMNAS_HEROE) + ['Poder Total'],
             default=['Nombre', 'Editorial', 'Alineación', 'Poder', 'Fuerza', 'Velocidad']
         )
     
     with col3:
         ordenar_por = st.selectbox(
             "Ordenar por:",
-            ['Poder', 'Nombre', 'Editorial', 'Fuerza', 'Velocidad'],
+            COLUMNAS_ORDEN,
             index=0
         )
     
-    # Mostrar tabla
+    with col4:
+        total_paginas = max((resumen['total'] + por_pagina - 1) // por_pagina, 1)
+        pagina = st.number_input("Página:", min_value=1, max_value=total_paginas, value=1)
+    
+    # Mostrar tabla (solo la página pedida viaja desde PostgreSQL)
     if columnas_mostrar:
-        df_display = df_filtrado[columnas_mostrar].sort_values(ordenar_por, ascending=False)
-        
-        if mostrar_todos:
-            st.dataframe(df_display, use_container_width=True, height=600)
-        else:
-            st.dataframe(df_display.head(50), use_container_width=True, height=400)
+        df_display = pagina_heroes(filtros, ordenar_por, int(pagina), por_pagina)[columnas_mostrar]
+        st.dataframe(df_display, use_container_width=True, height=600 if por_pagina > 50 else 400)
         
         # Estadísticas de la tabla
-        st.markdown(f"**Mostrando {len(df_display)} de {len(df_filtrado)} héroes**")
+        st.markdown(
+            f"**Mostrando {len(df_display)} de {resumen['total']} héroes "
+            f"(página {int(pagina)} de {total_paginas})**"
+        )
     
     # Botones de descarga
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        csv = df_filtrado.to_csv(index=False)
-        st.download_button(
-            label="⬇️ Descargar datos filtrados (CSV)",
-            data=csv,
-            file_name=f"superheroes_filtrados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        # La consulta completa solo se lanza cuando se pide; el CSV se guarda para esos filtros
+        clave_descarga = json.dumps(filtros, sort_keys=True)
+        if st.button("📦 Preparar datos filtrados (CSV)", use_container_width=True):
+            st.session_state['descarga_filtrados'] = (clave_descarga, filtrar_heroes(filtros).to_csv(index=False))
+        descarga = st.session_state.get('descarga_filtrados')
+        if descarga and descarga[0] == clave_descarga:
+            st.download_button(
+                label="⬇️ Descargar datos filtrados (CSV)",
+                data=descarga[1],
+                file_name=f"superheroes_filtrados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
     
     with col2:
         # Resumen estadístico
-        resumen = df_filtrado[powerstats_cols].describe()
-        csv_resumen = resumen.to_csv()
+        csv_resumen = describir_filtrados(filtros).to_csv()
         st.download_button(
             label="📊 Descargar resumen estadístico",
             data=csv_resumen,
@@ -411,7 +407,7 @@ if heroes:
     
     with col3:
         # Top 10
-        top_10_full = df_filtrado.nlargest(10, 'Poder')[['Nombre', 'Editorial', 'Poder'] + powerstats_cols]
+        top_10_full = matriz.top_k('Poder', 10, powerstats_cols)
         csv_top10 = top_10_full.to_csv(index=False)
         st.download_button(
             label="🏆 Descargar Top 10",
@@ -424,9 +420,6 @@ if heroes:
 else:
     st.warning("⚠️ No hay datos disponibles. Por favor, ejecuta primero el script populate_db.py")
 
-# Cerrar conexión
-db.close()
-
 # Footer
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import logging
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import aliased
+
+from scripts.models import Heroe, Grupo, HeroeGrupo, Conexion
+
+logger = logging.getLogger(__name__)
+
+# Valores que SuperheroAPI usa para "sin afiliación"
+VALORES_VACIOS = {'', '-', 'none', 'null', 'n/a'}
+
+# "(formerly)", "(former)", "formerly ..." marcan una afiliación pasada
+PATRON_ANTERIOR = re.compile(r'\(\s*(?:formerly|former)[^)]*\)|^\s*(?:formerly|former)\s+', re.IGNORECASE)
+
+
+def dividir_afiliaciones(texto):
+    """Separa el texto libre por comas y punto y coma que no estén dentro de paréntesis"""
+    partes, actual, profundidad = [], [], 0
+    for caracter in texto:
+        if caracter == '(':
+            profundidad += 1
+        elif caracter == ')':
+            profundidad = max(profundidad - 1, 0)
+        if caracter in ',;' and profundidad == 0:
+            partes.append(''.join(actual))
+            actual = []
+        else:
+            actual.append(caracter)
+    partes.append(''.join(actual))
+    return partes
+
+
+def clave_grupo(nombre):
+    """Nombre normalizado que identifica un grupo (minúsculas, espacios simples)"""
+    return ' '.join(nombre.lower().split())
+
+
+def parsear_afiliaciones(texto):
+    """{clave: (nombre, anterior)} de los grupos mencionados en `grupo_afiliacion`"""
+    grupos = {}
+    if not isinstance(texto, str):
+        return grupos
+    for parte in dividir_afiliaciones(texto):
+        anterior = bool(PATRON_ANTERIOR.search(parte))
+        nombre = ' '.join(PATRON_ANTERIOR.sub(' ', parte).split())
+        if nombre.lower() in VALORES_VACIOS:
+            continue
+        clave = clave_grupo(nombre)
+        # Si aparece como actual y como anterior, prevalece la afiliación actual
+        if clave in grupos:
+            anterior = anterior and grupos[clave][1]
+        grupos[clave] = (nombre, anterior)
+    return grupos
+
+
+def guardar_afiliaciones(conn, afiliaciones):
+    """Reemplaza las aristas héroe-grupo de los héroes dados
+
+    `afiliaciones` es {heroe_id: texto de grupo_afiliacion}. Los grupos nuevos se crean con
+    un solo INSERT ... ON CONFLICT y los que quedan sin miembros se eliminan.
+    """
+    grupos = {}
+    aristas = {}
+    for heroe_id, texto in afiliaciones.items():
+        for clave, (nombre, anterior) in parsear_afiliaciones(texto).items():
+            grupos.setdefault(clave, nombre)
+            aristas[(heroe_id, clave)] = anterior
+
+    conn.execute(delete(HeroeGrupo).where(HeroeGrupo.heroe_id.in_(list(afiliaciones))))
+
+    if grupos:
+        conn.execute(
+            insert(Grupo).values([{'nombre': nombre, 'clave': clave} for clave, nombre in grupos.items()])
+            .on_conflict_do_nothing(index_elements=[Grupo.clave])
+        )
+        ids = dict(conn.execute(select(Grupo.clave, Grupo.id).where(Grupo.clave.in_(list(grupos)))).all())
+        conn.execute(insert(HeroeGrupo), [
+            {'heroe_id': heroe_id, 'grupo_id': ids[clave], 'anterior': anterior}
+            for (heroe_id, clave), anterior in aristas.items()
+        ])
+
+    huerfanos = conn.execute(
+        delete(Grupo).where(~select(HeroeGrupo.grupo_id).where(HeroeGrupo.grupo_id == Grupo.id).exists())
+    ).rowcount
+    logger.info(f"🕸️ Afiliaciones: {len(aristas)} aristas, {len(grupos)} grupos ({huerfanos} grupos sin miembros eliminados)")
+    return len(aristas)
+
+
+def reconstruir_afiliaciones(conn):
+    """Regenera el grafo completo a partir de la tabla conexiones (los héroes inactivos quedan sin aristas)"""
+    filas = conn.execute(
+        select(Conexion.heroe_id, Conexion.grupo_afiliacion)
+        .join(Heroe, Heroe.id == Conexion.heroe_id)
+        .where(Heroe.activo)
+    ).all()
+    afiliaciones = {}
+    for heroe_id, texto in filas:
+        if texto:
+            afiliaciones[heroe_id] = f"{afiliaciones[heroe_id]}, {texto}" if heroe_id in afiliaciones else texto
+    todos = conn.execute(select(Heroe.id)).scalars().all()
+    return guardar_afiliaciones(conn, {heroe_id: afiliaciones.get(heroe_id) for heroe_id in todos})
+
+
+def grupos_de(conn, heroe_id, incluir_anteriores=True):
+    """Grupos de un héroe: [(grupo_id, nombre, anterior, miembros)]"""
+    miembros = (
+        select(func.count())
+        .where(HeroeGrupo.grupo_id == Grupo.id)
+        .correlate(Grupo)
+        .scalar_subquery()
+    )
+    consulta = (
+        select(Grupo.id, Grupo.nombre, HeroeGrupo.anterior, miembros.label('miembros'))
+        .join(HeroeGrupo, HeroeGrupo.grupo_id == Grupo.id)
+        .where(HeroeGrupo.heroe_id == heroe_id)
+        .order_by(HeroeGrupo.anterior, Grupo.nombre)
+    )
+    if not incluir_anteriores:
+        consulta = consulta.where(HeroeGrupo.anterior.is_(False))
+    return conn.execute(consulta).all()
+
+
+def miembros_de(conn, grupo_id, incluir_anteriores=True):
+    """Héroes de un grupo: [(heroe_id, nombre, anterior)]"""
+    consulta = (
+        select(Heroe.id, Heroe.nombre, HeroeGrupo.anterior)
+        .join(HeroeGrupo, HeroeGrupo.heroe_id == Heroe.id)
+        .where(HeroeGrupo.grupo_id == grupo_id)
+        .order_by(HeroeGrupo.anterior, Heroe.nombre)
+    )
+    if not incluir_anteriores:
+        consulta = consulta.where(HeroeGrupo.anterior.is_(False))
+    return conn.execute(consulta).all()
+
+
+def companeros(conn, heroe_id, limite=20, incluir_anteriores=True):
+    """Héroes que comparten algún grupo con `heroe_id`: [(heroe_id, nombre, grupos_compartidos)]"""
+    propio = aliased(HeroeGrupo)
+    ajeno = aliased(HeroeGrupo)
+    compartidos = func.count().label('grupos_compartidos')
+    consulta = (
+        select(Heroe.id, Heroe.nombre, compartidos)
+        .select_from(propio)
+        .join(ajeno, (ajeno.grupo_id == propio.grupo_id) & (ajeno.heroe_id != propio.heroe_id))
+        .join(Heroe, Heroe.id == ajeno.heroe_id)
+        .where(propio.heroe_id == heroe_id)
+        .group_by(Heroe.id, Heroe.nombre)
+        .order_by(compartidos.desc(), Heroe.nombre)
+        .limit(limite)
+    )
+    if not incluir_anteriores:
+        consulta = consulta.where(propio.anterior.is_(False), ajeno.anterior.is_(False))
+    return conn.execute(consulta).all()
+
+
+def pares_con_grupos_compartidos(conn, minimo=2, limite=100):
+    """Parejas de héroes con al menos `minimo` grupos en común (base para agrupar equipos)"""
+    a = aliased(HeroeGrupo)
+    b = aliased(HeroeGrupo)
+    compartidos = func.count().label('grupos_compartidos')
+    consulta = (
+        select(a.heroe_id.label('heroe_a'), b.heroe_id.label('heroe_b'), compartidos)
+        .join(b, (b.grupo_id == a.grupo_id) & (b.heroe_id > a.heroe_id))
+        .group_by(a.heroe_id, b.heroe_id)
+        .having(func.count() >= minimo)
+        .order_by(compartidos.desc(), a.heroe_id, b.heroe_id)
+        .limit(limite)
+    )
+    return conn.execute(consulta).all()
+
+
+def grupos_principales(conn, limite=20):
+    """Grupos con más miembros actuales: [(grupo_id, nombre, miembros)]"""
+    miembros = func.count(HeroeGrupo.heroe_id).label('miembros')
+    consulta = (
+        select(Grupo.id, Grupo.nombre, miembros)
+        .join(HeroeGrupo, HeroeGrupo.grupo_id == Grupo.id)
+        .where(HeroeGrupo.anterior.is_(False))
+        .group_by(Grupo.id, Grupo.nombre)
+        .order_by(miembros.desc(), Grupo.nombre)
+        .limit(limite)
+    )
+    return conn.execute(consulta).all()
+
+
+if __name__ == "__main__":
+    # Regenera grupos y heroe_grupo a partir de lo que ya hay en conexiones
+    logging.basicConfig(level=logging.INFO)
+    from scripts.database import get_engine, init_db
+
+    init_db()
+    with get_engine().begin() as conn:
+        reconstruir_afiliaciones(conn)
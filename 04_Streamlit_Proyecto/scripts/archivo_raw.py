@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+import json
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Base de los ficheros del archivo: <base>.ndjson.gz con los payloads y <base>.idx con el índice
+RUTA_ARCHIVO_RAW = os.getenv('ARCHIVO_RAW', 'data/superheroes_payloads')
+
+# Nivel de gzip; cada payload es un miembro independiente, así que un nivel alto apenas cuesta
+NIVEL_COMPRESION = int(os.getenv('ARCHIVO_RAW_NIVEL', '6'))
+
+
+class ArchivoRaw:
+    """Archivo append-only de payloads de la API, comprimido e indexado por id
+
+    Cada payload se guarda como un miembro gzip propio (el fichero sigue siendo un gzip
+    válido de NDJSON) y el índice anota `id, desplazamiento, longitud, fecha`, así que leer un héroe
+    es un seek y una descompresión. Volver a guardar un id añade una versión nueva: el índice
+    se queda con la última y compactar() elimina las anteriores.
+    """
+
+    def __init__(self, base=None):
+        base = base or RUTA_ARCHIVO_RAW
+        self.ruta_datos = f"{base}.ndjson.gz"
+        self.ruta_indice = f"{base}.idx"
+        self._lock = threading.Lock()
+        self._lector = None
+        self.indice = self._cargar_indice()
+
+    def _cargar_indice(self):
+        """{id: (desplazamiento, longitud, fecha)}; descarta entradas que apunten más allá del fichero"""
+        indice = {}
+        if not os.path.exists(self.ruta_indice):
+            return indice
+        tamano = os.path.getsize(self.ruta_datos) if os.path.exists(self.ruta_datos) else 0
+        with open(self.ruta_indice, 'r', encoding='utf-8') as f:
+            for linea in f:
+                partes = linea.rstrip('\n').split('\t')
+                if len(partes) != 4:
+                    # Línea a medio escribir si el proceso cayó mientras se añadía
+                    continue
+                clave, desplazamiento, longitud, fecha = partes[0], int(partes[1]), int(partes[2]), partes[3]
+                if desplazamiento + longitud <= tamano:
+                    indice[clave] = (desplazamiento, longitud, fecha)
+        return indice
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __contains__(self, clave):
+        return str(clave) in self.indice
+
+    def ids(self):
+        """Ids archivados en orden numérico cuando lo son"""
+        return sorted(self.indice, key=lambda clave: (not clave.isdigit(), int(clave) if clave.isdigit() else 0, clave))
+
+    def fecha(self, clave):
+        """Fecha ISO en que se archivó la versión vigente del id"""
+        posicion = self.indice.get(str(clave))
+        return posicion[2] if posicion else None
+
+    def guardar(self, clave, payload, fecha=None):
+        """Añade el payload tal cual lo devolvió la API (seguro entre hilos)
+
+        Si es idéntico a la versión archivada no se escribe nada; devuelve True si se añadió.
+        """
+        clave = str(clave)
+        if clave in self.indice and self.leer(clave) == payload:
+            return False
+        fecha = fecha or datetime.now().isoformat()
+        miembro = gzip.compress(
+            (json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8'),
+            compresslevel=NIVEL_COMPRESION
+        )
+        with self._lock:
+            directorio = os.path.dirname(self.ruta_datos)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            with open(self.ruta_datos, 'ab') as datos:
+                desplazamiento = datos.tell()
+                datos.write(miembro)
+            # El índice se escribe después: si el proceso cae entre medias solo queda un miembro huérfano
+            with open(self.ruta_indice, 'a', encoding='utf-8') as indice:
+                indice.write(f"{clave}\t{desplazamiento}\t{len(miembro)}\t{fecha}\n")
+            self.indice[clave] = (desplazamiento, len(miembro), fecha)
+        return True
+
+    def leer(self, clave):
+        """Payload del id indicado o None si no está archivado"""
+        posicion = self.indice.get(str(clave))
+        if posicion is None:
+            return None
+        desplazamiento, longitud, _ = posicion
+        with self._lock:
+            if self._lector is None:
+                self._lector = open(self.ruta_datos, 'rb')
+            self._lector.seek(desplazamiento)
+            miembro = self._lector.read(longitud)
+        return json.loads(gzip.decompress(miembro))
+
+    def iterar(self):
+        """(id, payload) de la última versión de cada id"""
+        for clave in self.ids():
+            yield clave, self.leer(clave)
+
+    def cerrar(self):
+        with self._lock:
+            if self._lector is not None:
+                self._lector.close()
+                self._lector = None
+
+    def compactar(self):
+        """Reescribe el archivo con una sola versión por id; devuelve los bytes liberados"""
+        if not self.indice:
+            return 0
+        antes = os.path.getsize(self.ruta_datos)
+        temporal_datos = f"{self.ruta_datos}.tmp"
+        temporal_indice = f"{self.ruta_indice}.tmp"
+        nuevo = {}
+        with self._lock:
+            if self._lector is None:
+                self._lector = open(self.ruta_datos, 'rb')
+            with open(temporal_datos, 'wb') as datos, open(temporal_indice, 'w', encoding='utf-8') as indice:
+                for clave in self.ids():
+                    desplazamiento, longitud, fecha = self.indice[clave]
+                    self._lector.seek(desplazamiento)
+                    nuevo[clave] = (datos.tell(), longitud, fecha)
+                    datos.write(self._lector.read(longitud))
+                    indice.write(f"{clave}\t{nuevo[clave][0]}\t{longitud}\t{fecha}\n")
+            self._lector.close()
+            self._lector = None
+            os.replace(temporal_datos, self.ruta_datos)
+            os.replace(temporal_indice, self.ruta_indice)
+            self.indice = nuevo
+        liberados = antes - os.path.getsize(self.ruta_datos)
+        logger.info(f"🗜️ Archivo raw compactado: {len(nuevo)} payloads, {liberados:,} bytes liberados")
+        return liberados
+
+
+if __name__ == "__main__":
+    # Regenera data/superheroes.csv y el NDJSON transformado desde el archivo, sin llamar a la API
+    from scripts.extractor import SuperheroExtractor, COLUMNAS_CSV
+    from scripts.pipeline import Pipeline, SumideroNDJSON, SumideroCSV
+
+    archivo = ArchivoRaw()
+    if not len(archivo):
+        logger.error(f"❌ {archivo.ruta_datos} no tiene payloads. Ejecuta primero extractor.py")
+        sys.exit(1)
+    if '--compactar' in sys.argv:
+        archivo.compactar()
+
+    sumideros = {
+        "ndjson": SumideroNDJSON("data/superheroes_raw.ndjson"),
+        "csv": SumideroCSV("data/superheroes.csv", COLUMNAS_CSV)
+    }
+    def registros(claves, tamano):
+        """(clave, registro) transformando los payloads en lotes de `tamano`"""
+        for inicio in range(0, len(claves), tamano):
+            lote = claves[inicio:inicio + tamano]
+            yield from zip(lote, SuperheroExtractor.transformar_payloads(
+                [archivo.leer(clave) for clave in lote], [archivo.fecha(clave) for clave in lote]
+            ))
+
+    # Checkpoint propio: no se mezcla con el de una extracción interrumpida
+    with Pipeline(sumideros, "data/superheroes_archivo.checkpoint.json") as pipeline:
+        escritos = pipeline.ejecutar(registros(pipeline.pendientes(archivo.ids()), pipeline.cada))
+    logger.info(f"✅ {escritos} héroes re-transformados desde {archivo.ruta_datos}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+from sqlalchemy import text, or_, select, func, bindparam, case
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+
+from scripts.models import Heroe
+
+logger = logging.getLogger(__name__)
+
+# Columnas en las que busca el texto libre de los dashboards con ILIKE / trigramas
+COLUMNAS_BUSQUEDA = ['nombre', 'nombre_real']
+
+# Configuración de texto: 'simple' no aplica stemming (nombres propios en varios idiomas)
+CONFIG_TEXTO = 'simple'
+
+# Peso de cada campo en el tsvector (A pesa más que D en ts_rank)
+PESOS_BUSQUEDA = {
+    "h.nombre": 'A',
+    "h.nombre_real": 'A',
+    "t.ocupacion": 'B',
+    "c.grupo_afiliacion": 'B',
+    "h.lugar_nacimiento": 'C',
+    "h.primera_aparicion": 'C'
+}
+
+
+def _sql_documento():
+    return " || ".join(
+        f"setweight(to_tsvector('{CONFIG_TEXTO}', coalesce({campo}, '')), '{peso}')"
+        for campo, peso in PESOS_BUSQUEDA.items()
+    )
+
+
+def crear_indices_busqueda(engine):
+    """Columna tsvector con su índice GIN y, si pg_trgm está disponible, índices trigram
+
+    Sin pg_trgm (o sin permiso para crear la extensión) la búsqueda sigue funcionando
+    con el índice de texto completo, solo que sin coincidencias aproximadas por índice.
+    """
+    with engine.begin() as conn:
+        # create_all no añade columnas a una tabla heroes ya existente
+        conn.execute(text("ALTER TABLE heroes ADD COLUMN IF NOT EXISTS busqueda tsvector"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_heroes_busqueda ON heroes USING gin (busqueda)"))
+        pendientes = conn.execute(text("SELECT count(*) FROM heroes WHERE busqueda IS NULL")).scalar()
+        if pendientes:
+            actualizar_busqueda(conn)
+    logger.info("✅ Índice de texto completo creado/verificado")
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for columna in COLUMNAS_BUSQUEDA:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_heroes_{columna}_trgm "
+                    f"ON heroes USING gin ({columna} gin_trgm_ops)"
+                ))
+        logger.info("✅ Índices trigram de búsqueda creados/verificados")
+        return True
+    except SQLAlchemyError as e:
+        logger.warning(f"⚠️ pg_trgm no disponible, la búsqueda aproximada por nombre no tendrá índice: {e.orig}")
+        return False
+
+
+def actualizar_busqueda(conn, heroe_ids=None):
+    """Recalcula el tsvector de los héroes indicados (todos si es None) con sus trabajos y conexiones"""
+    filtro = "WHERE h.id IN :ids" if heroe_ids is not None else ""
+    consulta = text(f"""
+        UPDATE heroes SET busqueda = documento.vector
+        FROM (
+            SELECT h.id, {_sql_documento()} AS vector
+            FROM heroes h
+            LEFT JOIN LATERAL (
+                SELECT string_agg(ocupacion, ' ') AS ocupacion FROM trabajos WHERE heroe_id = h.id
+            ) t ON true
+            LEFT JOIN LATERAL (
+                SELECT string_agg(grupo_afiliacion, ' ') AS grupo_afiliacion FROM conexiones WHERE heroe_id = h.id
+            ) c ON true
+            {filtro}
+        ) AS documento
+        WHERE heroes.id = documento.id
+    """)
+    parametros = {}
+    if heroe_ids is not None:
+        if not heroe_ids:
+            return 0
+        consulta = consulta.bindparams(bindparam('ids', expanding=True))
+        parametros['ids'] = list(heroe_ids)
+    return conn.execute(consulta, parametros).rowcount
+
+
+def trigram_disponible(conn):
+    """True si la extensión pg_trgm está instalada en la base de datos"""
+    return bool(conn.execute(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")).scalar())
+
+
+def escapar_like(texto):
+    """Escapa los comodines de LIKE para buscar el texto tal cual"""
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _consulta_texto(texto):
+    return func.websearch_to_tsquery(CONFIG_TEXTO, texto)
+
+
+def condicion_busqueda(texto, trigram=False):
+    """Condición de búsqueda: texto completo sobre todos los campos o subcadena/similitud en nombres
+
+    Devuelve None si no hay texto.
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return None
+    patron = f"%{escapar_like(texto)}%"
+    condiciones = [Heroe.busqueda.op('@@')(_consulta_texto(texto))]
+    for columna in COLUMNAS_BUSQUEDA:
+        condiciones.append(getattr(Heroe, columna).ilike(patron, escape='\\'))
+        if trigram:
+            condiciones.append(getattr(Heroe, columna).op('%')(texto))
+    return or_(*condiciones)
+
+
+def relevancia(texto, trigram=False):
+    """Expresión de ranking: ts_rank_cd ponderado + bonus por coincidencia en el nombre"""
+    texto = texto.strip()
+    puntuacion = func.ts_rank_cd(Heroe.busqueda, _consulta_texto(texto))
+    puntuacion = puntuacion + case((Heroe.nombre.ilike(escapar_like(texto), escape='\\'), 1.0), else_=0.0)
+    puntuacion = puntuacion + case((Heroe.nombre.ilike(f"{escapar_like(texto)}%", escape='\\'), 0.5), else_=0.0)
+    if trigram:
+        puntuacion = puntuacion + func.greatest(
+            *[func.similarity(getattr(Heroe, columna), texto) for columna in COLUMNAS_BUSQUEDA]
+        )
+    return puntuacion
+
+
+def buscar(conn, texto, limite=20):
+    """Héroes activos que coinciden con `texto` ordenados por relevancia: [(id, nombre, editorial, relevancia)]"""
+    texto = (texto or '').strip()
+    if not texto:
+        return []
+    # El operador % usa pg_trgm.similarity_threshold (0.3 por defecto)
+    trigram = trigram_disponible(conn)
+    puntuacion = relevancia(texto, trigram).label('relevancia')
+    consulta = (
+        select(Heroe.id, Heroe.nombre, Heroe.editorial, puntuacion)
+        .where(Heroe.activo, condicion_busqueda(texto, trigram))
+        .order_by(puntuacion.desc(), Heroe.nombre)
+        .limit(limite)
+    )
+    return conn.execute(consulta).all()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+from contextlib import contextmanager
+import streamlit as st
+
+from scripts.database import get_engine, sesion_bd, estadisticas_pool
+
+
+@st.cache_resource(show_spinner=False)
+def engine_compartido():
+    """Engine único por proceso de Streamlit: lo comparten todos los usuarios y reruns"""
+    return get_engine()
+
+
+@contextmanager
+def sesion_dashboard():
+    """Sesión para un bloque del dashboard; devuelve la conexión al pool aunque el render falle"""
+    with sesion_bd(engine_compartido()) as db:
+        yield db
+
+
+def metricas_pool():
+    """Métricas del pool del engine compartido (para la página de diagnóstico)"""
+    return estadisticas_pool(engine_compartido())
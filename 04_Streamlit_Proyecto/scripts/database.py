@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from contextlib import contextmanager
 import os
+import time
+import threading
+from datetime import datetime
 from dotenv import load_dotenv
 import logging
 
@@ -23,25 +28,127 @@ DB_NAME = os.getenv('DB_NAME', 'postgres')
 # Crear URL de conexión
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-try:
-    # Crear engine
-    engine = create_engine(
+# Pool de conexiones (configurable desde .env)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+# Segundos tras los que se recicla una conexión (antes de que la cierre el servidor o un proxy)
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
+# Esperas por encima de este umbral (segundos) cuentan como contención del pool
+UMBRAL_ESPERA_POOL = float(os.getenv('DB_POOL_UMBRAL_ESPERA', '0.1'))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout hasta obtener una conexión"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metricas_lock = threading.Lock()
+        self.metricas = {'checkouts': 0, 'espera_total': 0.0, 'espera_max': 0.0, 'esperas_largas': 0, 'timeouts': 0}
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metricas_lock:
+                self.metricas['timeouts'] += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._metricas_lock:
+                self.metricas['checkouts'] += 1
+                self.metricas['espera_total'] += espera
+                self.metricas['espera_max'] = max(self.metricas['espera_max'], espera)
+                if espera > UMBRAL_ESPERA_POOL:
+                    self.metricas['esperas_largas'] += 1
+
+    def recreate(self):
+        # dispose() recrea el pool; las métricas se conservan
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        nuevo._metricas_lock = self._metricas_lock
+        return nuevo
+
+def crear_engine():
+    """Crea el engine con pre-ping y reciclado de conexiones"""
+    return create_engine(
         DATABASE_URL,
-        echo=False,
-        pool_size=5,
-        max_overflow=10
+        echo=False,  # Cambiar a True para ver las queries SQL
+        poolclass=PoolMedido,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True
     )
-    
-    # Probar conexión
-    with engine.connect() as conn:
-        logger.info("✅ Conexión a PostgreSQL exitosa")
-        
-except Exception as e:
-    logger.error(f"❌ Error conectando a PostgreSQL: {e}")
-    raise
-
-# Crear SessionLocal
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_engine():
+    """Engine compartido; se crea y se prueba la conexión en el primer uso, no al importar"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = crear_engine()
+                try:
+                    # Probar conexión
+                    with engine.connect():
+                        logger.info("✅ Conexión a PostgreSQL exitosa")
+                except Exception as e:
+                    logger.error(f"❌ Error conectando a PostgreSQL: {e}")
+                    engine.dispose()
+                    raise
+                _engine = engine
+    return _engine
+
+def __getattr__(nombre):
+    # Compatibilidad con `from scripts.database import engine`
+    if nombre == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+_fabrica_sesiones = sessionmaker(autocommit=False, autoflush=False)
+
+def SessionLocal():
+    """Nueva sesión ligada al engine compartido"""
+    return _fabrica_sesiones(bind=get_engine())
+
+# Archivo marcador que populate_db.py actualiza al terminar cada carga.
+# Los dashboards usan su fecha de modificación para invalidar sus cachés.
+RUTA_VERSION_DATOS = os.getenv('DATA_VERSION_FILE', 'data/.version_datos')
+
+@contextmanager
+def sesion_bd(engine=None):
+    """Sesión que se cierra siempre (y hace rollback si algo falla), devolviendo la conexión al pool"""
+    db = _fabrica_sesiones(bind=engine or get_engine())
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def estadisticas_pool(engine=None):
+    """Estado del pool: conexiones en uso, overflow y tiempos de espera de checkout"""
+    pool = (engine or get_engine()).pool
+    metricas = dict(getattr(pool, 'metricas', {}))
+    checkouts = metricas.get('checkouts', 0)
+    return {
+        'tamano': pool.size(),
+        'max_overflow': DB_MAX_OVERFLOW,
+        'en_uso': pool.checkedout(),
+        'disponibles': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'checkouts': checkouts,
+        'espera_media': metricas.get('espera_total', 0.0) / checkouts if checkouts else 0.0,
+        'espera_max': metricas.get('espera_max', 0.0),
+        'esperas_largas': metricas.get('esperas_largas', 0),
+        'timeouts': metricas.get('timeouts', 0)
+    }
 
 def get_db():
     """Dependencia para obtener sesión de base de datos"""
@@ -54,9 +161,72 @@ def get_db():
 def init_db():
     """Inicializa la base de datos creando las tablas"""
     from scripts.models import Base
+    from scripts.vistas import crear_vistas
+    from scripts.busqueda import crear_indices_busqueda
     try:
+        engine = get_engine()
         Base.metadata.create_all(bind=engine)
         logger.info("✅ Tablas creadas/verificadas exitosamente")
+        migrar_columnas(engine)
+        crear_vistas(engine)
+        crear_indices_busqueda(engine)
     except SQLAlchemyError as e:
         logger.error(f"❌ Error creando tablas: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def migrar_columnas(engine):
+    """Añade a una tabla heroes ya existente las columnas posteriores y rellena altura_cm/peso_kg
+
+    create_all no altera tablas existentes. Las filas con `altura`/`peso` en texto y sin valor
+    numérico se convierten con el mismo parser vectorizado que usa la carga. Si `activo` no
+    existía, la vista de resumen se elimina para que crear_vistas() la recree filtrando por ella.
+    """
+    import pandas as pd
+    from scripts.transformacion import medida_metrica, a_registros, FACTORES_ALTURA, FACTORES_PESO
+    from scripts.vistas import VISTA_RESUMEN
+    with engine.begin() as conn:
+        for columna in ('altura_cm', 'peso_kg'):
+            conn.execute(text(f"ALTER TABLE heroes ADD COLUMN IF NOT EXISTS {columna} double precision"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_heroes_{columna} ON heroes ({columna})"))
+
+        con_activo = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'heroes' AND column_name = 'activo')"
+        )).scalar()
+        if not con_activo:
+            conn.execute(text("ALTER TABLE heroes ADD COLUMN activo boolean NOT NULL DEFAULT true"))
+            conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {VISTA_RESUMEN}"))
+            logger.info("🗂️ Columna heroes.activo añadida")
+
+        pendientes = pd.read_sql(text(
+            "SELECT id, altura, peso FROM heroes "
+            "WHERE (altura_cm IS NULL AND altura IS NOT NULL) OR (peso_kg IS NULL AND peso IS NOT NULL)"
+        ), conn)
+        if pendientes.empty:
+            return 0
+        pendientes['altura_cm'] = medida_metrica(pendientes['altura'], FACTORES_ALTURA)
+        pendientes['peso_kg'] = medida_metrica(pendientes['peso'], FACTORES_PESO)
+        pendientes = pendientes[pendientes[['altura_cm', 'peso_kg']].notna().any(axis=1)]
+        if not pendientes.empty:
+            conn.execute(
+                text("UPDATE heroes SET altura_cm = COALESCE(:altura_cm, altura_cm), "
+                     "peso_kg = COALESCE(:peso_kg, peso_kg) WHERE id = :id"),
+                a_registros(pendientes[['id', 'altura_cm', 'peso_kg']])
+            )
+            logger.info(f"📏 Altura/peso numéricos calculados para {len(pendientes)} héroes")
+        return len(pendientes)
+
+def marcar_datos_actualizados():
+    """Actualiza el marcador de versión de datos tras una carga"""
+    directorio = os.path.dirname(RUTA_VERSION_DATOS)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(RUTA_VERSION_DATOS, 'w') as f:
+        f.write(datetime.now().isoformat())
+
+def version_datos():
+    """Versión actual de los datos (mtime del marcador, 0 si no existe)"""
+    try:
+        return os.path.getmtime(RUTA_VERSION_DATOS)
+    except OSError:
+        return 0.0
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+import os
+import json
+import math
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import select, func, text, or_, Text
+
+from scripts.database import version_datos
+from scripts.conexion_dashboard import engine_compartido
+from scripts.models import Heroe
+from scripts.vistas import VISTA_RESUMEN
+from scripts.busqueda import condicion_busqueda, trigram_disponible, buscar
+from scripts.powerstats import POWERSTATS, CATEGORIAS, PowerstatMatrix
+
+# Segundos que un resultado permanece en la caché de Streamlit
+CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '600'))
+
+# Columnas que consumen los dashboards, con su etiqueta de presentación
+COLUMNAS_HEROE = {
+    'ID': Heroe.id,
+    'Nombre': Heroe.nombre,
+    'Nombre Real': Heroe.nombre_real,
+    'Editorial': Heroe.editorial,
+    'Género': Heroe.genero,
+    'Raza': Heroe.raza,
+    'Altura (cm)': Heroe.altura_cm,
+    'Peso (kg)': Heroe.peso_kg,
+    'Alineación': Heroe.alineacion,
+    'Inteligencia': Heroe.inteligencia,
+    'Fuerza': Heroe.fuerza,
+    'Velocidad': Heroe.velocidad,
+    'Durabilidad': Heroe.durabilidad,
+    'Poder': Heroe.poder,
+    'Combate': Heroe.combate,
+    'Lugar Nacimiento': Heroe.lugar_nacimiento,
+    'Primera Aparición': Heroe.primera_aparicion
+}
+
+VALORES_DESCONOCIDOS = {
+    'Nombre Real': 'Desconocido',
+    'Editorial': 'Desconocida',
+    'Género': 'Desconocido',
+    'Raza': 'Desconocida',
+    'Alineación': 'Desconocida',
+    'Lugar Nacimiento': 'Desconocido',
+    'Primera Aparición': 'Desconocida'
+}
+
+# Medidas físicas numéricas (columnas indexadas) para rangos y gráficas de dispersión
+MEDIDAS = ['Altura (cm)', 'Peso (kg)']
+
+# Columnas por las que se puede ordenar la tabla paginada
+COLUMNAS_ORDEN = ['Poder', 'Nombre', 'Editorial', 'Fuerza', 'Velocidad', *MEDIDAS]
+
+# Puntos como máximo en las gráficas de dispersión; con más héroes se dibuja una muestra
+PUNTOS_DISPERSION = int(os.getenv('DASHBOARD_PUNTOS_DISPERSION', '2000'))
+
+# Filas de DataFrame.describe() y su agregado equivalente sobre una expresión de PostgreSQL
+ESTADISTICOS = {
+    'count': func.count,
+    'mean': func.avg,
+    'std': func.stddev_samp,
+    'min': func.min,
+    '25%': lambda valor: func.percentile_cont(0.25).within_group(valor),
+    '50%': lambda valor: func.percentile_cont(0.5).within_group(valor),
+    '75%': lambda valor: func.percentile_cont(0.75).within_group(valor),
+    'max': func.max
+}
+
+
+def _select_heroes():
+    # Los héroes dados de baja por populate_db.py (activo = false) no se muestran
+    return select(*[columna.label(nombre) for nombre, columna in COLUMNAS_HEROE.items()]).where(Heroe.activo)
+
+
+def _leer_heroes(consulta):
+    df = pd.read_sql(consulta, engine_compartido())
+
+    # Mismo criterio que `valor or 'Desconocido'`: NULL y cadena vacía son desconocidos
+    textos = list(VALORES_DESCONOCIDOS)
+    df[textos] = df[textos].replace('', np.nan).fillna(VALORES_DESCONOCIDOS)
+    df[POWERSTATS] = df[POWERSTATS].fillna(0).astype(int)
+    df['Poder Total'] = df[POWERSTATS].sum(axis=1)
+    return df
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cargar_heroes(version):
+    return _leer_heroes(_select_heroes().order_by(Heroe.id))
+
+
+def cargar_heroes():
+    """DataFrame de héroes cacheado; se invalida cuando populate_db.py termina una carga"""
+    return _cargar_heroes(version_datos())
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cargar_matriz(version):
+    columnas = ['ID', 'Nombre'] + CATEGORIAS + POWERSTATS
+    consulta = (
+        select(*[COLUMNAS_HEROE[nombre].label(nombre) for nombre in columnas])
+        .where(Heroe.activo)
+        .order_by(Heroe.id)
+    )
+    df = pd.read_sql(consulta, engine_compartido())
+    # Los powerstats NULL se conservan como NaN: la matriz los marca como desconocidos
+    df[CATEGORIAS] = df[CATEGORIAS].replace('', np.nan).fillna({c: VALORES_DESCONOCIDOS[c] for c in CATEGORIAS})
+    return PowerstatMatrix.desde_dataframe(df)
+
+
+def cargar_matriz():
+    """PowerstatMatrix de todos los héroes (medias, correlación y top-k sin contar NULL como 0)"""
+    return _cargar_matriz(version_datos())
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cargar_resumen(version):
+    return pd.read_sql(text(f"SELECT * FROM {VISTA_RESUMEN}"), engine_compartido())
+
+
+def cargar_resumen():
+    """Filas de la vista materializada de agregados (unas decenas como máximo)"""
+    return _cargar_resumen(version_datos())
+
+
+def resumen_por(dimension):
+    """Agregados de una dimensión ('editorial', 'alineacion', 'genero' o 'total')"""
+    resumen = cargar_resumen()
+    return resumen[resumen['dimension'] == dimension].reset_index(drop=True)
+
+
+def resumen_general():
+    """KPIs globales (total, editoriales, poder medio, última actualización)"""
+    total = resumen_por('total')
+    if total.empty:
+        return {'total': 0, 'editoriales': 0, 'poder_promedio': None, 'ultima_actualizacion': None}
+
+    fila = total.iloc[0]
+    return {
+        'total': int(fila['total']),
+        'editoriales': int(resumen_por('editorial')['valor'].notna().sum()),
+        'poder_promedio': fila['poder_promedio'] if pd.notna(fila['poder_promedio']) else None,
+        'ultima_actualizacion': fila['ultima_actualizacion'] if pd.notna(fila['ultima_actualizacion']) else None
+    }
+
+
+def estadisticas_por_editorial():
+    """Conteo, promedio, mínimo y máximo de cada powerstat por editorial"""
+    stats = resumen_por('editorial')
+    stats = stats[stats['valor'].notna()].sort_values('valor')
+
+    columnas = {'valor': 'Editorial', 'total': 'Total'}
+    for nombre in POWERSTATS:
+        columna = COLUMNAS_HEROE[nombre].key
+        columnas.update({
+            f'{columna}_promedio': f'{nombre} Promedio',
+            f'{columna}_min': f'{nombre} Mínimo',
+            f'{columna}_max': f'{nombre} Máximo'
+        })
+    return stats[list(columnas)].rename(columns=columnas).reset_index(drop=True)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _ranking_por_editorial(version):
+    posicion = func.row_number().over(partition_by=Heroe.editorial, order_by=(Heroe.poder.desc(), Heroe.id))
+    consulta = (
+        select(
+            Heroe.editorial.label('Editorial'),
+            posicion.label('Posición'),
+            Heroe.nombre.label('Nombre'),
+            Heroe.poder.label('Poder')
+        )
+        .where(Heroe.activo, Heroe.editorial.isnot(None))
+        .order_by(Heroe.editorial, 'Posición')
+    )
+    df = pd.read_sql(consulta, engine_compartido())
+    df['Poder'] = df['Poder'].astype('Int64')
+    return df
+
+
+def ranking_por_editorial():
+    """Héroes de cada editorial ordenados por poder (función de ventana row_number)"""
+    return _ranking_por_editorial(version_datos())
+
+
+def condiciones_filtro(filtros, trigram=False):
+    """Traduce los filtros de la barra lateral a condiciones WHERE parametrizadas
+
+    `filtros` admite 'busqueda', 'Editorial', 'Alineación', 'Género' (None o 'Todas'/'Todos'
+    para no filtrar), 'poder_min', 'poder_max', 'minimos' ({powerstat: valor}) y 'rangos'
+    ({medida: [mínimo, máximo]}).
+    Los powerstats NULL cuentan como 0, igual que en cargar_heroes(); un rango de medida
+    excluye a los héroes sin ese dato, así que solo debe enviarse si el usuario lo acota.
+    """
+    condiciones = []
+
+    busqueda = condicion_busqueda(filtros.get('busqueda'), trigram)
+    if busqueda is not None:
+        condiciones.append(busqueda)
+
+    for nombre in ('Editorial', 'Alineación', 'Género'):
+        valor = filtros.get(nombre)
+        if valor in (None, 'Todas', 'Todos'):
+            continue
+        columna = COLUMNAS_HEROE[nombre]
+        if valor == VALORES_DESCONOCIDOS[nombre]:
+            condiciones.append(or_(columna.is_(None), columna == ''))
+        else:
+            condiciones.append(columna == valor)
+
+    poder = func.coalesce(Heroe.poder, 0)
+    if filtros.get('poder_min') is not None:
+        condiciones.append(poder >= filtros['poder_min'])
+    if filtros.get('poder_max') is not None:
+        condiciones.append(poder <= filtros['poder_max'])
+
+    # Un mínimo de 0 no descarta nada; solo se añade la condición si filtra
+    for nombre, minimo in (filtros.get('minimos') or {}).items():
+        if minimo:
+            condiciones.append(COLUMNAS_HEROE[nombre] >= minimo)
+
+    for nombre, (minimo, maximo) in (filtros.get('rangos') or {}).items():
+        condiciones.append(COLUMNAS_HEROE[nombre].between(minimo, maximo))
+
+    return condiciones
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _trigram_disponible(version):
+    with engine_compartido().connect() as conn:
+        return trigram_disponible(conn)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _filtrar_heroes(version, filtros_json):
+    condiciones = condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version))
+    consulta = _select_heroes().where(*condiciones).order_by(Heroe.id)
+    return _leer_heroes(consulta)
+
+
+def filtrar_heroes(filtros):
+    """Todos los héroes que cumplen los filtros, filtrados en PostgreSQL (para la descarga)"""
+    return _filtrar_heroes(version_datos(), json.dumps(filtros, sort_keys=True))
+
+
+def _desconocido(nombre):
+    """Columna con NULL y '' sustituidos por su valor de desconocido, como en _leer_heroes()"""
+    return func.coalesce(func.nullif(COLUMNAS_HEROE[nombre], ''), VALORES_DESCONOCIDOS[nombre])
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _resumen_filtrado(version, filtros_json):
+    condiciones = condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version))
+    poder_total = sum(func.coalesce(COLUMNAS_HEROE[nombre], 0) for nombre in POWERSTATS)
+    consulta = select(
+        func.count(),
+        func.count(_desconocido('Editorial').distinct()),
+        func.coalesce(func.sum(poder_total), 0)
+    ).where(Heroe.activo, *condiciones)
+    with engine_compartido().connect() as conn:
+        total, editoriales, suma = conn.execute(consulta).one()
+    return {'total': total, 'editoriales': editoriales, 'poder_total': int(suma)}
+
+
+def resumen_filtrado(filtros):
+    """KPIs de los héroes filtrados (total, editoriales distintas y suma de Poder Total) con un COUNT/SUM"""
+    return _resumen_filtrado(version_datos(), json.dumps(filtros, sort_keys=True))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _conteo_filtrado(version, filtros_json, dimension):
+    valor = _desconocido(dimension).label(dimension)
+    consulta = (
+        select(valor, func.count().label('Cantidad'))
+        .where(Heroe.activo, *condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version)))
+        .group_by(valor)
+        .order_by(func.count().desc(), valor)
+    )
+    return pd.read_sql(consulta, engine_compartido())
+
+
+def conteo_filtrado(filtros, dimension):
+    """Héroes filtrados por valor de `dimension` ('Editorial', 'Alineación' o 'Género') con GROUP BY"""
+    return _conteo_filtrado(version_datos(), json.dumps(filtros, sort_keys=True), dimension)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _cuartiles_filtrados(version, filtros_json, dimension, stat):
+    valor = func.coalesce(COLUMNAS_HEROE[stat], 0)
+    grupo = _desconocido(dimension).label(dimension)
+    consulta = (
+        select(grupo, *[agregado(valor).label(nombre) for nombre, agregado in ESTADISTICOS.items()])
+        .where(Heroe.activo, *condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version)))
+        .group_by(grupo)
+        .order_by(grupo)
+    )
+    return pd.read_sql(consulta, engine_compartido())
+
+
+def cuartiles_filtrados(filtros, dimension, stat):
+    """Mínimo, cuartiles, media y máximo de `stat` (NULL = 0) por `dimension` para un box plot"""
+    return _cuartiles_filtrados(version_datos(), json.dumps(filtros, sort_keys=True), dimension, stat)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _describir_filtrados(version, filtros_json):
+    valores = {nombre: func.coalesce(COLUMNAS_HEROE[nombre], 0) for nombre in POWERSTATS}
+    consulta = select(*[
+        agregado(valor) for agregado in ESTADISTICOS.values() for valor in valores.values()
+    ]).where(Heroe.activo, *condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version)))
+    with engine_compartido().connect() as conn:
+        fila = conn.execute(consulta).one()
+    return pd.DataFrame(
+        np.array(fila, dtype=float).reshape(len(ESTADISTICOS), len(POWERSTATS)),
+        index=list(ESTADISTICOS), columns=POWERSTATS
+    )
+
+
+def describir_filtrados(filtros):
+    """Equivalente a DataFrame.describe() de los powerstats filtrados (NULL = 0), calculado en PostgreSQL"""
+    return _describir_filtrados(version_datos(), json.dumps(filtros, sort_keys=True))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _ids_filtrados(version, filtros_json):
+    consulta = (
+        select(Heroe.id)
+        .where(Heroe.activo, *condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version)))
+    )
+    with engine_compartido().connect() as conn:
+        return np.fromiter(conn.execute(consulta).scalars(), dtype=np.int32)
+
+
+def ids_filtrados(filtros):
+    """IDs de los héroes filtrados para PowerstatMatrix.subconjunto; None si ningún filtro descarta nada"""
+    if not condiciones_filtro(filtros):
+        return None
+    return _ids_filtrados(version_datos(), json.dumps(filtros, sort_keys=True))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _muestra_heroes(version, filtros_json, columnas, limite):
+    consulta = (
+        select(*[COLUMNAS_HEROE[nombre].label(nombre) for nombre in columnas])
+        .where(Heroe.activo, *condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version)))
+        # Muestra estable entre recargas: el orden solo depende del id
+        .order_by(func.md5(func.cast(Heroe.id, Text)))
+        .limit(limite)
+    )
+    df = pd.read_sql(consulta, engine_compartido())
+    textos = [columna for columna in columnas if columna in VALORES_DESCONOCIDOS]
+    df[textos] = df[textos].replace('', np.nan).fillna({c: VALORES_DESCONOCIDOS[c] for c in textos})
+    presentes = [columna for columna in columnas if columna in POWERSTATS]
+    df[presentes] = df[presentes].fillna(0).astype(int)
+    medidas = [columna for columna in columnas if columna in MEDIDAS]
+    df[medidas] = df[medidas].astype(float)
+    return df
+
+
+def muestra_heroes(filtros, columnas, limite=None):
+    """Hasta `limite` héroes filtrados con solo las `columnas` pedidas, para gráficas por héroe"""
+    columnas = tuple(dict.fromkeys(columnas))
+    return _muestra_heroes(version_datos(), json.dumps(filtros, sort_keys=True), columnas, limite or PUNTOS_DISPERSION)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _pagina_heroes(version, filtros_json, orden, pagina, por_pagina):
+    columna = COLUMNAS_HEROE[orden]
+    consulta = (
+        _select_heroes()
+        .where(*condiciones_filtro(json.loads(filtros_json), _trigram_disponible(version)))
+        .order_by(columna.desc().nulls_last(), Heroe.id)
+        .limit(por_pagina)
+        .offset((pagina - 1) * por_pagina)
+    )
+    return _leer_heroes(consulta)
+
+
+def pagina_heroes(filtros, orden='Poder', pagina=1, por_pagina=50):
+    """Una página de héroes filtrados y ordenados (LIMIT/OFFSET en el servidor)"""
+    return _pagina_heroes(version_datos(), json.dumps(filtros, sort_keys=True), orden, pagina, por_pagina)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _opciones_filtro(version):
+    opciones = {}
+    poder = func.coalesce(Heroe.poder, 0)
+    with engine_compartido().connect() as conn:
+        for nombre in ('Editorial', 'Alineación', 'Género'):
+            valor = func.coalesce(func.nullif(COLUMNAS_HEROE[nombre], ''), VALORES_DESCONOCIDOS[nombre])
+            opciones[nombre] = sorted(conn.execute(select(valor).where(Heroe.activo).distinct()).scalars().all())
+        minimo, maximo = conn.execute(select(func.min(poder), func.max(poder)).where(Heroe.activo)).one()
+        opciones['poder'] = (int(minimo or 0), int(maximo or 0))
+        # min/max de columnas indexadas: PostgreSQL los resuelve leyendo un extremo de cada índice
+        for nombre in MEDIDAS:
+            columna = COLUMNAS_HEROE[nombre]
+            minimo, maximo = conn.execute(select(func.min(columna), func.max(columna)).where(Heroe.activo)).one()
+            opciones[nombre] = (math.floor(minimo), math.ceil(maximo)) if minimo is not None else None
+    return opciones
+
+
+def opciones_filtro():
+    """Valores distintos de editorial/alineación/género y rangos de poder y medidas para los selectores"""
+    return _opciones_filtro(version_datos())
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _buscar_heroes(version, texto, limite):
+    with engine_compartido().connect() as conn:
+        resultados = buscar(conn, texto, limite)
+    df = pd.DataFrame(resultados, columns=['ID', 'Nombre', 'Editorial', 'Relevancia'])
+    df['Editorial'] = df['Editorial'].replace('', np.nan).fillna(VALORES_DESCONOCIDOS['Editorial'])
+    return df
+
+
+def buscar_heroes(texto, limite=10):
+    """Mejores coincidencias de búsqueda (nombre, biografía, ocupación, afiliaciones) por relevancia"""
+    return _buscar_heroes(version_datos(), (texto or '').strip(), limite)
@@ -1,11 +1,21 @@
 #!/usr/bin/env python3
+import sys
 import os
-import requests
-import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import logging
+from scripts.http_client import ClienteHTTP
+from scripts.rate_limiter import limitador_desde_env
+from scripts.http_cache import cache_desde_env
+from scripts.formatos import tipar_heroes, guardar_parquet
+from scripts.archivo_raw import ArchivoRaw
+from scripts.transformacion import transformar_lote, a_registros
+from scripts.pipeline import (
+    Pipeline, SumideroNDJSON, SumideroCSV, SumideroBD, mapear_acotado, leer_registros
+)
 
 load_dotenv()
 
@@ -20,11 +30,30 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Columnas de data/superheroes.csv (las claves de `transformar_payloads`)
+COLUMNAS_CSV = [
+    "id_api", "nombre", "inteligencia", "fuerza", "velocidad", "durabilidad",
+    "poder", "combate", "editorial", "fecha_extraccion"
+]
+
 class SuperheroExtractor:
     def __init__(self):
         self.token = os.getenv("API_TOKEN")
         self.base_url = os.getenv("BASE_URL")
-        self.heroes = os.getenv("HEROES").split(",")
+        self.heroes = [hero_id.strip() for hero_id in os.getenv("HEROES").split(",")]
+        self.max_workers = int(os.getenv("EXTRACTOR_WORKERS", "8"))
+        # Peticiones en vuelo como máximo; acota la memoria con catálogos grandes
+        self.ventana = int(os.getenv("EXTRACTOR_VENTANA", str(self.max_workers * 2)))
+        self.http = ClienteHTTP(
+            pool_size=max(self.max_workers, 1),
+            limitador=limitador_desde_env("SUPERHERO", tasa_defecto=10, capacidad_defecto=self.max_workers),
+            cache=cache_desde_env(secretos=[self.token])
+        )
+        self.incremental = os.getenv("EXTRACCION_INCREMENTAL", "false").lower() in ("1", "true", "si", "sí")
+        self.ttl_horas = float(os.getenv("INCREMENTAL_TTL_HORAS", "24"))
+        self.ruta_manifiesto = os.getenv("INCREMENTAL_MANIFIESTO", "data/superheroes_raw.ndjson")
+        # Payloads completos de la API; populate_db.py los lee de aquí sin volver a la red
+        self.archivo = ArchivoRaw()
 
         if not self.token:
             raise ValueError("API_TOKEN no configurado")
@@ -32,15 +61,17 @@ class SuperheroExtractor:
     def extraer_heroe(self, hero_id):
         try:
             url = f"{self.base_url}/{self.token}/{hero_id}"
-            response = requests.get(url, timeout=10)
+            response = self.http.get(url, timeout=10)
             response.raise_for_status()
 
             data = response.json()
 
             if data.get("response") == "error":
                 logger.error(f"Error API: {data.get('error')}")
+                self.http.descartar_cache(url)
                 return None
 
+            self.archivo.guardar(data.get("id", hero_id), data)
             logger.info(f"Heroe {data.get('name')} extraído correctamente")
             return data
 
@@ -48,48 +79,114 @@ class SuperheroExtractor:
             logger.error(f"Error extrayendo héroe {hero_id}: {str(e)}")
             return None
 
-    def transformar(self, data):
+    @staticmethod
+    def transformar_payloads(payloads, fechas=None):
+        """Registros del CSV (claves de COLUMNAS_CSV) con la transformación en lote de populate_db
+
+        Powerstats como enteros o None (no el texto "null") y el texto "null" como None, igual que
+        en la base de datos. `fechas` es una fecha de extracción por payload (ahora si falta).
+        """
+        heroes = transformar_lote(payloads).rename(columns={"heroe_id_api": "id_api"})
+        heroes["fecha_extraccion"] = fechas if fechas is not None else datetime.now().isoformat()
+        return a_registros(heroes[COLUMNAS_CSV])
+
+    @classmethod
+    def transformar(cls, data, fecha_extraccion=None):
         try:
-            return {
-                "id_api": data.get("id"),  # ← Añadir esta línea
-                "nombre": data.get("name"),
-                "inteligencia": data["powerstats"].get("intelligence"),
-                "fuerza": data["powerstats"].get("strength"),
-                "velocidad": data["powerstats"].get("speed"),
-                "durabilidad": data["powerstats"].get("durability"),
-                "poder": data["powerstats"].get("power"),
-                "combate": data["powerstats"].get("combat"),
-                "editorial": data["biography"].get("publisher"),
-                "fecha_extraccion": datetime.now().isoformat()
-            }
+            fechas = [fecha_extraccion] if fecha_extraccion else None
+            return cls.transformar_payloads([data], fechas)[0]
         except Exception as e:
             logger.error(f"Error transformando datos: {str(e)}")
             return None
 
-    def ejecutar(self):
-        datos = []
+    def procesar_heroe(self, hero_id):
+        """Extrae y transforma un héroe; devuelve None si falla alguna etapa"""
+        raw = self.extraer_heroe(hero_id)
+        if raw:
+            return self.transformar(raw)
+        return None
 
-        logger.info("Iniciando extracción de superhéroes...")
+    def cargar_manifiesto(self):
+        """Registros de la última extracción indexados por id_api"""
+        if not os.path.exists(self.ruta_manifiesto):
+            logger.info(f"📁 Sin manifiesto previo en {self.ruta_manifiesto}, se extraerán todos los héroes")
+            return {}
 
-        for hero_id in self.heroes:
-            raw = self.extraer_heroe(hero_id.strip())
-            if raw:
-                transformado = self.transformar(raw)
-                if transformado:
-                    datos.append(transformado)
-
-        return datos
+        try:
+            return {str(r["id_api"]): r for r in leer_registros(self.ruta_manifiesto) if r.get("id_api")}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ No se pudo leer el manifiesto {self.ruta_manifiesto}: {e}")
+            return {}
+
+    @staticmethod
+    def es_fresco(registro, limite):
+        """True si el registro se extrajo después de `limite`"""
+        try:
+            return datetime.fromisoformat(registro.get("fecha_extraccion")) >= limite
+        except (TypeError, ValueError):
+            return False
+
+    def registros(self, hero_ids, previos=None, limite=None):
+        """Genera (hero_id, registro) en orden, extrayendo como mucho `ventana` héroes a la vez"""
+        previos = previos or {}
+
+        def obtener(hero_id):
+            previo = previos.get(hero_id)
+            if previo and limite and self.es_fresco(previo, limite):
+                return previo
+            dato = self.procesar_heroe(hero_id)
+            if not dato and previo:
+                # Si la re-extracción falla conservamos la versión anterior antes que perder el héroe
+                logger.warning(f"⚠️ Se conserva la versión anterior del héroe {hero_id}")
+                return previo
+            return dato
+
+        yield from zip(hero_ids, mapear_acotado(obtener, hero_ids, self.max_workers, self.ventana))
+
+    def ejecutar(self, pipeline):
+        """Extrae los héroes pendientes del checkpoint y los envía a los sumideros de `pipeline`"""
+        # Los registros previos siempre se cargan: si un héroe falla se conserva su versión anterior
+        # en lugar de desaparecer del CSV. Solo en modo incremental se reutilizan los frescos.
+        previos = self.cargar_manifiesto()
+        limite = datetime.now() - timedelta(hours=self.ttl_horas) if self.incremental else None
+        pendientes = pipeline.pendientes(self.heroes)
+
+        if self.incremental:
+            frescos = sum(1 for hero_id in pendientes if hero_id in previos and self.es_fresco(previos[hero_id], limite))
+            logger.info(
+                f"♻️ Modo incremental (TTL {self.ttl_horas:g}h): "
+                f"{frescos} héroes frescos, {len(pendientes) - frescos} por extraer"
+            )
+        logger.info(f"Iniciando extracción de {len(pendientes)} superhéroes con {self.max_workers} workers...")
+
+        escritos = pipeline.ejecutar(self.registros(pendientes, previos, limite))
+        self.http.registrar_estadisticas()
+        return escritos
 
 
 if __name__ == "__main__":
     extractor = SuperheroExtractor()
-    datos = extractor.ejecutar()
 
-    with open("data/superheroes_raw.json", "w") as f:
-        json.dump(datos, f, indent=2)
+    sumideros = {
+        "ndjson": SumideroNDJSON("data/superheroes_raw.ndjson"),
+        "csv": SumideroCSV("data/superheroes.csv", COLUMNAS_CSV)
+    }
+    if os.getenv("PIPELINE_CARGAR_BD", "false").lower() in ("1", "true", "si", "sí"):
+        from scripts.database import init_db
+        from scripts.populate_db import cargar_registros, publicar_carga
+        init_db()
+        sumideros["bd"] = SumideroBD(cargar_registros, al_finalizar=publicar_carga)
+
+    with Pipeline(sumideros, "data/superheroes.checkpoint.json") as pipeline:
+        escritos = extractor.ejecutar(pipeline)
+
+    if not pipeline.publicado:
+        print("\nEXTRACCIÓN INCOMPLETA\n")
+        print(f"{len(pipeline.fallidos)} héroes fallidos se reintentarán en la próxima ejecución: {', '.join(pipeline.fallidos)}")
+        sys.exit(1)
 
-    df = pd.DataFrame(datos)
-    df.to_csv("data/superheroes.csv", index=False)
+    if os.getenv("EXPORTAR_PARQUET", "false").lower() in ("1", "true", "si", "sí"):
+        guardar_parquet(tipar_heroes(pd.read_csv("data/superheroes.csv")), "data/superheroes.parquet")
 
     print("\nEXTRACCIÓN COMPLETADA\n")
-    print(df)
\ No newline at end of file
+    print(f"{escritos} héroes escritos en data/superheroes.csv y data/superheroes_raw.ndjson")
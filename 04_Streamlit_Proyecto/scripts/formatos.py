@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import os
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+POWERSTATS = ['inteligencia', 'fuerza', 'velocidad', 'durabilidad', 'poder', 'combate']
+
+
+def pyarrow_disponible():
+    """True si pyarrow está instalado (dependencia opcional)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def tipar_heroes(df):
+    """Aplica tipos columnares: powerstats int8, editorial categórica y fecha como timestamp"""
+    df = df.copy()
+    df['id_api'] = pd.to_numeric(df['id_api'], errors='coerce').astype('Int32')
+    for stat in POWERSTATS:
+        # SuperheroAPI devuelve "null" como texto cuando falta el valor
+        df[stat] = pd.to_numeric(df[stat], errors='coerce').astype('Int8')
+    df['editorial'] = df['editorial'].astype('category')
+    df['fecha_extraccion'] = pd.to_datetime(df['fecha_extraccion'], errors='coerce')
+    return df
+
+
+def guardar_parquet(df, ruta):
+    """Escribe `df` en Parquet; devuelve False si pyarrow no está instalado"""
+    if not pyarrow_disponible():
+        logger.warning("⚠️ pyarrow no está instalado, se omite la salida Parquet")
+        return False
+    df.to_parquet(ruta, index=False, engine='pyarrow')
+    logger.info(f"📁 Datos guardados en {ruta}")
+    return True
+
+
+def ruta_tabla(base):
+    """Fichero que leería leer_tabla(): `<base>.parquet` si existe y no es más antiguo que el CSV; si no, `<base>.csv`"""
+    ruta_parquet = f"{base}.parquet"
+    ruta_csv = f"{base}.csv"
+
+    if os.path.exists(ruta_parquet) and pyarrow_disponible():
+        if not os.path.exists(ruta_csv) or os.path.getmtime(ruta_parquet) >= os.path.getmtime(ruta_csv):
+            return ruta_parquet
+        logger.info(f"ℹ️ {ruta_parquet} es anterior a {ruta_csv}, se usa el CSV")
+
+    if os.path.exists(ruta_csv):
+        return ruta_csv
+    return None
+
+
+def leer_tabla(base, ruta=None):
+    """Lee la tabla elegida por ruta_tabla() (o la `ruta` ya resuelta); None si no hay ninguna"""
+    ruta = ruta or ruta_tabla(base)
+    if ruta is None:
+        return None
+    if ruta.endswith('.parquet'):
+        return pd.read_parquet(ruta, engine='pyarrow')
+    return pd.read_csv(ruta)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import os
+import time
+import sqlite3
+import threading
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de query que nunca deben formar parte de la clave de caché
+PARAMS_SECRETOS = {'access_key', 'api_key', 'apikey', 'key', 'token'}
+
+
+class CacheHTTP:
+    """Caché persistente de respuestas HTTP en SQLite con TTL, revalidación y desalojo LRU"""
+
+    def __init__(self, ruta=None, ttl=None, max_bytes=None, secretos=()):
+        self.ruta = ruta or os.getenv('HTTP_CACHE_PATH', 'data/http_cache.sqlite')
+        self.ttl = ttl if ttl is not None else float(os.getenv('HTTP_CACHE_TTL', '3600'))
+        self.max_bytes = max_bytes or int(float(os.getenv('HTTP_CACHE_MAX_MB', '50')) * 1024 * 1024)
+        self.secretos = [s for s in secretos if s]
+        self.estadisticas = {'aciertos': 0, 'revalidados': 0, 'fallos': 0}
+
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.ruta, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    contenido BLOB NOT NULL,
+                    content_type TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    guardado REAL NOT NULL,
+                    accedido REAL NOT NULL,
+                    tamano INTEGER NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS ix_respuestas_accedido ON respuestas (accedido)")
+
+    def clave(self, url, params=None):
+        """URL normalizada sin tokens ni API keys, usada como clave de la caché"""
+        for secreto in self.secretos:
+            url = url.replace(secreto, '***')
+
+        partes = urlsplit(url)
+        query = parse_qsl(partes.query) + list((params or {}).items())
+        query = sorted((k, str(v)) for k, v in query if k.lower() not in PARAMS_SECRETOS)
+        return urlunsplit((partes.scheme, partes.netloc, partes.path, urlencode(query), ''))
+
+    def obtener(self, clave):
+        """Entrada guardada para `clave` (fresca o no) o None"""
+        with self.lock, self.conn:
+            fila = self.conn.execute(
+                "SELECT contenido, content_type, etag, last_modified, guardado FROM respuestas WHERE clave = ?",
+                (clave,)
+            ).fetchone()
+            if fila is None:
+                self.estadisticas['fallos'] += 1
+                return None
+            self.conn.execute("UPDATE respuestas SET accedido = ? WHERE clave = ?", (time.time(), clave))
+
+        contenido, content_type, etag, last_modified, guardado = fila
+        return {
+            'contenido': contenido,
+            'content_type': content_type,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresca': time.time() - guardado < self.ttl
+        }
+
+    def guardar(self, clave, response):
+        """Guarda una respuesta 200 y desaloja las entradas menos usadas si se supera el tamaño"""
+        contenido = response.content
+        ahora = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave, contenido, response.headers.get('Content-Type'), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), ahora, ahora, len(contenido))
+            )
+            self._desalojar()
+
+    def refrescar(self, clave):
+        """Marca como fresca una entrada revalidada con 304 Not Modified"""
+        ahora = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE respuestas SET guardado = ?, accedido = ? WHERE clave = ?", (ahora, ahora, clave)
+            )
+        self.estadisticas['revalidados'] += 1
+
+    def descartar(self, clave):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+
+    def _desalojar(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        eliminadas = 0
+        for clave, tamano in self.conn.execute("SELECT clave, tamano FROM respuestas ORDER BY accedido").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+            total -= tamano
+            eliminadas += 1
+        logger.info(f"🧹 Caché HTTP: {eliminadas} entradas desalojadas (LRU)")
+
+    @staticmethod
+    def como_respuesta(entrada, url):
+        """Reconstruye un requests.Response a partir de una entrada de la caché"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = entrada['contenido']
+        response.headers = CaseInsensitiveDict({'Content-Type': entrada['content_type'] or 'application/json'})
+        response.from_cache = True
+        return response
+
+    def close(self):
+        self.conn.close()
+
+
+def cache_desde_env(secretos=(), ttl=None):
+    """Crea la caché HTTP salvo que HTTP_CACHE=false; `ttl` sustituye a HTTP_CACHE_TTL"""
+    if os.getenv('HTTP_CACHE', 'true').lower() in ('0', 'false', 'no'):
+        logger.info("🗄️ Caché HTTP desactivada")
+        return None
+    cache = CacheHTTP(ttl=ttl, secretos=secretos)
+    logger.info(f"🗄️ Caché HTTP en {cache.ruta} (TTL {cache.ttl:g}s, máx. {cache.max_bytes // (1024 * 1024)} MB)")
+    return cache
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import os
+import time
+import random
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Códigos HTTP que indican un fallo transitorio y merecen reintento
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ClienteHTTP:
+    """Sesión HTTP compartida con keep-alive, pool de conexiones y reintentos con backoff"""
+
+    def __init__(self, pool_size=None, max_reintentos=None, backoff_base=None, backoff_max=None,
+                 limitador=None, cache=None):
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', '10'))
+        self.max_reintentos = max_reintentos if max_reintentos is not None else int(os.getenv('HTTP_MAX_REINTENTOS', '3'))
+        self.backoff_base = backoff_base or float(os.getenv('HTTP_BACKOFF_BASE', '0.5'))
+        self.backoff_max = backoff_max or float(os.getenv('HTTP_BACKOFF_MAX', '30'))
+        self.limitador = limitador
+        self.cache = cache
+
+        # Los reintentos se manejan aquí para poder aplicar jitter y Retry-After
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def get(self, url, params=None, cachear=True, **kwargs):
+        """GET servido desde la caché si está fresca; si no, revalida con ETag/Last-Modified"""
+        if not (self.cache and cachear):
+            return self._get_con_reintentos(url, params=params, **kwargs)
+
+        clave = self.cache.clave(url, params)
+        entrada = self.cache.obtener(clave)
+        if entrada and entrada['fresca']:
+            self.cache.estadisticas['aciertos'] += 1
+            return self.cache.como_respuesta(entrada, url)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entrada and entrada['etag']:
+            headers['If-None-Match'] = entrada['etag']
+        if entrada and entrada['last_modified']:
+            headers['If-Modified-Since'] = entrada['last_modified']
+
+        response = self._get_con_reintentos(url, params=params, headers=headers, **kwargs)
+        if response.status_code == 304 and entrada:
+            self.cache.refrescar(clave)
+            return self.cache.como_respuesta(entrada, url)
+        if response.status_code == 200:
+            self.cache.guardar(clave, response)
+        return response
+
+    def descartar_cache(self, url, params=None):
+        """Elimina de la caché una respuesta que resultó ser un error de la API"""
+        if self.cache:
+            self.cache.descartar(self.cache.clave(url, params))
+
+    def _get_con_reintentos(self, url, **kwargs):
+        """GET con reintentos ante errores de red y respuestas 429/5xx"""
+        for intento in range(self.max_reintentos + 1):
+            ultimo_intento = intento == self.max_reintentos
+            if self.limitador:
+                self.limitador.adquirir()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if ultimo_intento:
+                    raise
+                espera = self._backoff(intento)
+                logger.warning(f"⚠️ Error de red ({e.__class__.__name__}), reintento {intento + 1} en {espera:.1f}s")
+            else:
+                if response.status_code not in ESTADOS_REINTENTABLES or ultimo_intento:
+                    return response
+                espera = self._retry_after(response)
+                if espera is None:
+                    espera = self._backoff(intento)
+                if response.status_code == 429 and self.limitador:
+                    # El proveedor nos está limitando: frenar a todos los hilos, no solo a este
+                    self.limitador.penalizar(espera)
+                logger.warning(f"⚠️ HTTP {response.status_code}, reintento {intento + 1} en {espera:.1f}s")
+                response.close()
+
+            time.sleep(espera)
+
+    def _backoff(self, intento):
+        """Backoff exponencial con jitter completo"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** intento)))
+
+    def _retry_after(self, response):
+        """Segundos indicados por la cabecera Retry-After (limitados a backoff_max)"""
+        valor = response.headers.get('Retry-After')
+        if not valor:
+            return None
+        try:
+            segundos = float(valor)
+        except ValueError:
+            try:
+                fecha = parsedate_to_datetime(valor)
+            except (TypeError, ValueError):
+                return None
+            segundos = (fecha - datetime.now(timezone.utc)).total_seconds()
+        return min(max(segundos, 0.0), self.backoff_max)
+
+    def estadisticas_conexiones(self):
+        """Conexiones TCP nuevas frente a reutilizadas en los pools de urllib3"""
+        pools = self.adapter.poolmanager.pools
+        nuevas = 0
+        peticiones = 0
+        for clave in list(pools.keys()):
+            pool = pools.get(clave)
+            if pool is None:
+                continue
+            nuevas += pool.num_connections
+            peticiones += pool.num_requests
+        return {
+            'peticiones': peticiones,
+            'nuevas': nuevas,
+            'reutilizadas': max(peticiones - nuevas, 0)
+        }
+
+    def registrar_estadisticas(self):
+        """Escribe en el log el resumen de reutilización de conexiones"""
+        stats = self.estadisticas_conexiones()
+        logger.info(
+            f"🔌 Conexiones HTTP: {stats['peticiones']} peticiones, "
+            f"{stats['nuevas']} nuevas, {stats['reutilizadas']} reutilizadas"
+        )
+        if self.cache:
+            cache = self.cache.estadisticas
+            logger.info(
+                f"🗄️ Caché HTTP: {cache['aciertos']} aciertos, "
+                f"{cache['revalidados']} revalidados (304), {cache['fallos']} fallos"
+            )
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import os
+import hashlib
+import logging
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+
+from scripts.models import ManifiestoArchivo, ManifiestoRegistro
+
+logger = logging.getLogger(__name__)
+
+# POPULATE_FORZAR=true recarga aunque el fichero coincida con la última carga
+FORZAR_CARGA = os.getenv('POPULATE_FORZAR', 'false').lower() in ('1', 'true', 'si', 'sí')
+
+# Bytes leídos por iteración al calcular el hash de un fichero
+TAMANO_BLOQUE_HASH = 1024 * 1024
+
+
+def hash_archivo(*rutas):
+    """sha256 del contenido de los ficheros indicados que existan (None si no existe ninguno)
+
+    Se lee en bloques, así que el coste es proporcional al tamaño y no a la memoria disponible.
+    """
+    huella = hashlib.sha256()
+    encontrado = False
+    for ruta in rutas:
+        if not ruta or not os.path.exists(ruta):
+            continue
+        encontrado = True
+        # El nombre separa los ficheros: mover contenido de uno a otro cambia la huella
+        huella.update(os.path.basename(ruta).encode('utf-8') + b'\0')
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+                huella.update(bloque)
+    return huella.hexdigest() if encontrado else None
+
+
+def archivo_registrado(conn, origen):
+    """(hash, registros) de la última carga de `origen` o None si nunca se cargó"""
+    return conn.execute(
+        select(ManifiestoArchivo.hash, ManifiestoArchivo.registros).where(ManifiestoArchivo.origen == origen)
+    ).one_or_none()
+
+
+def registrar_archivo(conn, origen, huella, registros):
+    """Guarda la huella del fichero cargado; va en la misma transacción que los datos"""
+    stmt = insert(ManifiestoArchivo).values(
+        origen=origen, hash=huella, registros=int(registros), fecha_carga=datetime.now()
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[ManifiestoArchivo.origen],
+        set_={'hash': stmt.excluded.hash, 'registros': stmt.excluded.registros, 'fecha_carga': stmt.excluded.fecha_carga}
+    ))
+
+
+def hash_filas(df):
+    """Hash de 64 bits del contenido de cada fila (int64, indexado como `df`)
+
+    Cada columna se pasa a texto según su tipo (un Int8 38 es '38' haya o no nulos en la
+    columna), así que el hash de un héroe no depende de qué otras filas se cargan con él.
+    """
+    hashes = pd.util.hash_pandas_object(df.astype('string'), index=False)
+    # BIGINT de PostgreSQL es con signo: se reinterpretan los mismos 64 bits
+    return pd.Series(hashes.to_numpy().view('int64'), index=df.index)
+
+
+def hashes_registrados(conn, origen):
+    """{clave: hash} de los registros cargados de `origen`"""
+    return dict(conn.execute(
+        select(ManifiestoRegistro.clave, ManifiestoRegistro.hash).where(ManifiestoRegistro.origen == origen)
+    ).all())
+
+
+def registrar_hashes(conn, origen, hashes):
+    """Inserta o actualiza el hash de los registros escritos (`hashes` es una Series clave → hash)"""
+    if hashes.empty:
+        return
+    fecha = datetime.now()
+    filas = [
+        {'origen': origen, 'clave': int(clave), 'hash': int(huella), 'fecha_carga': fecha}
+        for clave, huella in hashes.items()
+    ]
+    stmt = insert(ManifiestoRegistro)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ManifiestoRegistro.origen, ManifiestoRegistro.clave],
+            set_={'hash': stmt.excluded.hash, 'fecha_carga': stmt.excluded.fecha_carga}
+        ),
+        filas
+    )
+
+
+def olvidar_registros(conn, origen, claves):
+    """Borra del manifiesto los registros que ya no están en el fichero"""
+    if claves:
+        conn.execute(delete(ManifiestoRegistro).where(
+            ManifiestoRegistro.origen == origen, ManifiestoRegistro.clave.in_([int(c) for c in claves])
+        ))
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Text, JSON, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
 
 Base = declarative_base()
@@ -18,6 +19,9 @@ class Heroe(Base):
     raza = Column(String(100))
     altura = Column(String(50))
     peso = Column(String(50))
+    # Altura y peso numéricos, para filtrar y agregar en PostgreSQL
+    altura_cm = Column(Float, index=True)
+    peso_kg = Column(Float, index=True)
     color_ojos = Column(String(50))
     color_pelo = Column(String(50))
     lugar_nacimiento = Column(Text)
@@ -42,12 +46,18 @@ class Heroe(Base):
     # Metadatos
     fecha_creacion = Column(DateTime, default=datetime.now)
     fecha_actualizacion = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # False cuando el héroe deja de venir en el CSV (borrado lógico; se reactiva si vuelve)
+    activo = Column(Boolean, default=True, nullable=False, server_default='true')
+    
+    # Texto completo de nombre, biografía, ocupación y afiliaciones (scripts/busqueda.py)
+    busqueda = Column(TSVECTOR)
     
     # Relaciones
     apariciones = relationship("Aparicion", back_populates="heroe", cascade="all, delete-orphan")
     trabajos = relationship("Trabajo", back_populates="heroe", cascade="all, delete-orphan")
     conexiones = relationship("Conexion", back_populates="heroe", cascade="all, delete-orphan")
     metricas_historial = relationship("MetricasHeroe", back_populates="heroe")
+    grupos = relationship("HeroeGrupo", back_populates="heroe", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Heroe(nombre='{self.nombre}', editorial='{self.editorial}')>"
@@ -91,6 +101,34 @@ class Conexion(Base):
     def __repr__(self):
         return f"<Conexion(heroe_id={self.heroe_id})>"
 
+class Grupo(Base):
+    """Equipo o afiliación normalizada a partir de Conexion.grupo_afiliacion"""
+    __tablename__ = 'grupos'
+    
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(300), nullable=False)
+    clave = Column(String(300), nullable=False, unique=True)  # nombre normalizado (minúsculas, sin espacios extra)
+    
+    miembros = relationship("HeroeGrupo", back_populates="grupo")
+    
+    def __repr__(self):
+        return f"<Grupo(nombre='{self.nombre}')>"
+
+class HeroeGrupo(Base):
+    """Arista héroe-grupo; la PK sirve de índice por héroe y ix_heroe_grupo_grupo por grupo"""
+    __tablename__ = 'heroe_grupo'
+    
+    heroe_id = Column(Integer, ForeignKey('heroes.id'), primary_key=True)
+    grupo_id = Column(Integer, ForeignKey('grupos.id'), primary_key=True)
+    anterior = Column(Boolean, default=False, nullable=False)  # "(formerly)" en la API
+    
+    heroe = relationship("Heroe", back_populates="grupos")
+    grupo = relationship("Grupo", back_populates="miembros")
+    
+    __table_args__ = (
+        Index('ix_heroe_grupo_grupo', grupo_id, heroe_id),
+    )
+
 class MetricasHeroe(Base):
     __tablename__ = 'metricas_heroes'
     
@@ -112,4 +150,22 @@ class MetricasETL(Base):
     registros_fallidos = Column(Integer, default=0)
     tiempo_ejecucion_segundos = Column(Float, default=0.0)
     estado = Column(String(50))  # 'exitoso', 'fallido'
-    error_message = Column(Text, nullable=True)
\ No newline at end of file
+    error_message = Column(Text, nullable=True)
+
+class ManifiestoArchivo(Base):
+    """Huella del último fichero cargado por populate_db.py en cada origen"""
+    __tablename__ = 'manifiesto_archivos'
+    
+    origen = Column(String(100), primary_key=True)  # 'clima', 'superheroes'
+    hash = Column(String(64), nullable=False)  # sha256 del contenido
+    registros = Column(Integer, nullable=False)
+    fecha_carga = Column(DateTime, default=datetime.now, nullable=False)
+
+class ManifiestoRegistro(Base):
+    """Hash de cada registro cargado, para escribir solo los que cambian entre cargas"""
+    __tablename__ = 'manifiesto_registros'
+    
+    origen = Column(String(100), primary_key=True)
+    clave = Column(Integer, primary_key=True)  # heroe_id_api
+    hash = Column(BigInteger, nullable=False)  # pd.util.hash_pandas_object de la fila
+    fecha_carga = Column(DateTime, default=datetime.now, nullable=False)
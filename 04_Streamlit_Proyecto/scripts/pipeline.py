@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+import os
+import csv
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Registros entre dos checkpoints; es lo máximo que se repite al reanudar tras un fallo
+CHECKPOINT_CADA = int(os.getenv('PIPELINE_CHECKPOINT_CADA', '50'))
+
+# Ejecuciones que se reintentan los registros fallidos antes de publicar los ficheros sin ellos
+REINTENTOS = int(os.getenv('PIPELINE_REINTENTOS', '3'))
+
+
+def mapear_acotado(funcion, items, workers, ventana=None):
+    """Como executor.map pero con a lo sumo `ventana` tareas en vuelo; resultados en orden
+
+    executor.map encola todas las tareas de golpe y retiene sus resultados hasta consumirlos;
+    aquí la memoria queda acotada por la ventana aunque el catálogo crezca.
+    """
+    if workers <= 1:
+        yield from map(funcion, items)
+        return
+
+    ventana = max(ventana or workers * 2, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        en_vuelo = deque()
+        try:
+            for item in items:
+                if len(en_vuelo) >= ventana:
+                    yield en_vuelo.popleft().result()
+                en_vuelo.append(executor.submit(funcion, item))
+            while en_vuelo:
+                yield en_vuelo.popleft().result()
+        finally:
+            # Si el consumidor se detiene, no se lanzan las peticiones que aún no empezaron
+            for futuro in en_vuelo:
+                futuro.cancel()
+
+
+def leer_registros(ruta):
+    """Itera los registros de un NDJSON (o de un JSON con una lista, formato anterior)"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        inicio = f.read(1)
+        while inicio.isspace():
+            inicio = f.read(1)
+        f.seek(0)
+        if inicio == '[':
+            yield from json.load(f)
+            return
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+class SumideroArchivo:
+    """Base de los sumideros a fichero: escriben en `<ruta>.parcial` y lo renombran al terminar"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parcial = f"{ruta}.parcial"
+        self.archivo = None
+
+    def puede_reanudar(self, posicion):
+        return os.path.exists(self.parcial) and os.path.getsize(self.parcial) >= posicion
+
+    def abrir(self, posicion=None):
+        """Empieza de cero o descarta lo escrito después del último checkpoint"""
+        directorio = os.path.dirname(self.parcial)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        if posicion is None:
+            self.archivo = open(self.parcial, 'w', encoding='utf-8', newline='')
+        else:
+            os.truncate(self.parcial, posicion)
+            self.archivo = open(self.parcial, 'a', encoding='utf-8', newline='')
+
+    def confirmar(self):
+        """Lleva lo escrito a disco y devuelve la posición a guardar en el checkpoint"""
+        self.archivo.flush()
+        os.fsync(self.archivo.fileno())
+        return os.path.getsize(self.parcial)
+
+    def finalizar(self):
+        self.cerrar()
+        os.replace(self.parcial, self.ruta)
+        logger.info(f"📁 Datos guardados en {self.ruta}")
+
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+
+class SumideroNDJSON(SumideroArchivo):
+    """Un objeto JSON por línea"""
+
+    def escribir(self, registro):
+        self.archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+class SumideroCSV(SumideroArchivo):
+    """CSV con las `columnas` indicadas (las claves extra del registro se ignoran)"""
+
+    def __init__(self, ruta, columnas):
+        super().__init__(ruta)
+        self.columnas = list(columnas)
+        self.escritor = None
+
+    def abrir(self, posicion=None):
+        super().abrir(posicion)
+        self.escritor = csv.DictWriter(self.archivo, self.columnas, extrasaction='ignore')
+        if posicion is None:
+            self.escritor.writeheader()
+
+    def escribir(self, registro):
+        self.escritor.writerow(registro)
+
+
+class SumideroBD:
+    """Acumula los registros y los entrega a `cargar_lote` en cada checkpoint
+
+    `cargar_lote` debe ser idempotente: si el proceso cae entre la carga y el checkpoint,
+    al reanudar se vuelve a entregar ese lote.
+    """
+
+    def __init__(self, cargar_lote, al_finalizar=None):
+        self.cargar_lote = cargar_lote
+        self.al_finalizar = al_finalizar
+        self.lote = []
+        self.cargados = 0
+
+    def puede_reanudar(self, posicion):
+        return True
+
+    def abrir(self, posicion=None):
+        self.lote = []
+        self.cargados = posicion or 0
+
+    def escribir(self, registro):
+        self.lote.append(registro)
+
+    def confirmar(self):
+        if self.lote:
+            self.cargar_lote(self.lote)
+            self.cargados += len(self.lote)
+            self.lote = []
+        return self.cargados
+
+    def finalizar(self):
+        if self.al_finalizar:
+            self.al_finalizar()
+        logger.info(f"🗄️ {self.cargados} registros cargados en BD")
+
+    def cerrar(self):
+        self.lote = []
+
+
+class Pipeline:
+    """Extracción → transformación → sumideros en streaming con checkpoints periódicos
+
+    Cada `cada` registros se confirman los sumideros y se guarda en `ruta_checkpoint` qué
+    claves están completas y hasta dónde llega cada fichero. Si la ejecución se interrumpe,
+    la siguiente recorta los ficheros a ese punto y solo procesa las claves pendientes.
+
+    Si algún registro falla, los ficheros no se publican y el checkpoint se conserva: la
+    siguiente ejecución solo reintenta las claves fallidas. Tras `reintentos` ejecuciones con
+    fallos se publican sin ellas; las claves quedan en `fallidos`.
+    """
+
+    def __init__(self, sumideros, ruta_checkpoint, cada=None, reintentos=None):
+        self.sumideros = sumideros
+        self.ruta_checkpoint = ruta_checkpoint
+        self.cada = cada or CHECKPOINT_CADA
+        self.reintentos = reintentos or REINTENTOS
+        self.completados = set()
+        self.fallidos = []
+        self.intentos = 0
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc):
+        for sumidero in self.sumideros.values():
+            sumidero.cerrar()
+
+    def _leer_checkpoint(self):
+        if not os.path.exists(self.ruta_checkpoint):
+            return None
+        try:
+            with open(self.ruta_checkpoint, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Checkpoint {self.ruta_checkpoint} ilegible, se empieza de cero: {e}")
+            return None
+
+        posiciones = estado.get('posiciones', {})
+        if set(posiciones) != set(self.sumideros) or not all(
+            sumidero.puede_reanudar(posiciones[nombre]) for nombre, sumidero in self.sumideros.items()
+        ):
+            logger.warning(f"⚠️ El checkpoint {self.ruta_checkpoint} no coincide con los ficheros parciales, se empieza de cero")
+            return None
+        return estado
+
+    def abrir(self):
+        estado = self._leer_checkpoint()
+        posiciones = {}
+        if estado:
+            self.completados = set(estado['completados'])
+            posiciones = estado['posiciones']
+            self.intentos = estado.get('intentos', 0)
+            logger.info(
+                f"⏯️ Reanudando desde el checkpoint del {estado.get('actualizado')}: "
+                f"{len(self.completados)} registros ya procesados"
+            )
+            if estado.get('fallidos'):
+                logger.info(f"🔁 Reintento {self.intentos + 1}/{self.reintentos} de {len(estado['fallidos'])} registros fallidos")
+        for nombre, sumidero in self.sumideros.items():
+            sumidero.abrir(posiciones.get(nombre))
+
+    def pendientes(self, claves):
+        """Claves que no quedaron completas en el checkpoint"""
+        return [clave for clave in claves if str(clave) not in self.completados]
+
+    def _guardar_checkpoint(self, posiciones):
+        temporal = f"{self.ruta_checkpoint}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                'actualizado': datetime.now().isoformat(),
+                'completados': sorted(self.completados),
+                'posiciones': posiciones,
+                'fallidos': self.fallidos,
+                'intentos': self.intentos
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_checkpoint)
+
+    def confirmar(self, claves):
+        posiciones = {nombre: sumidero.confirmar() for nombre, sumidero in self.sumideros.items()}
+        self.completados.update(claves)
+        self._guardar_checkpoint(posiciones)
+
+    def ejecutar(self, registros):
+        """Consume pares (clave, registro) y devuelve cuántos registros se escribieron
+
+        Un registro None (extracción fallida) no se marca como completo y queda en `fallidos`;
+        mientras queden reintentos los ficheros no se publican y se reintenta al reanudar.
+        """
+        escritos = 0
+        lote = []
+        self.fallidos = []
+        for clave, registro in registros:
+            if registro is None:
+                self.fallidos.append(str(clave))
+                continue
+            for sumidero in self.sumideros.values():
+                sumidero.escribir(registro)
+            lote.append(str(clave))
+            escritos += 1
+            if len(lote) >= self.cada:
+                self.confirmar(lote)
+                lote = []
+                logger.info(f"💾 Checkpoint: {len(self.completados)} registros confirmados")
+
+        if self.fallidos:
+            self.intentos += 1
+        self.confirmar(lote)
+        if self.fallidos and self.intentos < self.reintentos:
+            logger.warning(
+                f"⚠️ {len(self.fallidos)} registros fallidos ({', '.join(self.fallidos)}): los ficheros "
+                f"no se publican y se reintentarán en la próxima ejecución ({self.intentos}/{self.reintentos})"
+            )
+            return escritos
+
+        if self.fallidos:
+            logger.error(
+                f"❌ {len(self.fallidos)} registros siguen fallando tras {self.intentos} ejecuciones, "
+                f"se publican los ficheros sin ellos: {', '.join(self.fallidos)}"
+            )
+        for sumidero in self.sumideros.values():
+            sumidero.finalizar()
+        os.remove(self.ruta_checkpoint)
+        return escritos
+
+    @property
+    def publicado(self):
+        """True si la última ejecución publicó los ficheros (no queda nada por reintentar)"""
+        return not os.path.exists(self.ruta_checkpoint)
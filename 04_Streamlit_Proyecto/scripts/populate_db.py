@@ -3,41 +3,276 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import numpy as np
 import pandas as pd
-import json
-import math
 from datetime import datetime
-from scripts.database import SessionLocal, init_db
-from scripts.models import Heroe, Aparicion, Trabajo, Conexion, MetricasHeroe
+from sqlalchemy import select, delete, update, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from scripts.database import SessionLocal, get_engine, init_db, marcar_datos_actualizados
+from scripts.models import Heroe, Trabajo, Conexion, MetricasHeroe
+from scripts.formatos import leer_tabla, ruta_tabla
+from scripts.vistas import refrescar_vistas
+from scripts.busqueda import actualizar_busqueda
+from scripts.afiliaciones import guardar_afiliaciones
+from scripts.pipeline import leer_registros
+from scripts.archivo_raw import ArchivoRaw
+from scripts.transformacion import POWERSTATS, transformar_lote, a_registros
+from scripts.manifiesto import (
+    FORZAR_CARGA, hash_archivo, archivo_registrado, registrar_archivo,
+    hash_filas, hashes_registrados, registrar_hashes, olvidar_registros
+)
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def clean_value(value):
-    """Convierte valores nan a None para que PostgreSQL los maneje como NULL"""
-    if isinstance(value, float) and math.isnan(value):
-        return None
-    return value
+# Tamaño de lote para los INSERT ... ON CONFLICT de héroes
+TAMANO_LOTE = int(os.getenv('POPULATE_BATCH_SIZE', '500'))
+
+# Datos raw del extractor (NDJSON) y el JSON del formato anterior
+RUTAS_RAW = ['data/superheroes_raw.ndjson', 'data/superheroes_raw.json']
+
+# Columnas de Heroe que provienen del CSV/raw (sin id ni metadatos)
+COLUMNAS_HEROE = [
+    'heroe_id_api', 'nombre', 'nombre_real', 'editorial', 'genero', 'raza',
+    'altura', 'peso', 'altura_cm', 'peso_kg',
+    'color_ojos', 'color_pelo', 'lugar_nacimiento', 'primera_aparicion', 'alineacion',
+    *POWERSTATS,
+    'imagen_url', 'imagen_xs', 'imagen_sm', 'imagen_md', 'imagen_lg'
+]
+
+# Todo lo que se escribe de cada héroe (fila de heroes, trabajo y conexiones) entra en su hash
+COLUMNAS_HASH = COLUMNAS_HEROE + ['ocupacion', 'base', 'grupo_afiliacion', 'familiares']
+
+# Origen de los héroes en las tablas de manifiesto
+ORIGEN = 'superheroes'
+
+def catalogo_configurado():
+    """heroe_id_api de HEROES (los que extractor.py intenta extraer en cada ejecución)"""
+    return [int(hero_id) for hero_id in os.getenv('HEROES', '').split(',') if hero_id.strip().isdigit()]
+
+def chunks(items, tamano):
+    """Divide una lista en lotes de `tamano` elementos"""
+    for i in range(0, len(items), tamano):
+        yield items[i:i + tamano]
+
+def numeros(serie, tipo='Int8'):
+    """Convierte una columna a entero nullable; "null", vacíos y texto no numérico pasan a NA"""
+    return pd.to_numeric(serie, errors='coerce').astype('Float64').round().astype(tipo)
+
+def preparar_heroes(df, payloads):
+    """DataFrame con las columnas de Heroe, trabajo y conexiones de cada fila del CSV
+
+    Nombre, editorial y powerstats salen del CSV (o del payload si faltan); el resto, del
+    payload de esa misma fila transformado en lote.
+    """
+    heroes = transformar_lote(payloads)
+    heroes['heroe_id_api'] = df['heroe_id_api'].to_numpy()
+    for columna in ('nombre', 'editorial'):
+        if columna in df:
+            csv = df[columna].astype(object).mask(df[columna].eq('null'))
+            heroes[columna] = csv.fillna(heroes[columna]).to_numpy()
+    for stat in POWERSTATS:
+        if stat in df:
+            # .array conserva Int8 (to_numpy pasaría a float64 si el lote tiene algún nulo)
+            heroes[stat] = numeros(df[stat]).fillna(heroes[stat]).array
+    return heroes
+
+def calcular_metricas(heroes):
+    """Poder total y promedio de cada héroe a partir de sus powerstats no nulos"""
+    stats = heroes[POWERSTATS].astype('Float64')
+    return pd.DataFrame({
+        'heroe_id_api': heroes['heroe_id_api'],
+        'poder_total': stats.sum(axis=1).astype('Int64'),
+        'poder_promedio': stats.mean(axis=1).fillna(0)
+    })
+
+def upsert_heroes(db, heroes):
+    """INSERT ... ON CONFLICT (heroe_id_api) DO UPDATE por lotes; devuelve {heroe_id_api: id}"""
+    ids = {}
+    for lote in chunks(heroes, TAMANO_LOTE):
+        stmt = insert(Heroe).values(lote)
+        columnas_actualizables = {
+            columna: stmt.excluded[columna]
+            for columna in COLUMNAS_HEROE
+            if columna != 'heroe_id_api'
+        }
+        columnas_actualizables['fecha_actualizacion'] = datetime.now()
+        # Un héroe dado de baja que vuelve a aparecer se reactiva
+        columnas_actualizables['activo'] = True
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Heroe.heroe_id_api],
+            set_=columnas_actualizables
+        ).returning(Heroe.id, Heroe.heroe_id_api)
+        
+        for heroe_id, heroe_id_api in db.execute(stmt):
+            ids[heroe_id_api] = heroe_id
+    return ids
+
+def filtrar_cambiados(conn, heroes, forzar=False):
+    """Héroes (de preparar_heroes) cuyo hash no coincide con el del manifiesto y sus hashes por heroe_id_api"""
+    hashes = pd.Series(hash_filas(heroes[COLUMNAS_HASH]).to_numpy(), index=heroes['heroe_id_api'].to_numpy())
+    previos = {} if forzar else hashes_registrados(conn, ORIGEN)
+    cambia = np.fromiter(
+        (previos.get(clave) != huella for clave, huella in hashes.items()),
+        dtype=bool, count=len(hashes)
+    )
+    return heroes[cambia], hashes[cambia]
+
+def escribir_heroes(conn, heroes):
+    """Escribe los héroes completos: fila de heroes, trabajo, conexiones, métricas, afiliaciones y búsqueda
+
+    Trabajo y conexiones de esos héroes se reemplazan con inserciones masivas; las métricas se
+    añaden al historial (una fila por cada carga que cambia al héroe). Devuelve {heroe_id_api: id}.
+    """
+    ids = upsert_heroes(conn, a_registros(heroes[COLUMNAS_HEROE]))
+    heroe_ids = list(ids.values())
+    
+    for modelo in (Trabajo, Conexion):
+        conn.execute(delete(modelo).where(modelo.heroe_id.in_(heroe_ids)))
+    
+    trabajos = heroes.loc[heroes[['ocupacion', 'base']].notna().any(axis=1), ['heroe_id_api', 'ocupacion', 'base']]
+    conexiones = heroes.loc[
+        heroes[['grupo_afiliacion', 'familiares']].notna().any(axis=1),
+        ['heroe_id_api', 'grupo_afiliacion', 'familiares']
+    ]
+    # heroe_id_api → id de la tabla heroes para las filas hijas
+    for filas in (trabajos, conexiones):
+        filas.insert(0, 'heroe_id', filas.pop('heroe_id_api').map(ids))
+    if not trabajos.empty:
+        conn.execute(insert(Trabajo), a_registros(trabajos))
+    if not conexiones.empty:
+        conn.execute(insert(Conexion), a_registros(conexiones))
+    
+    metricas = calcular_metricas(heroes)
+    metricas.insert(0, 'heroe_id', metricas.pop('heroe_id_api').map(ids))
+    metricas['fecha_registro'] = datetime.now()
+    conn.execute(insert(MetricasHeroe), a_registros(metricas))
+    
+    # Grafo de afiliaciones: grupos normalizados y aristas héroe-grupo
+    guardar_afiliaciones(conn, dict(zip(
+        heroes['heroe_id_api'].map(ids), heroes['grupo_afiliacion'].astype(object)
+    )))
+    
+    # El tsvector incluye ocupación y afiliaciones, así que va después de las filas hijas
+    actualizar_busqueda(conn, heroe_ids)
+    return ids
+
+def actualizar_parciales(conn, heroes):
+    """Upsert de nombre, editorial y powerstats para héroes sin payload archivado
+
+    Solo toca las filas en las que algo cambia (o que estaban inactivas), así que no pisa la
+    biografía ni mueve fecha_actualizacion sin motivo. Los que cambian ya no corresponden a su
+    hash completo, así que se quitan del manifiesto y la siguiente carga del CSV los reescribe.
+    """
+    if heroes.empty:
+        return 0
+    columnas = ['nombre', 'editorial', *POWERSTATS]
+    stmt = insert(Heroe).values(a_registros(heroes[['heroe_id_api', *columnas]]))
+    actualizables = {columna: stmt.excluded[columna] for columna in columnas}
+    actualizables['fecha_actualizacion'] = datetime.now()
+    actualizables['activo'] = True
+    cambia = or_(~Heroe.activo, *[getattr(Heroe, columna).is_distinct_from(stmt.excluded[columna]) for columna in columnas])
+    escritos = conn.execute(
+        stmt.on_conflict_do_update(index_elements=[Heroe.heroe_id_api], set_=actualizables, where=cambia)
+        .returning(Heroe.id, Heroe.heroe_id_api)
+    ).all()
+    actualizar_busqueda(conn, [heroe_id for heroe_id, _ in escritos])
+    olvidar_registros(conn, ORIGEN, [heroe_id_api for _, heroe_id_api in escritos])
+    return len(escritos)
+
+def cargar_registros(registros):
+    """Sumidero BD del extractor: escribe los héroes del lote que cambiaron
+
+    Con el payload que extraer_heroe() acaba de archivar se construye la misma fila que
+    cargaría populate_from_csv() y se compara con el mismo manifiesto: los héroes sin cambios
+    no se tocan, los dados de baja se reactivan y la siguiente carga del CSV no los reescribe.
+    Es idempotente.
+    """
+    lote = pd.DataFrame(list(registros)).reindex(columns=['id_api', 'nombre', 'editorial', *POWERSTATS])
+    lote['heroe_id_api'] = numeros(lote.pop('id_api'), 'Int32')
+    lote = lote[lote['heroe_id_api'] > 0].drop_duplicates('heroe_id_api', keep='last').reset_index(drop=True)
+    if lote.empty:
+        return 0
+    lote['heroe_id_api'] = lote['heroe_id_api'].astype(int)
+    
+    archivo = ArchivoRaw()
+    payloads = [archivo.leer(heroe_id_api) for heroe_id_api in lote['heroe_id_api']]
+    archivo.cerrar()
+    archivados = np.array([payload is not None for payload in payloads], dtype=bool)
+    heroes = preparar_heroes(lote, [payload or {} for payload in payloads])
+    
+    with get_engine().begin() as conn:
+        escritos = actualizar_parciales(conn, heroes[~archivados])
+        cambiados, hashes = filtrar_cambiados(conn, heroes[archivados])
+        if not cambiados.empty:
+            escribir_heroes(conn, cambiados)
+            registrar_hashes(conn, ORIGEN, hashes)
+    return escritos + len(cambiados)
+
+def carga_vigente(huella):
+    """True si la última carga fue de estos mismos ficheros y la tabla conserva sus héroes"""
+    with get_engine().connect() as conn:
+        registrado = archivo_registrado(conn, ORIGEN)
+        if registrado is None or registrado.hash != huella:
+            return False
+        activos = conn.execute(select(func.count()).select_from(Heroe).where(Heroe.activo)).scalar()
+    return activos == registrado.registros
+
+def dar_de_baja(db, bajas):
+    """Borrado lógico de los héroes que ya no vienen en el CSV ni en HEROES
+
+    Se conservan su fila y su historial de métricas; se quitan del grafo de afiliaciones y del
+    manifiesto, así que si vuelven a aparecer se escriben y reactivan como nuevos.
+    """
+    if not bajas:
+        return 0
+    heroe_ids = [heroe_id for heroe_id, _ in bajas]
+    db.execute(
+        update(Heroe).where(Heroe.id.in_(heroe_ids))
+        .values(activo=False, fecha_actualizacion=datetime.now())
+    )
+    guardar_afiliaciones(db.connection(), {heroe_id: None for heroe_id in heroe_ids})
+    olvidar_registros(db.connection(), ORIGEN, [heroe_id_api for _, heroe_id_api in bajas])
+    return len(bajas)
+
+def publicar_carga():
+    """Refresca las vistas y avisa a los dashboards de que hay datos nuevos"""
+    refrescar_vistas(get_engine())
+    marcar_datos_actualizados()
 
 def populate_from_csv():
-    """Poblar la base de datos desde el archivo superheroes.csv"""
+    """Poblar la base de datos desde el archivo superheroes.csv
+
+    Solo escribe lo que cambió desde la última carga: si los ficheros son idénticos no se toca
+    la base de datos y, si no, se insertan o actualizan los héroes cuyo hash difiere y se dan
+    de baja los que desaparecieron del CSV y de HEROES. Un CSV sin héroes no modifica nada.
+    POPULATE_FORZAR=true reescribe todos los héroes.
+    """
     
-    # Verificar que existe el archivo
-    if not os.path.exists('data/superheroes.csv'):
+    # Fichero a leer (Parquet tipado si existe, si no el CSV)
+    ruta_tabla_heroes = ruta_tabla('data/superheroes')
+    if ruta_tabla_heroes is None:
         logger.error("❌ No se encuentra data/superheroes.csv. Ejecuta primero extractor.py")
         return False
+    ruta_raw = next((ruta for ruta in RUTAS_RAW if os.path.exists(ruta)), None)
+    archivo = ArchivoRaw()
+    
+    # Huella de todo lo que se lee; el índice del archivo raw cambia con cada payload nuevo
+    huella = hash_archivo(ruta_tabla_heroes, ruta_raw, archivo.ruta_indice)
+    if not FORZAR_CARGA and carga_vigente(huella):
+        logger.info(f"⏭️ {ruta_tabla_heroes} no ha cambiado desde la última carga, nada que escribir")
+        return True
     
-    # Leer datos del CSV
-    df = pd.read_csv('data/superheroes.csv')
+    df = leer_tabla('data/superheroes', ruta_tabla_heroes)
     logger.info(f"📊 Datos leídos: {len(df)} registros")
+    if df.empty:
+        # Es lo que deja una extracción en la que fallan todos los héroes: no se da de baja el catálogo
+        logger.warning(f"⚠️ {ruta_tabla_heroes} no tiene héroes, no se modifica la base de datos")
+        return True
     
     # Leer datos raw para información adicional y IDs
-    raw_data = []
-    if os.path.exists('data/superheroes_raw.json'):
-        with open('data/superheroes_raw.json', 'r') as f:
-            raw_data = json.load(f)
-        logger.info(f"📁 Datos raw cargados: {len(raw_data)} registros")
+    raw_data = leer_registros(ruta_raw) if ruta_raw else []
     
     # Crear diccionario de datos raw por nombre
     raw_dict = {}
@@ -45,138 +280,76 @@ def populate_from_csv():
     for item in raw_data:
         if 'nombre' in item:
             raw_dict[item['nombre']] = item
-            if 'id' in item:
-                id_dict[item['nombre']] = int(item['id'])
+            id_raw = item.get('id_api', item.get('id'))
+            if id_raw is not None:
+                id_dict[item['nombre']] = int(id_raw)
+    if ruta_raw:
+        logger.info(f"📁 Datos raw cargados: {len(raw_dict)} registros ({ruta_raw})")
+    
+    # Obtener ID de la API desde el CSV o, en su defecto, desde los datos raw
+    df = df.reset_index(drop=True)
+    ids_api = numeros(df['id_api'], 'Int32') if 'id_api' in df else pd.Series(pd.NA, index=df.index, dtype='Int32')
+    ids_api = ids_api.where(ids_api > 0).fillna(df['nombre'].map(id_dict)).astype('Int32')
+    sin_id = ids_api.isna()
+    if sin_id.any():
+        ids_api[sin_id] = -np.arange(1, sin_id.sum() + 1)
+        for nombre_heroe, temporal in zip(df.loc[sin_id, 'nombre'], ids_api[sin_id]):
+            logger.warning(f"⚠️ No se encontró ID para {nombre_heroe}, usando ID temporal: {temporal}")
+    df['heroe_id_api'] = ids_api.astype(int)
+    # Un registro por heroe_id_api (el último si se repite)
+    df = df.drop_duplicates('heroe_id_api', keep='last').reset_index(drop=True)
+    
+    # Payloads completos de la API (biografía, apariencia, imágenes, trabajo y conexiones):
+    # el archivado por id o, si no hay, el raw por nombre
+    logger.info(f"🗃️ Archivo raw: {len(archivo)} payloads en {archivo.ruta_datos}")
+    payloads = [
+        archivo.leer(heroe_id_api) or raw_dict.get(nombre_heroe) or {}
+        for heroe_id_api, nombre_heroe in zip(df['heroe_id_api'], df['nombre'])
+    ]
+    archivo.cerrar()
+    
+    # Transformación en lote: unas pocas operaciones por columna en lugar de un bucle por héroe
+    heroes = preparar_heroes(df, payloads)
     
     # Crear sesión
     db = SessionLocal()
     
     try:
-        # Limpiar datos existentes
-        logger.info("🧹 Limpiando datos existentes...")
-        db.query(MetricasHeroe).delete()
-        db.query(Aparicion).delete()
-        db.query(Trabajo).delete()
-        db.query(Conexion).delete()
-        db.query(Heroe).delete()
-        db.commit()
-        logger.info("✅ Datos anteriores eliminados")
+        # Todo ocurre en una transacción: los dashboards nunca ven las tablas a medio cargar
+        total = len(heroes)
+        vigentes = heroes['heroe_id_api'].tolist()
+        heroes, hashes = filtrar_cambiados(db.connection(), heroes, FORZAR_CARGA)
+        # Un héroe de HEROES que falta en el CSV es una extracción fallida, no una baja
+        catalogo = catalogo_configurado()
+        ausentes = sorted(set(catalogo) - set(vigentes))
+        if ausentes:
+            logger.warning(f"⚠️ {len(ausentes)} héroes de HEROES no vienen en el CSV y se conservan: {ausentes}")
+        bajas = db.execute(
+            select(Heroe.id, Heroe.heroe_id_api)
+            .where(Heroe.activo, Heroe.heroe_id_api.notin_(vigentes + catalogo))
+        ).all()
+        logger.info(
+            f"🔍 {len(heroes)} héroes nuevos o modificados, {total - len(heroes)} sin cambios, "
+            f"{len(bajas)} ya no están en el CSV"
+        )
         
-        # Insertar héroes
-        heroes_creados = 0
-        for _, row in df.iterrows():
-            nombre_heroe = row['nombre']
-            
-            # Obtener ID de la API desde los datos raw
-            heroe_id_api = id_dict.get(nombre_heroe, 0)
-            
-            if heroe_id_api == 0:
-                heroe_id_api = -heroes_creados - 1
-                logger.warning(f"⚠️ No se encontró ID para {nombre_heroe}, usando ID temporal: {heroe_id_api}")
-            
-            # Buscar datos raw adicionales
-            raw_info = raw_dict.get(nombre_heroe, {})
-            
-            # Limpiar valores numéricos (convertir nan a None)
-            inteligencia = clean_value(row.get('inteligencia'))
-            fuerza = clean_value(row.get('fuerza'))
-            velocidad = clean_value(row.get('velocidad'))
-            durabilidad = clean_value(row.get('durabilidad'))
-            poder = clean_value(row.get('poder'))
-            combate = clean_value(row.get('combate'))
-            
-            # Crear héroe
-            heroe = Heroe(
-                heroe_id_api=heroe_id_api,
-                nombre=nombre_heroe,
-                inteligencia=inteligencia,
-                fuerza=fuerza,
-                velocidad=velocidad,
-                durabilidad=durabilidad,
-                poder=poder,
-                combate=combate,
-                editorial=clean_value(row.get('editorial')),
-                fecha_creacion=datetime.now()
-            )
-            
-            # Añadir más campos si están disponibles en raw_info
-            if raw_info:
-                # Biography
-                biography = raw_info.get('biography', {})
-                heroe.nombre_real = clean_value(biography.get('full-name', ''))
-                heroe.alineacion = clean_value(biography.get('alignment', ''))
-                heroe.lugar_nacimiento = clean_value(biography.get('place-of-birth', ''))
-                heroe.primera_aparicion = clean_value(biography.get('first-appearance', ''))
-                
-                # Appearance
-                appearance = raw_info.get('appearance', {})
-                if appearance:
-                    heroe.genero = clean_value(appearance.get('gender', ''))
-                    heroe.raza = clean_value(appearance.get('race', ''))
-                    if appearance.get('height') and len(appearance['height']) > 1:
-                        heroe.altura = clean_value(appearance['height'][1])
-                    if appearance.get('weight') and len(appearance['weight']) > 1:
-                        heroe.peso = clean_value(appearance['weight'][1])
-                    heroe.color_ojos = clean_value(appearance.get('eye-color', ''))
-                    heroe.color_pelo = clean_value(appearance.get('hair-color', ''))
-                
-                # Images
-                images = raw_info.get('images', {})
-                if images:
-                    heroe.imagen_url = clean_value(images.get('url', ''))
-                    heroe.imagen_xs = clean_value(images.get('xs', ''))
-                    heroe.imagen_sm = clean_value(images.get('sm', ''))
-                    heroe.imagen_md = clean_value(images.get('md', ''))
-                    heroe.imagen_lg = clean_value(images.get('lg', ''))
-            
-            db.add(heroe)
-            db.flush()
-            heroes_creados += 1
-            
-            # Crear relaciones si hay datos raw
-            if raw_info:
-                # Work
-                work = raw_info.get('work', {})
-                if work:
-                    trabajo = Trabajo(
-                        heroe_id=heroe.id,
-                        ocupacion=clean_value(work.get('occupation', '')),
-                        base=clean_value(work.get('base', ''))
-                    )
-                    db.add(trabajo)
-                
-                # Connections
-                connections = raw_info.get('connections', {})
-                if connections:
-                    conexion = Conexion(
-                        heroe_id=heroe.id,
-                        grupo_afiliacion=clean_value(connections.get('group-affiliation', '')),
-                        familiares=clean_value(connections.get('relatives', ''))
-                    )
-                    db.add(conexion)
-            
-            # Crear métrica inicial (solo si hay al menos un valor numérico)
-            valores_numericos = [v for v in [inteligencia, fuerza, velocidad, durabilidad, poder, combate] 
-                               if v is not None]
-            
-            if valores_numericos:
-                poder_total = sum(valores_numericos)
-                poder_promedio = poder_total / len(valores_numericos)
-            else:
-                poder_total = 0
-                poder_promedio = 0
-            
-            metrica = MetricasHeroe(
-                heroe_id=heroe.id,
-                poder_total=poder_total,
-                poder_promedio=poder_promedio
-            )
-            db.add(metrica)
-            
-            logger.info(f"✅ Héroe creado: {heroe.nombre} (ID API: {heroe.heroe_id_api})")
+        if not heroes.empty:
+            ids = escribir_heroes(db.connection(), heroes)
+            logger.info(f"✅ {len(ids)} héroes insertados/actualizados")
+        
+        if dar_de_baja(db, bajas):
+            logger.info(f"🧹 {len(bajas)} héroes que ya no vienen en el CSV marcados como inactivos")
         
+        registrar_hashes(db.connection(), ORIGEN, hashes)
+        # carga_vigente compara con los activos, que incluyen los de HEROES conservados
+        activos = db.execute(select(func.count()).select_from(Heroe).where(Heroe.activo)).scalar()
+        registrar_archivo(db.connection(), ORIGEN, huella, activos)
         db.commit()
-        logger.info(f"✅ {heroes_creados} héroes guardados en BD")
+        
+        # Sin escrituras no hace falta refrescar la vista ni invalidar las cachés de los dashboards
+        if not heroes.empty or bajas:
+            publicar_carga()
+        logger.info(f"✅ {total} héroes vigentes en BD")
         return True
         
     except Exception as e:
@@ -190,15 +363,16 @@ def verificar_datos():
     """Verificar que los datos se cargaron correctamente"""
     db = SessionLocal()
     try:
-        total_heroes = db.query(Heroe).count()
+        total_heroes = db.query(Heroe).filter(Heroe.activo).count()
+        total_inactivos = db.query(Heroe).filter(~Heroe.activo).count()
         total_metricas = db.query(MetricasHeroe).count()
         
         logger.info(f"📊 Verificación BD:")
-        logger.info(f"   - Héroes: {total_heroes}")
+        logger.info(f"   - Héroes: {total_heroes} ({total_inactivos} inactivos)")
         logger.info(f"   - Métricas: {total_metricas}")
         
         # Mostrar top 5 héroes por poder
-        top_heroes = db.query(Heroe).order_by(Heroe.poder.desc()).limit(5).all()
+        top_heroes = db.query(Heroe).filter(Heroe.activo).order_by(Heroe.poder.desc()).limit(5).all()
         logger.info("🏆 Top 5 Héroes por Poder:")
         for h in top_heroes:
             logger.info(f"   → {h.nombre}: {h.poder}")
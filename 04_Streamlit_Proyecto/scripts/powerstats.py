@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+POWERSTATS = ['Inteligencia', 'Fuerza', 'Velocidad', 'Durabilidad', 'Poder', 'Combate']
+
+# Dimensiones categóricas que se guardan como códigos enteros
+CATEGORIAS = ['Editorial', 'Alineación', 'Género']
+
+# Bit de cada powerstat dentro de la máscara de validez
+BITS_POWERSTATS = (1 << np.arange(len(POWERSTATS))).astype(np.uint8)
+
+
+class PowerstatMatrix:
+    """Powerstats de todos los héroes en una matriz int8 compacta
+
+    - `valores`: int8 (n, 6); los powerstats van de 0 a 100. Un NULL se guarda como 0.
+    - `mascara`: uint8 (n,); el bit j indica que el powerstat j es conocido.
+    - `codigos`: {dimensión: int16 (n,)}, índices en `categorias[dimensión]` (-1 si falta).
+
+    Las medias, correlaciones y rankings ignoran los valores desconocidos en lugar de
+    contarlos como 0, y se calculan con operaciones vectorizadas de NumPy.
+    """
+
+    def __init__(self, ids, nombres, valores, mascara, codigos, categorias):
+        self.ids = ids
+        self.nombres = nombres
+        self.valores = valores
+        self.mascara = mascara
+        self.codigos = codigos
+        self.categorias = categorias
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Construye la matriz a partir de un DataFrame con ID, Nombre, CATEGORIAS y POWERSTATS (NaN = desconocido)"""
+        stats = df[POWERSTATS].to_numpy(dtype=np.float32)
+        validos = ~np.isnan(stats)
+        valores = np.where(validos, stats, 0).astype(np.int8)
+        mascara = (validos * BITS_POWERSTATS).sum(axis=1, dtype=np.uint8)
+
+        codigos, categorias = {}, {}
+        for dimension in CATEGORIAS:
+            categorica = pd.Categorical(df[dimension])
+            codigos[dimension] = categorica.codes.astype(np.int16)
+            categorias[dimension] = list(categorica.categories)
+
+        return cls(
+            ids=df['ID'].to_numpy(dtype=np.int32),
+            nombres=df['Nombre'].to_numpy(dtype=object),
+            valores=valores,
+            mascara=mascara,
+            codigos=codigos,
+            categorias=categorias
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def validos(self):
+        """Matriz booleana (n, 6) con los powerstats conocidos"""
+        return (self.mascara[:, None] & BITS_POWERSTATS) != 0
+
+    def _indice(self, stat):
+        return POWERSTATS.index(stat)
+
+    def filtrar(self, filas):
+        """Submatriz con las filas indicadas (máscara booleana o índices)"""
+        return PowerstatMatrix(
+            ids=self.ids[filas],
+            nombres=self.nombres[filas],
+            valores=self.valores[filas],
+            mascara=self.mascara[filas],
+            codigos={dimension: codigos[filas] for dimension, codigos in self.codigos.items()},
+            categorias=self.categorias
+        )
+
+    def donde(self, dimension, valor):
+        """Submatriz de los héroes cuya `dimension` es `valor`"""
+        categorias = self.categorias[dimension]
+        if valor not in categorias:
+            return self.filtrar(np.zeros(len(self), dtype=bool))
+        return self.filtrar(self.codigos[dimension] == categorias.index(valor))
+
+    def subconjunto(self, ids):
+        """Submatriz de los héroes con esos IDs (p. ej. el resultado de un filtro en SQL)"""
+        return self.filtrar(np.isin(self.ids, np.asarray(ids, dtype=np.int32)))
+
+    def media(self):
+        """Media de cada powerstat sobre los valores conocidos"""
+        validos = self.validos
+        conteo = validos.sum(axis=0)
+        suma = np.where(validos, self.valores, 0).sum(axis=0, dtype=np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(suma / conteo, index=POWERSTATS, dtype=np.float32)
+
+    def media_por(self, dimension):
+        """Media de cada powerstat por categoría de `dimension` (NaN si el grupo no tiene valores)"""
+        codigos = self.codigos[dimension]
+        presentes = codigos >= 0
+        grupos = len(self.categorias[dimension])
+        columnas = len(POWERSTATS)
+
+        # Un único bincount sobre (grupo, powerstat) aplanado para sumas y conteos
+        celdas = (codigos[presentes, None] * columnas + np.arange(columnas)).ravel()
+        validos = self.validos[presentes]
+        suma = np.bincount(celdas, weights=np.where(validos, self.valores[presentes], 0).ravel(),
+                           minlength=grupos * columnas)
+        conteo = np.bincount(celdas, weights=validos.ravel(), minlength=grupos * columnas)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = (suma / conteo).reshape(grupos, columnas).astype(np.float32)
+
+        # Solo las categorías con algún héroe en la matriz actual
+        con_heroes = np.bincount(codigos[presentes], minlength=grupos) > 0
+        return pd.DataFrame(
+            medias[con_heroes],
+            index=pd.Index(np.asarray(self.categorias[dimension], dtype=object)[con_heroes], name=dimension),
+            columns=POWERSTATS
+        )
+
+    def correlacion(self):
+        """Correlación de Pearson entre powerstats usando, en cada par, las filas con ambos valores conocidos"""
+        validos = self.validos.astype(np.float64)
+        x = np.where(self.validos, self.valores, 0).astype(np.float64)
+
+        # Sumas por pares restringidas a las filas válidas en ambas columnas
+        n = validos.T @ validos
+        suma = x.T @ validos
+        suma_cuadrados = (x * x).T @ validos
+        suma_productos = x.T @ x
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covarianza = suma_productos - suma * suma.T / n
+            varianza = suma_cuadrados - suma * suma / n
+            correlacion = covarianza / np.sqrt(varianza * varianza.T)
+        correlacion[(n < 2) | (varianza <= 0) | (varianza.T <= 0)] = np.nan
+        return pd.DataFrame(np.clip(correlacion, -1, 1), index=POWERSTATS, columns=POWERSTATS)
+
+    def top_k(self, stat, k=10, stats=None):
+        """Los `k` héroes con mayor `stat` conocido (empates por orden de ID), con los `stats` indicados"""
+        j = self._indice(stat)
+        candidatos = np.flatnonzero(self.mascara & BITS_POWERSTATS[j])
+        k = min(k, len(candidatos))
+        valores = self.valores[candidatos, j].astype(np.int16)
+        if k < len(candidatos):
+            elegidos = np.argpartition(-valores, k - 1)[:k]
+            # argpartition no garantiza qué empatados entran en el corte
+            corte = valores[elegidos].min()
+            elegidos = np.flatnonzero(valores >= corte)
+            candidatos, valores = candidatos[elegidos], valores[elegidos]
+        orden = np.lexsort((self.ids[candidatos], -valores))[:k]
+        return self.tabla(candidatos[orden], stats or [stat])
+
+    def tabla(self, filas, stats=None):
+        """DataFrame de presentación (Nombre, Editorial, powerstats) de las filas indicadas"""
+        stats = POWERSTATS if stats is None else stats
+        df = pd.DataFrame({'ID': self.ids[filas], 'Nombre': self.nombres[filas]})
+        for dimension in CATEGORIAS:
+            codigos = self.codigos[dimension][filas]
+            nombres = np.asarray(self.categorias[dimension] + [None], dtype=object)
+            df[dimension] = nombres[codigos]
+        for stat in stats:
+            j = self._indice(stat)
+            conocidos = (self.mascara[filas] & BITS_POWERSTATS[j]) != 0
+            df[stat] = pd.array(np.where(conocidos, self.valores[filas, j], 0), dtype='Int64')
+            df.loc[~conocidos, stat] = pd.NA
+        return df.reset_index(drop=True)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+POWERSTATS = ['inteligencia', 'fuerza', 'velocidad', 'durabilidad', 'poder', 'combate']
+
+# Columna de pd.json_normalize → columna del DataFrame transformado
+COLUMNAS_PAYLOAD = {
+    'id': 'heroe_id_api',
+    'name': 'nombre',
+    'powerstats.intelligence': 'inteligencia',
+    'powerstats.strength': 'fuerza',
+    'powerstats.speed': 'velocidad',
+    'powerstats.durability': 'durabilidad',
+    'powerstats.power': 'poder',
+    'powerstats.combat': 'combate',
+    'biography.full-name': 'nombre_real',
+    'biography.publisher': 'editorial',
+    'biography.alignment': 'alineacion',
+    'biography.place-of-birth': 'lugar_nacimiento',
+    'biography.first-appearance': 'primera_aparicion',
+    'appearance.gender': 'genero',
+    'appearance.race': 'raza',
+    'appearance.eye-color': 'color_ojos',
+    'appearance.hair-color': 'color_pelo',
+    'images.url': 'imagen_url',
+    'images.xs': 'imagen_xs',
+    'images.sm': 'imagen_sm',
+    'images.md': 'imagen_md',
+    'images.lg': 'imagen_lg',
+    'work.occupation': 'ocupacion',
+    'work.base': 'base',
+    'connections.group-affiliation': 'grupo_afiliacion',
+    'connections.relatives': 'familiares'
+}
+
+# Unidades métricas que aparecen en appearance.height[1] / weight[1] y su factor a cm / kg
+FACTORES_ALTURA = {'cm': 1, 'meters': 100, 'm': 100}
+FACTORES_PESO = {'kg': 1, 'tons': 1000, 't': 1000}
+
+PATRON_MEDIDA = r'^\s*([\d.,]+)\s*([A-Za-z]+)'
+
+
+def medida_metrica(textos, factores):
+    """'188 cm' → 188.0, '30.5 meters' → 3050.0, '0 kg' o '-' → NaN (la API usa 0 para desconocido)"""
+    partes = textos.astype('string').str.extract(PATRON_MEDIDA)
+    numero = pd.to_numeric(partes[0].str.replace(',', '', regex=False), errors='coerce')
+    valor = numero * partes[1].str.lower().map(factores).astype(float)
+    return valor.where(valor > 0).astype('Float64')
+
+
+def transformar_lote(payloads):
+    """DataFrame tipado con una fila por payload de SuperheroAPI, en el mismo orden
+
+    Los powerstats "null" pasan a NA (Int8), el texto "null" a NA y altura/peso se guardan
+    tal cual (`altura`, `peso`) y convertidos a `altura_cm` / `peso_kg`. Un payload vacío
+    produce una fila con todo NA.
+    """
+    plano = pd.json_normalize(list(payloads))
+    df = plano.reindex(columns=list(COLUMNAS_PAYLOAD)).rename(columns=COLUMNAS_PAYLOAD)
+
+    df['heroe_id_api'] = pd.to_numeric(df['heroe_id_api'], errors='coerce').astype('Int32')
+    df[POWERSTATS] = df[POWERSTATS].apply(pd.to_numeric, errors='coerce').astype('Int8')
+
+    textos = [columna for columna in df.columns if columna not in POWERSTATS and columna != 'heroe_id_api']
+    df[textos] = df[textos].astype(object).mask(df[textos].eq('null'))
+
+    # height/weight son listas [imperial, métrico]; .str[1] toma el métrico sin bucles
+    for origen, columna, columna_metrica, factores in (
+        ('appearance.height', 'altura', 'altura_cm', FACTORES_ALTURA),
+        ('appearance.weight', 'peso', 'peso_kg', FACTORES_PESO)
+    ):
+        medida = plano[origen].str[1] if origen in plano else pd.Series(np.nan, index=df.index, dtype=object)
+        df[columna] = medida
+        df[columna_metrica] = medida_metrica(medida, factores)
+
+    return df
+
+
+def a_registros(df):
+    """Filas como diccionarios con None en lugar de NaN/NA, listas para un INSERT"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+VISTA_RESUMEN = 'mv_resumen_poder'
+
+POWERSTATS = ['inteligencia', 'fuerza', 'velocidad', 'durabilidad', 'poder', 'combate']
+
+# Dimensiones del resumen; cada una es un GROUPING SET (más el total global)
+DIMENSIONES = ['editorial', 'alineacion', 'genero']
+
+
+def _sql_vista_resumen():
+    """SQL de la vista materializada con los agregados por editorial/alineación/género de los héroes activos"""
+    agregados = []
+    for stat in POWERSTATS:
+        agregados += [
+            f"AVG({stat}) AS {stat}_promedio",
+            f"MIN({stat}) AS {stat}_min",
+            f"MAX({stat}) AS {stat}_max",
+            f"percentile_cont(0.25) WITHIN GROUP (ORDER BY {stat}) AS {stat}_p25",
+            f"percentile_cont(0.5) WITHIN GROUP (ORDER BY {stat}) AS {stat}_p50",
+            f"percentile_cont(0.75) WITHIN GROUP (ORDER BY {stat}) AS {stat}_p75",
+        ]
+    poder_total = ' + '.join(f"COALESCE({stat}, 0)" for stat in POWERSTATS)
+
+    dimension = "CASE " + " ".join(
+        f"WHEN GROUPING({d}) = 0 THEN '{d}'" for d in DIMENSIONES
+    ) + " ELSE 'total' END"
+    valor = "CASE " + " ".join(
+        f"WHEN GROUPING({d}) = 0 THEN {d}" for d in DIMENSIONES
+    ) + " END"
+    grouping_sets = ", ".join(f"({d})" for d in DIMENSIONES) + ", ()"
+
+    return f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {VISTA_RESUMEN} AS
+        SELECT
+            {dimension} AS dimension,
+            {valor} AS valor,
+            COUNT(*) AS total,
+            {', '.join(agregados)},
+            AVG({poder_total}) AS poder_total_promedio,
+            MAX(fecha_actualizacion) AS ultima_actualizacion
+        FROM heroes
+        WHERE activo
+        GROUP BY GROUPING SETS ({grouping_sets})
+    """
+
+
+def crear_vistas(engine):
+    """Crea la vista materializada y el índice único que exige REFRESH ... CONCURRENTLY"""
+    with engine.begin() as conn:
+        conn.execute(text(_sql_vista_resumen()))
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{VISTA_RESUMEN} ON {VISTA_RESUMEN} (dimension, valor)"
+        ))
+    logger.info(f"✅ Vista materializada {VISTA_RESUMEN} creada/verificada")
+
+
+def refrescar_vistas(engine):
+    """Refresca el resumen sin bloquear las lecturas de los dashboards"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {VISTA_RESUMEN}"))
+        logger.info(f"🔄 Vista {VISTA_RESUMEN} refrescada")
+        return True
+    except SQLAlchemyError as e:
+        # Los datos ya están guardados; el resumen quedará desactualizado hasta el próximo refresco
+        logger.error(f"❌ Error refrescando {VISTA_RESUMEN}: {e}")
+        return False
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 import pandas as pd
 import matplotlib.pyplot as plt
-import os
+from scripts.formatos import leer_tabla
 
-if not os.path.exists("data/superheroes.csv"):
+df = leer_tabla("data/superheroes")
+
+if df is None:
     print("Primero ejecuta extractor.py")
     exit()
 
-df = pd.read_csv("data/superheroes.csv")
-
 plt.figure(figsize=(10,6))
 plt.bar(df["nombre"], df["poder"])
 plt.title("Nivel de Poder por Superhéroe")
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+
+def _payload(heroe_id='70', nombre='Batman', **extra):
+    datos = {
+        'response': 'success',
+        'id': heroe_id,
+        'name': nombre,
+        'powerstats': {
+            'intelligence': '100', 'strength': '26', 'speed': '27',
+            'durability': '50', 'power': 'null', 'combat': '100'
+        },
+        'biography': {'full-name': 'Bruce Wayne', 'publisher': 'DC Comics', 'alignment': 'good'},
+        'appearance': {'gender': 'Male', 'race': 'Human', 'height': ["6'2", '188 cm'], 'weight': ['210 lb', '95 kg']},
+        'work': {'occupation': 'Businessman', 'base': 'Batcave'},
+        'connections': {'group-affiliation': 'Justice League', 'relatives': 'null'}
+    }
+    datos.update(extra)
+    return datos
+
+
+@pytest.fixture
+def payload():
+    """Fábrica de payloads de SuperheroAPI: payload(id, nombre, **claves_a_sustituir)"""
+    return _payload
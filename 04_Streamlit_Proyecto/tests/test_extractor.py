@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import csv
+import json
+import importlib
+import pytest
+
+from scripts.pipeline import Pipeline, SumideroCSV
+
+
+@pytest.fixture
+def extractor_modulo(tmp_path, monkeypatch):
+    """scripts.extractor importado desde un directorio temporal (su logging escribe en logs/etl.log)"""
+    (tmp_path / 'logs').mkdir()
+    (tmp_path / 'data').mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('API_TOKEN', 'token')
+    monkeypatch.setenv('BASE_URL', 'https://api.invalid')
+    monkeypatch.setenv('HEROES', '1,2,3')
+    monkeypatch.setenv('HTTP_CACHE', 'false')
+    monkeypatch.setenv('EXTRACTOR_WORKERS', '1')
+    monkeypatch.setenv('EXTRACCION_INCREMENTAL', 'false')
+    return importlib.import_module('scripts.extractor')
+
+
+def test_transformar_usa_la_transformacion_en_lote(extractor_modulo, payload):
+    registro = extractor_modulo.SuperheroExtractor.transformar(payload(), '2026-01-01T00:00:00')
+
+    assert list(registro) == extractor_modulo.COLUMNAS_CSV
+    assert registro['id_api'] == 70
+    assert registro['inteligencia'] == 100
+    assert registro['poder'] is None
+    assert registro['fecha_extraccion'] == '2026-01-01T00:00:00'
+
+
+def test_conserva_el_registro_previo_si_falla_sin_modo_incremental(extractor_modulo, monkeypatch):
+    modulo = extractor_modulo
+    extractor = modulo.SuperheroExtractor()
+    assert not extractor.incremental
+
+    previos = [
+        {'id_api': 1, 'nombre': 'Viejo 1', 'fecha_extraccion': '2020-01-01T00:00:00'},
+        {'id_api': 2, 'nombre': 'Viejo 2', 'fecha_extraccion': '2020-01-01T00:00:00'}
+    ]
+    with open(extractor.ruta_manifiesto, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(registro) + '\n' for registro in previos)
+
+    # 1 se re-extrae, 2 falla y conserva su versión anterior, 3 falla y no tiene versión anterior
+    nuevos = {'1': {'id_api': 1, 'nombre': 'Nuevo 1', 'fecha_extraccion': '2026-01-01T00:00:00'}}
+    monkeypatch.setattr(extractor, 'procesar_heroe', lambda hero_id: nuevos.get(hero_id))
+
+    with Pipeline({'csv': SumideroCSV('data/superheroes.csv', modulo.COLUMNAS_CSV)}, 'data/checkpoint.json') as pipeline:
+        extractor.ejecutar(pipeline)
+
+    assert pipeline.fallidos == ['3']
+    with open('data/superheroes.csv.parcial', encoding='utf-8') as f:
+        assert [fila['nombre'] for fila in csv.DictReader(f)] == ['Nuevo 1', 'Viejo 2']
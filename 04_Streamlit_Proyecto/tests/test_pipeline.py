@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import csv
+import json
+import pytest
+
+from scripts.pipeline import Pipeline, SumideroCSV, SumideroNDJSON, SumideroBD, mapear_acotado, leer_registros
+
+
+class Interrupcion(Exception):
+    pass
+
+
+@pytest.fixture
+def rutas(tmp_path):
+    return {
+        'csv': str(tmp_path / 'datos.csv'),
+        'ndjson': str(tmp_path / 'datos.ndjson'),
+        'checkpoint': str(tmp_path / 'datos.checkpoint.json')
+    }
+
+
+def ejecutar(rutas, claves, fallan=(), interrumpir_en=None, cada=2, reintentos=3, bd=None):
+    """Una ejecución del pipeline sobre `claves`; devuelve (pipeline, claves procesadas)"""
+    sumideros = {'csv': SumideroCSV(rutas['csv'], ['clave']), 'ndjson': SumideroNDJSON(rutas['ndjson'])}
+    if bd is not None:
+        sumideros['bd'] = SumideroBD(bd.extend)
+    procesadas = []
+
+    def registros(pendientes):
+        for clave in pendientes:
+            if clave == interrumpir_en:
+                raise Interrupcion(clave)
+            procesadas.append(clave)
+            yield clave, None if clave in fallan else {'clave': clave}
+
+    with Pipeline(sumideros, rutas['checkpoint'], cada=cada, reintentos=reintentos) as pipeline:
+        try:
+            pipeline.ejecutar(registros(pipeline.pendientes(claves)))
+        except Interrupcion:
+            pass
+    return pipeline, procesadas
+
+
+def claves_csv(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return [fila['clave'] for fila in csv.DictReader(f)]
+
+
+def test_ejecucion_completa(rutas):
+    pipeline, _ = ejecutar(rutas, ['1', '2', '3'])
+
+    assert pipeline.publicado
+    assert claves_csv(rutas['csv']) == ['1', '2', '3']
+    assert [r['clave'] for r in leer_registros(rutas['ndjson'])] == ['1', '2', '3']
+
+
+def test_reanuda_tras_interrupcion(rutas):
+    cargados = []
+    pipeline, _ = ejecutar(rutas, list('12345'), interrumpir_en='4', bd=cargados)
+
+    assert not pipeline.publicado
+    with open(rutas['checkpoint'], encoding='utf-8') as f:
+        assert json.load(f)['completados'] == ['1', '2']
+
+    # '3' se escribió después del último checkpoint: se recorta y se repite
+    pipeline, procesadas = ejecutar(rutas, list('12345'), bd=cargados)
+    assert procesadas == ['3', '4', '5']
+    assert pipeline.publicado
+    assert claves_csv(rutas['csv']) == list('12345')
+    assert [r['clave'] for r in cargados] == list('12345')
+
+
+def test_reintenta_solo_los_fallidos(rutas):
+    pipeline, _ = ejecutar(rutas, ['1', '2', '3'], fallan={'2'})
+
+    # Una extracción parcial no se publica
+    assert not pipeline.publicado
+    assert pipeline.fallidos == ['2']
+    with pytest.raises(FileNotFoundError):
+        claves_csv(rutas['csv'])
+
+    pipeline, procesadas = ejecutar(rutas, ['1', '2', '3'])
+    assert procesadas == ['2']
+    assert pipeline.publicado
+    assert sorted(claves_csv(rutas['csv'])) == ['1', '2', '3']
+
+
+def test_publica_sin_los_fallidos_tras_agotar_reintentos(rutas):
+    for _ in range(2):
+        pipeline = ejecutar(rutas, ['1', '2'], fallan={'2'}, reintentos=3)[0]
+        assert not pipeline.publicado
+
+    pipeline, procesadas = ejecutar(rutas, ['1', '2'], fallan={'2'}, reintentos=3)
+    assert procesadas == ['2']
+    assert pipeline.publicado
+    assert pipeline.fallidos == ['2']
+    assert claves_csv(rutas['csv']) == ['1']
+
+
+def test_checkpoint_que_no_coincide_empieza_de_cero(rutas):
+    ejecutar(rutas, ['1', '2', '3'], interrumpir_en='3')
+    with open(rutas['checkpoint'], 'w', encoding='utf-8') as f:
+        f.write('{no es json')
+
+    pipeline, procesadas = ejecutar(rutas, ['1', '2', '3'])
+    assert procesadas == ['1', '2', '3']
+    assert claves_csv(rutas['csv']) == ['1', '2', '3']
+
+
+def test_mapear_acotado_conserva_el_orden():
+    assert list(mapear_acotado(lambda x: x * x, range(20), workers=4, ventana=3)) == [x * x for x in range(20)]
+
+
+def test_leer_registros_formato_anterior(tmp_path):
+    ruta = tmp_path / 'raw.json'
+    ruta.write_text(json.dumps([{'id': 1}, {'id': 2}]))
+
+    assert list(leer_registros(str(ruta))) == [{'id': 1}, {'id': 2}]
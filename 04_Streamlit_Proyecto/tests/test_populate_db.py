@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import pandas as pd
+import pytest
+
+from scripts import populate_db
+from scripts.manifiesto import hash_filas, hash_archivo
+from scripts.populate_db import COLUMNAS_HASH, filtrar_cambiados, preparar_heroes, catalogo_configurado
+
+
+@pytest.fixture
+def heroes(payload):
+    """preparar_heroes() de un CSV con las filas (id, nombre, poder) y sus payloads"""
+    def preparar(*filas):
+        df = pd.DataFrame(filas, columns=['heroe_id_api', 'nombre', 'poder'])
+        return preparar_heroes(df, [payload(str(heroe_id), nombre) for heroe_id, nombre, _ in filas])
+    return preparar
+
+
+def test_hash_filas_no_depende_del_lote(heroes):
+    solo = heroes((1, 'A', '38'))
+    con_nulos = heroes((2, 'B', 'null'), (1, 'A', '38'))
+
+    assert solo['poder'].dtype == 'Int8'
+    assert hash_filas(solo[COLUMNAS_HASH]).iloc[0] == hash_filas(con_nulos[COLUMNAS_HASH]).iloc[1]
+
+
+def test_hash_filas_detecta_cambios_e_ignora_el_indice(heroes):
+    df = heroes((1, 'A', '38'), (2, 'B', '40'))
+    hashes = hash_filas(df[COLUMNAS_HASH])
+    cambiado = df.copy()
+    cambiado.loc[1, 'poder'] = 41
+
+    assert hashes.dtype == 'int64'
+    assert hashes.index.equals(df.index)
+    assert hash_filas(df[COLUMNAS_HASH].set_axis([10, 20])).tolist() == hashes.tolist()
+    assert hash_filas(cambiado[COLUMNAS_HASH]).tolist()[0] == hashes.iloc[0]
+    assert hash_filas(cambiado[COLUMNAS_HASH]).tolist()[1] != hashes.iloc[1]
+
+
+def test_hash_archivo(tmp_path):
+    a, b = tmp_path / 'a.csv', tmp_path / 'b.csv'
+    a.write_text('x')
+    huella = hash_archivo(str(a), str(tmp_path / 'no_existe.csv'))
+
+    assert hash_archivo(str(tmp_path / 'no_existe.csv')) is None
+    assert huella == hash_archivo(str(a))
+    b.write_text('x')
+    assert hash_archivo(str(b)) != huella
+    a.write_text('y')
+    assert hash_archivo(str(a)) != huella
+
+
+def test_filtrar_cambiados(heroes, monkeypatch):
+    df = heroes((1, 'A', '38'), (2, 'B', '40'), (3, 'C', 'null'))
+    hashes = pd.Series(hash_filas(df[COLUMNAS_HASH]).to_numpy(), index=df['heroe_id_api'])
+    # 1 sin cambios, 2 con otro hash, 3 nuevo
+    registrados = {1: hashes[1], 2: hashes[2] + 1}
+    monkeypatch.setattr(populate_db, 'hashes_registrados', lambda conn, origen: registrados)
+
+    cambiados, nuevos = filtrar_cambiados(None, df)
+    assert cambiados['heroe_id_api'].tolist() == [2, 3]
+    assert nuevos.to_dict() == {2: hashes[2], 3: hashes[3]}
+
+    todos, _ = filtrar_cambiados(None, df, forzar=True)
+    assert todos['heroe_id_api'].tolist() == [1, 2, 3]
+
+
+def test_catalogo_configurado(monkeypatch):
+    monkeypatch.setenv('HEROES', '1, 2,abc,,30')
+    assert catalogo_configurado() == [1, 2, 30]
+    monkeypatch.delenv('HEROES')
+    assert catalogo_configurado() == []
+
+
+def test_csv_vacio_no_toca_la_bd(tmp_path, monkeypatch):
+    # Una extracción en la que fallan todos los héroes deja un CSV solo con cabecera
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'superheroes.csv').write_text(
+        'id_api,nombre,inteligencia,fuerza,velocidad,durabilidad,poder,combate,editorial,fecha_extraccion\n'
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(populate_db, 'FORZAR_CARGA', True)
+
+    def sin_bd(*args, **kwargs):
+        pytest.fail("populate_from_csv no debe abrir la base de datos con un CSV vacío")
+    monkeypatch.setattr(populate_db, 'SessionLocal', sin_bd)
+    monkeypatch.setattr(populate_db, 'get_engine', sin_bd)
+
+    assert populate_db.populate_from_csv() is True
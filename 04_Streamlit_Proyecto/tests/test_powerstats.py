@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.powerstats import POWERSTATS, PowerstatMatrix
+
+
+@pytest.fixture
+def matriz():
+    df = pd.DataFrame({
+        'ID': [1, 2, 3, 4],
+        'Nombre': ['A', 'B', 'C', 'D'],
+        'Editorial': ['Marvel', 'DC', 'Marvel', 'Desconocida'],
+        'Alineación': ['good', 'bad', 'good', 'good'],
+        'Género': ['Male', 'Female', 'Male', 'Male'],
+        'Inteligencia': [10, 20, np.nan, 40],
+        'Fuerza': [100, 50, 0, np.nan],
+        'Velocidad': [1, 2, 3, 4],
+        'Durabilidad': [np.nan] * 4,
+        'Poder': [90, np.nan, 90, 30],
+        'Combate': [5, 10, 15, 20]
+    })
+    return PowerstatMatrix.desde_dataframe(df)
+
+
+def test_tipos_compactos(matriz):
+    assert matriz.valores.dtype == np.int8
+    assert matriz.mascara.dtype == np.uint8
+    assert matriz.validos.sum(axis=0).tolist() == [3, 3, 4, 0, 3, 4]
+
+
+def test_media_ignora_desconocidos(matriz):
+    media = matriz.media()
+
+    assert media['Inteligencia'] == pytest.approx(70 / 3)
+    assert media['Fuerza'] == pytest.approx(50)
+    assert np.isnan(media['Durabilidad'])
+
+
+def test_media_por_categoria(matriz):
+    medias = matriz.media_por('Editorial')
+
+    assert medias.index.tolist() == ['DC', 'Desconocida', 'Marvel']
+    assert medias.loc['Marvel', 'Inteligencia'] == 10
+    assert medias.loc['Marvel', 'Poder'] == 90
+    assert np.isnan(medias.loc['DC', 'Poder'])
+
+
+def test_correlacion_por_pares(matriz):
+    correlacion = matriz.correlacion()
+    esperada = pd.DataFrame({'v': [1, 2, 3, 4], 'c': [5, 10, 15, 20]}).corr().iloc[0, 1]
+
+    assert correlacion.loc['Velocidad', 'Combate'] == pytest.approx(esperada)
+    assert np.isnan(correlacion.loc['Durabilidad', 'Combate'])
+    assert correlacion.shape == (len(POWERSTATS), len(POWERSTATS))
+
+
+def test_top_k_sin_nulos_y_empates_por_id(matriz):
+    top = matriz.top_k('Poder', 2)
+
+    assert top['ID'].tolist() == [1, 3]
+    assert top['Poder'].tolist() == [90, 90]
+    assert matriz.top_k('Durabilidad', 3).empty
+
+
+def test_subconjunto_y_donde(matriz):
+    assert matriz.subconjunto([4, 2]).ids.tolist() == [2, 4]
+    assert matriz.donde('Editorial', 'Marvel').nombres.tolist() == ['A', 'C']
+    assert len(matriz.donde('Editorial', 'Image')) == 0
+
+
+def test_tabla_con_nulos(matriz):
+    tabla = matriz.tabla(np.array([1, 3]), ['Poder'])
+
+    assert tabla['Editorial'].tolist() == ['DC', 'Desconocida']
+    assert pd.isna(tabla.loc[0, 'Poder'])
+    assert tabla.loc[1, 'Poder'] == 30
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import pandas as pd
+
+from scripts.transformacion import POWERSTATS, transformar_lote, medida_metrica, a_registros
+
+
+def test_tipa_powerstats_y_nulos(payload):
+    df = transformar_lote([payload()])
+
+    assert df['heroe_id_api'].dtype == 'Int32'
+    assert all(df[stat].dtype == 'Int8' for stat in POWERSTATS)
+    assert df.loc[0, 'inteligencia'] == 100
+    assert pd.isna(df.loc[0, 'poder'])
+    assert pd.isna(df.loc[0, 'familiares'])
+    assert df.loc[0, 'editorial'] == 'DC Comics'
+
+
+def test_medidas_metricas(payload):
+    df = transformar_lote([payload()])
+
+    assert df.loc[0, 'altura'] == '188 cm'
+    assert df.loc[0, 'altura_cm'] == 188
+    assert df.loc[0, 'peso_kg'] == 95
+
+
+def test_conversion_de_unidades_y_desconocidos():
+    textos = pd.Series(['30.5 meters', '0 kg', '-', None, '1,200 cm'])
+    valores = medida_metrica(textos, {'cm': 1, 'kg': 1, 'meters': 100})
+    assert valores[0] == 3050
+    assert valores.isna().tolist() == [False, True, True, True, False]
+    assert valores[4] == 1200
+
+
+def test_conserva_orden_y_payload_vacio(payload):
+    df = transformar_lote([payload('2', 'B'), {}, payload('1', 'A')])
+
+    assert df['nombre'].tolist()[::2] == ['B', 'A']
+    assert df.loc[1].isna().all()
+
+
+def test_a_registros_usa_none(payload):
+    registro = a_registros(transformar_lote([payload()])[['heroe_id_api', 'poder', 'inteligencia']])[0]
+
+    assert registro == {'heroe_id_api': 70, 'poder': None, 'inteligencia': 100}
+    assert type(registro['inteligencia']) is int